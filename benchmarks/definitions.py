@@ -0,0 +1,115 @@
+"""
+Synthetic definitions for the benchmarks.
+
+Every definition starts with a positional and then cycles through the field
+shapes dykes supports. The first field of each shape gets generated flags;
+later ones are given explicit Flags, since their generated short flags would
+collide.
+"""
+
+import dataclasses
+import pathlib
+import types
+import typing
+from typing import Annotated
+
+import dykes
+from dykes.options import Flags, NArgs
+
+KINDS = ("dataclass", "namedtuple")
+
+
+class Shape(typing.NamedTuple):
+    name: str
+    hint: typing.Any
+    default: typing.Any
+    args: tuple[str, ...]
+
+
+def _shape(index: int, name: str) -> Shape:
+    flag = f"--{name.replace('_', '-')}"
+    # Value fields need Flags to be options; flag fields generate their own.
+    flags = Flags(flag)
+    generated = () if name.isalpha() else (flags,)
+    match index % 9:
+        case 0:
+            return Shape(name, _annotate(dykes.Count, *generated), 0, (flag, flag))
+        case 1:
+            hint = _annotate(dykes.StoreTrue, *generated)
+            return Shape(name, hint, False, (flag,))
+        case 2:
+            hint = _annotate(dykes.StoreFalse, *generated)
+            return Shape(name, hint, True, (flag,))
+        case 3:
+            hint = Annotated[list[int], flags, NArgs("*")]
+            return Shape(name, hint, list, (flag, "1", "2", "3"))
+        case 4:
+            hint = Annotated[list[float], flags, NArgs(2), "Two numbers."]
+            return Shape(name, hint, list, (flag, "0.5", "2"))
+        case 5:
+            hint = Annotated[str, flags, f"The {name} to use."]
+            return Shape(name, hint, "", (flag, name))
+        case 6:
+            hint = Annotated[int, flags, "A level, with help long enough to wrap. " * 3]
+            return Shape(name, hint, 1, (flag, "7"))
+        case 7:
+            hint = Annotated[list[str], flags, NArgs("+"), "Some words."]
+            return Shape(name, hint, list, (flag, "a", "b"))
+        case _:
+            return Shape(
+                name, Annotated[pathlib.Path, flags], pathlib.Path("."), (flag, "out")
+            )
+
+
+def _annotate(hint: typing.Any, *metadata: typing.Any) -> typing.Any:
+    return Annotated[hint, *metadata] if metadata else hint
+
+
+BASES = ("count", "force", "quiet", "ints", "ratio", "name", "level", "words", "path")
+
+
+def shapes(fields: int) -> list[Shape]:
+    """
+    The shapes of a definition with fields fields, positional included.
+    """
+    output = [Shape("target", Annotated[str, "What to work on."], None, ("target",))]
+    for index in range(fields - 1):
+        base = BASES[index % len(BASES)]
+        name = base if index < len(BASES) else f"{base}_{index}"
+        output.append(_shape(index, name))
+    return output
+
+
+def make_definition(kind: str, fields: int) -> tuple[type, list[str]]:
+    """
+    A definition of kind with fields fields, and an argv that sets them all.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r}. Use one of {', '.join(KINDS)}.")
+    parts = shapes(fields)
+    args = [arg for shape in parts for arg in shape.args]
+    name = f"{kind.title()}{fields}"
+    if kind == "dataclass":
+        definition = dataclasses.make_dataclass(
+            name, [(shape.name, shape.hint, _field(shape.default)) for shape in parts]
+        )
+    else:
+        namespace = {
+            "__module__": __name__,
+            "__annotations__": {shape.name: shape.hint for shape in parts},
+        }
+        for shape in parts[1:]:
+            namespace[shape.name] = [] if shape.default is list else shape.default
+        definition = types.new_class(
+            name, (typing.NamedTuple,), exec_body=lambda ns: ns.update(namespace)
+        )
+    definition.__doc__ = f"A generated {kind} with {fields} fields."
+    return definition, args
+
+
+def _field(default: typing.Any) -> typing.Any:
+    if default is None:
+        return dataclasses.field()
+    elif default is list:
+        return dataclasses.field(default_factory=list)
+    return dataclasses.field(default=default)
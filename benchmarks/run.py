@@ -0,0 +1,166 @@
+"""
+Time dykes on generated definitions and compare against a baseline.
+
+    PYTHONPATH=src python benchmarks/run.py --output results.json
+    PYTHONPATH=src python benchmarks/run.py --baseline benchmarks/baseline.json
+
+Each case is a generated dataclass or NamedTuple (see definitions.py). Times
+are the best of --repeat runs, in microseconds; peak memory is the tracemalloc
+peak of a cold parse, in KiB. With a baseline, every metric that grew by more
+than --tolerance, and by more than --noise units, is reported and the exit
+status is 1. Refresh the stored baseline with --output benchmarks/baseline.json.
+"""
+
+import dataclasses
+import gc
+import json
+import pathlib
+import platform
+import sys
+import time
+import tracemalloc
+import typing
+from typing import Annotated
+
+import dykes
+from dykes import helptext, processing
+from dykes.options import Flags, NArgs
+
+from definitions import KINDS, make_definition
+
+FORMAT_VERSION = 1
+
+
+@dataclasses.dataclass
+class Options:
+    """Time dykes on generated definitions and compare against a baseline."""
+
+    sizes: Annotated[list[int], Flags("--sizes"), NArgs("+"), "Field counts."] = (
+        dataclasses.field(default_factory=lambda: [1, 10, 100, 1000])
+    )
+    repeat: Annotated[int, Flags("--repeat"), "Runs per timing."] = 5
+    output: Annotated[str, Flags("--output"), "Write results here as JSON."] = ""
+    baseline: Annotated[str, Flags("--baseline"), "Results to compare with."] = ""
+    tolerance: Annotated[
+        float, Flags("--tolerance"), "Allowed growth, 1.0 is double."
+    ] = 1.0
+    noise: Annotated[float, Flags("--noise"), "Ignore growth below this."] = 50.0
+
+
+def best_us(function: typing.Callable[[], typing.Any], repeat: int) -> float:
+    """
+    The fastest of repeat runs. As with timeit, the collector is paused.
+    """
+    timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            function()
+            timings.append((time.perf_counter_ns() - start) / 1_000)
+    finally:
+        gc.enable()
+    return round(min(timings), 1)
+
+
+def cold(definition: type, function: typing.Callable[[], typing.Any]):
+    def run():
+        dykes.clear_cache(definition)
+        function()
+
+    return run
+
+
+def peak_kib(function: typing.Callable[[], typing.Any]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def measure(kind: str, fields: int, repeat: int) -> dict[str, float]:
+    definition, args = make_definition(kind, fields)
+    plan = processing.compile_plan(definition)
+
+    def parse():
+        return dykes.parse_args(definition, args=args)
+
+    def fast_parse():
+        return dykes.parse_args(definition, args=args, fast=True)
+
+    parser = processing.lower_plan(plan, prog="bench")
+    parser.format_help()
+    parse()
+    return {
+        "compile_plan_us": best_us(lambda: processing.compile_plan(definition), repeat),
+        "build_parser_us": best_us(lambda: dykes.build_parser(definition), repeat),
+        "cold_parse_us": best_us(cold(definition, parse), repeat),
+        "parse_us": best_us(parse, repeat),
+        "fast_parse_us": best_us(fast_parse, repeat),
+        "help_us": best_us(lambda: helptext.render(plan, "bench", 78), repeat),
+        "cached_help_us": best_us(parser.format_help, repeat),
+        "cold_parse_peak_kib": peak_kib(cold(definition, parse)),
+    }
+
+
+def run(sizes: list[int], repeat: int) -> dict[str, typing.Any]:
+    results = {}
+    for kind in KINDS:
+        for fields in sizes:
+            results[f"{kind}-{fields}"] = measure(kind, fields, repeat)
+    return {
+        "format": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def regressions(
+    current: dict[str, typing.Any],
+    baseline: dict[str, typing.Any],
+    tolerance: float,
+    noise: float,
+) -> list[str]:
+    """
+    A line for each metric that grew past tolerance and noise.
+
+    Cases or metrics missing from either side are skipped.
+    """
+    lines = []
+    for name, metrics in current["results"].items():
+        before = baseline["results"].get(name, {})
+        for metric, value in metrics.items():
+            old = before.get(metric)
+            if old is None:
+                continue
+            if value > old * (1 + tolerance) and value - old > noise:
+                lines.append(f"{name} {metric}: {old} -> {value}")
+    return lines
+
+
+def main(options: Options) -> int:
+    results = run(options.sizes, options.repeat)
+    for name, metrics in results["results"].items():
+        print(name, " ".join(f"{key}={value}" for key, value in metrics.items()))
+    if options.output:
+        pathlib.Path(options.output).write_text(json.dumps(results, indent=2) + "\n")
+    if not options.baseline:
+        return 0
+    baseline = json.loads(pathlib.Path(options.baseline).read_text())
+    if baseline.get("format") != FORMAT_VERSION:
+        print(f"{options.baseline} has an unknown format.", file=sys.stderr)
+        return 2
+    found = regressions(results, baseline, options.tolerance, options.noise)
+    for line in found:
+        print(f"regression: {line}", file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(dykes.parse_args(Options)))
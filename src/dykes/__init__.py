@@ -1,12 +1,79 @@
-from .processing import parse_args, build_parser
+import importlib
+import typing
+
 from .options import Action, Count, StoreFalse, StoreTrue
 
+if typing.TYPE_CHECKING:
+    from .aio import ParseResult, parse_args_async
+    from .application import run
+    from .instrumentation import stats
+    from .stages import Stages
+    from .subcommands import Commands
+    from .processing import (
+        ParseError,
+        build_parser,
+        clear_cache,
+        compile_plan,
+        parse_args,
+        parse_known,
+        parse_many,
+    )
+
 __all__ = [
+    "Commands",
     "options",
     "parse_args",
+    "parse_known",
+    "parse_many",
+    "parse_args_async",
+    "run",
+    "ParseError",
+    "ParseResult",
+    "Stages",
     "build_parser",
+    "clear_cache",
+    "compile_plan",
+    "stats",
     "Action",
     "Count",
     "StoreFalse",
     "StoreTrue",
 ]
+
+# Attributes loaded on first access, so importing dykes for its type aliases
+# does not pay for argparse.
+_LAZY_ATTRIBUTES = {
+    "Commands": "subcommands",
+    "ParseError": "processing",
+    "build_parser": "processing",
+    "clear_cache": "processing",
+    "compile_plan": "processing",
+    "parse_args": "processing",
+    "parse_known": "processing",
+    "parse_many": "processing",
+    "parse_args_async": "aio",
+    "ParseResult": "aio",
+    "run": "application",
+    "Stages": "stages",
+    "stats": "instrumentation",
+}
+
+
+def __getattr__(name: str) -> typing.Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        if not name.startswith("_"):
+            # Submodules such as dykes.completion load on first access too.
+            try:
+                return importlib.import_module(f".{name}", __name__)
+            except ModuleNotFoundError as error:
+                if error.name != f"{__name__}.{name}":
+                    raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
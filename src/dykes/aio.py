@@ -0,0 +1,112 @@
+"""
+Parsing for asyncio applications.
+
+parse_args_async never exits or prints. Help, usage and errors come back in
+the result. Response files and config files are read in a worker thread, so
+the event loop is not blocked on disk.
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import functools
+import os
+import shlex
+import threading
+import typing
+import weakref
+
+from . import internal, processing
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ParseResult[ArgsType]:
+    """
+    The outcome of parse_args_async: a value, or the error that replaced it.
+
+    Help requests are errors with status 0 whose output holds the help text.
+    """
+
+    value: ArgsType | None = None
+    error: processing.ParseError | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def parse_args_async[ArgsType](
+    parameter_definition: type[ArgsType],
+    args: typing.Sequence[str] | str,
+    *,
+    prog: str | None = None,
+    fast: bool = False,
+    response_files: bool = False,
+    env_prefix: str | None = None,
+    config: os.PathLike[str] | str | None = None,
+) -> ParseResult[ArgsType]:
+    """
+    Parse args, a list or a command line string, without blocking the loop.
+
+        result = await dykes.parse_args_async(Deploy, message.text)
+        if result.ok:
+            await deploy(result.value)
+        else:
+            await reply(result.error.output)
+
+    prog names the program in usage, help and errors, as it does for
+    dykes.application.serve, and defaults to the running script's name. The
+    other keyword arguments work as they do for dykes.parse_args. Parsers
+    are shared with parse_many, so each definition's parser is built once,
+    and once more for each prog.
+    """
+    settings = internal.ParseSettings(
+        fast=fast, response_files=response_files, env_prefix=env_prefix, config=config
+    )
+    parser_for = processing.raising_parser_cache.get
+    if prog is not None:
+        parser_for = functools.partial(_named_parser, prog=prog)
+    try:
+        if isinstance(args, str):
+            try:
+                args = shlex.split(args)
+            except ValueError as error:
+                raise processing.ParseError(str(error)) from None
+        argument_sources = processing.sources_for(parameter_definition, settings)
+        try:
+            if response_files or config is not None:
+                args, layered = await asyncio.to_thread(
+                    processing.prepare, args, settings, argument_sources
+                )
+            else:
+                args, layered = processing.prepare(args, settings, argument_sources)
+        except (OSError, internal.ConversionError) as error:
+            parser_for(parameter_definition).error(str(error))
+        value = processing.match(parameter_definition, args, parser_for, fast, layered)
+    except processing.ParseError as error:
+        return ParseResult(error=error)
+    return ParseResult(value=value)
+
+
+_named_parsers: weakref.WeakKeyDictionary[
+    argparse.ArgumentParser, dict[str, argparse.ArgumentParser]
+] = weakref.WeakKeyDictionary()
+_named_lock = threading.Lock()
+
+
+def _named_parser(definition: type, prog: str) -> argparse.ArgumentParser:
+    """
+    The raising parser of definition, built again under prog. Kept per
+    cached parser, so clear_cache drops these too.
+    """
+    parser = processing.raising_parser_cache.get(definition)
+    with _named_lock:
+        named = _named_parsers.setdefault(parser, {})
+        named_parser = named.get(prog)
+        if named_parser is None:
+            named_parser = named[prog] = processing.lower_plan(
+                processing.plan_cache.get(definition),
+                processing.RaisingArgumentParser,
+                prog,
+            )
+        return named_parser
@@ -0,0 +1,178 @@
+"""
+Applications as callable definitions.
+
+A definition with a __call__ method is a whole program:
+
+    @dataclass
+    class Greet:
+        name: str
+
+        def __call__(self) -> int:
+            print(f"Hello, {self.name}!")
+            return 0
+
+    if __name__ == "__main__":
+        raise SystemExit(dykes.run(Greet))
+
+For programs whose imports are slow, serve keeps one warm process behind a
+Unix socket. Each request is handled in a fork of it, with the caller's
+arguments, working directory, environment and stdio, so repeat invocations
+skip interpreter startup, imports and parser building. dykes.client forwards
+a command line to it.
+"""
+
+import argparse
+import errno
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import traceback
+import typing
+
+from . import client, internal, processing
+
+STDIO = 3
+
+
+def run(
+    definition: type,
+    *,
+    args: list | None = None,
+    fast: bool = False,
+    response_files: bool = False,
+    env_prefix: str | None = None,
+    config: os.PathLike[str] | str | None = None,
+) -> typing.Any:
+    """
+    Parse args into definition and call the instance, returning its result.
+
+    The keyword arguments work as they do for dykes.parse_args.
+    """
+    _check_callable(definition)
+    instance = processing.parse_args(
+        definition,
+        args=args,
+        fast=fast,
+        response_files=response_files,
+        env_prefix=env_prefix,
+        config=config,
+    )
+    return instance()
+
+
+def _check_callable(definition: type) -> None:
+    if not any("__call__" in vars(base) for base in definition.__mro__):
+        raise ValueError(f"{definition.__name__} has no __call__ method to run.")
+
+
+def serve(
+    definition: type,
+    path: os.PathLike[str] | str,
+    *,
+    prog: str | None = None,
+    fast: bool = False,
+    response_files: bool = False,
+    env_prefix: str | None = None,
+    config: os.PathLike[str] | str | None = None,
+) -> None:
+    """
+    Answer dykes.client requests on the Unix socket at path, forever.
+
+    The parser is built before the first request. The socket is only
+    accessible to the current user. A stale socket file at path is replaced.
+    """
+    _check_callable(definition)
+    if prog is None:
+        parser = processing.parser_cache.get(definition)
+    else:
+        parser = processing.lower_plan(processing.plan_cache.get(definition), prog=prog)
+    processing.matcher_cache.get(definition)
+    processing.constructor_cache.get(definition)
+
+    settings = internal.ParseSettings(
+        fast=fast, response_files=response_files, env_prefix=env_prefix, config=config
+    )
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self) -> None:
+            _handle(self.request, definition, lambda _: parser, settings)
+
+    path = os.fspath(path)
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise FileExistsError(errno.EEXIST, "Not a socket", path)
+    except FileNotFoundError:
+        pass
+    # Bind and listen under a private name first, so a client never finds a
+    # socket at path that refuses connections.
+    staging = f"{path}.{os.getpid()}"
+    umask = os.umask(0o077)
+    try:
+        server = socketserver.ForkingUnixStreamServer(staging, Handler)
+    finally:
+        os.umask(umask)
+    os.replace(staging, path)
+    with server:
+        server.serve_forever()
+
+
+def _handle(
+    connection: socket.socket,
+    definition: type,
+    parser_for: typing.Callable[[type], argparse.ArgumentParser],
+    settings: internal.ParseSettings,
+) -> None:
+    """
+    Run one request. This is the forked child, so it may take over stdio.
+    """
+    header, fds, _, _ = socket.recv_fds(connection, client.LENGTH.size, STDIO)
+    (length,) = client.LENGTH.unpack(header)
+    request = json.loads(_receive(connection, length))
+
+    for stream in (sys.stdout, sys.stderr):
+        stream.flush()
+    for target, fd in enumerate(fds):
+        if fd != target:
+            os.dup2(fd, target)
+            os.close(fd)
+    os.chdir(request["cwd"])
+    os.environ.clear()
+    os.environ.update(request["env"])
+
+    try:
+        instance = processing.parse(definition, request["args"], parser_for, settings)
+        status = exit_status(instance())
+    except SystemExit as error:
+        status = exit_status(error.code)
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    for stream in (sys.stdout, sys.stderr):
+        stream.flush()
+    connection.sendall(client.LENGTH.pack(status))
+
+
+def exit_status(code: typing.Any) -> int:
+    """
+    The status sys.exit(code) would exit with. Other values are printed.
+    """
+    if code is None:
+        return 0
+    elif isinstance(code, int):
+        return code & 0xFF
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _receive(connection: socket.socket, length: int) -> bytes:
+    chunks = []
+    while length:
+        chunk = connection.recv(min(length, 65536))
+        if not chunk:
+            raise ConnectionError("The request ended early.")
+        chunks.append(chunk)
+        length -= len(chunk)
+    return b"".join(chunks)
@@ -0,0 +1,149 @@
+"""
+Caching of per-definition artifacts.
+
+Definitions are held weakly, so classes created at runtime can still be
+garbage collected once nothing else refers to them.
+
+Caches are safe to share between threads. Each value is built exactly once,
+even when many threads ask for it at the same time: the first thread builds
+it and the others wait for its result. Cached values are shared, so they must
+not be mutated after they are built.
+"""
+
+import threading
+import typing
+import weakref
+
+DEFAULT_MAXSIZE = 128
+
+
+class _Pending[V]:
+    """
+    A value being built by one thread that other threads wait on.
+    """
+
+    def __init__(self) -> None:
+        self.owner = threading.get_ident()
+        self.done = threading.Event()
+        self.value: V | None = None
+        self.error: BaseException | None = None
+
+    def wait(self) -> V:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return typing.cast(V, self.value)
+
+
+class DefinitionCache[V]:
+    """
+    A bounded, least recently used cache keyed weakly on definition classes.
+
+    Values are produced on demand by the builder passed at construction.
+
+        parsers = DefinitionCache(build_parser, maxsize=64)
+        parser = parsers.get(Application)
+        parsers.invalidate(Application)
+    """
+
+    def __init__(
+        self, builder: typing.Callable[[type], V], *, maxsize: int = DEFAULT_MAXSIZE
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.builder = builder
+        self.maxsize = maxsize
+        self._data: weakref.WeakKeyDictionary[type, V] = weakref.WeakKeyDictionary()
+        self._pending: dict[type, _Pending[V]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, definition: type) -> V:
+        with self._lock:
+            try:
+                value = self._data.pop(definition)
+            except KeyError:
+                pass
+            else:
+                self._data[definition] = value
+                return value
+            pending = self._pending.get(definition)
+            if pending is None:
+                pending = self._pending[definition] = _Pending()
+                building = True
+            elif pending.owner == threading.get_ident():
+                raise RecursionError(
+                    f"{definition.__name__} is needed to build itself."
+                )
+            else:
+                building = False
+
+        if not building:
+            return pending.wait()
+
+        try:
+            value = self.builder(definition)
+        except BaseException as error:
+            pending.error = error
+            with self._lock:
+                del self._pending[definition]
+            pending.done.set()
+            raise
+
+        pending.value = value
+        with self._lock:
+            del self._pending[definition]
+            self._data[definition] = value
+            while len(self._data) > self.maxsize:
+                self._data.pop(next(iter(self._data)))
+        pending.done.set()
+        return value
+
+    def invalidate(self, definition: type | None = None) -> None:
+        """
+        Drop the cached value for definition, or every cached value if None.
+        """
+        with self._lock:
+            if definition is None:
+                self._data.clear()
+            else:
+                self._data.pop(definition, None)
+
+    def __contains__(self, definition: type) -> bool:
+        return definition in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class Registry:
+    """
+    A family of DefinitionCaches that are sized and invalidated together.
+
+        registry = Registry()
+        plans = registry.cache(compile_plan)
+        parsers = registry.cache(lambda definition: lower_plan(plans.get(definition)))
+        registry.invalidate(Application)
+    """
+
+    def __init__(self, *, maxsize: int = DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.caches: list[DefinitionCache] = []
+
+    def cache[V](self, builder: typing.Callable[[type], V]) -> DefinitionCache[V]:
+        definition_cache = DefinitionCache(builder, maxsize=self.maxsize)
+        self.caches.append(definition_cache)
+        return definition_cache
+
+    def invalidate(self, definition: type | None = None) -> None:
+        for definition_cache in self.caches:
+            definition_cache.invalidate(definition)
+
+    def resize(self, maxsize: int) -> None:
+        """
+        Change the bound of every cache. Shrinking takes effect on next insert.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        for definition_cache in self.caches:
+            definition_cache.maxsize = maxsize
@@ -0,0 +1,58 @@
+"""
+Forward a command line to a program started with dykes.application.serve.
+
+    python -m dykes.client /run/user/1000/app.sock --verbose input.txt
+
+The arguments, working directory, environment and stdio are handed to the
+server, and the exit status comes back. Only the standard library is
+imported, so the client starts as quickly as Python can.
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+import typing
+
+LENGTH = struct.Struct("!I")
+
+
+def call(
+    path: os.PathLike[str] | str,
+    args: typing.Sequence[str],
+    stdio: tuple[int, int, int] = (0, 1, 2),
+) -> int:
+    """
+    Run args on the server at path with the file descriptors stdio as its
+    stdin, stdout and stderr. Returns the exit status.
+    """
+    request = json.dumps(
+        {"args": list(args), "cwd": os.getcwd(), "env": dict(os.environ)}
+    ).encode()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(os.fspath(path))
+        socket.send_fds(connection, [LENGTH.pack(len(request))], list(stdio))
+        connection.sendall(request)
+        response = b""
+        while len(response) < LENGTH.size:
+            chunk = connection.recv(LENGTH.size - len(response))
+            if not chunk:
+                # The server died without answering.
+                return 1
+            response += chunk
+    (status,) = LENGTH.unpack(response)
+    return status
+
+
+def main() -> typing.NoReturn:
+    if len(sys.argv) < 2:
+        print("usage: python -m dykes.client SOCKET [ARGS ...]", file=sys.stderr)
+        raise SystemExit(2)
+    for stream in (sys.stdout, sys.stderr):
+        stream.flush()
+    raise SystemExit(call(sys.argv[1], sys.argv[2:]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Shell completion from compiled definitions.
+
+completion_script renders a static bash, zsh or fish script from a
+definition's flags, actions, nargs and Path typed fields. The script
+completes without starting Python:
+
+    print(dykes.completion.completion_script(Application, "bash", prog="app"))
+
+For values only the program can know, call handle before any heavy imports.
+When the first argument is __complete it prints the candidates for the last
+word, one per line, and exits without building a parser or an instance. With
+DYKES_SNAPSHOT_DIR set, it does not resolve type hints either:
+
+    dykes.completion.handle(Application)
+    import heavy_things
+"""
+
+import dataclasses
+import functools
+import os
+import pathlib
+import re
+import sys
+import typing
+
+from . import internal, options, processing
+
+COMPLETE_COMMAND = "__complete"
+SHELLS = ("bash", "zsh", "fish")
+NO_VALUE_ACTIONS = (
+    options.Action.STORE_TRUE,
+    options.Action.STORE_FALSE,
+    options.Action.COUNT,
+)
+
+type ValueKind = typing.Literal["none", "file", "choices", "any"]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Completion:
+    """
+    What a shell needs to know about one argument.
+    """
+
+    dest: str
+    flags: tuple[str, ...]
+    help: str
+    value: ValueKind
+    repeatable: bool
+    choices: tuple[str, ...] = ()
+
+
+def completions(plan: internal.ParserPlan) -> tuple[Completion, ...]:
+    """
+    One Completion per argument of plan, plus the built-in help flag.
+    """
+    output = [
+        Completion(
+            "help",
+            processing.HELP_FLAGS,
+            "show this help message and exit",
+            "none",
+            False,
+        )
+    ]
+    for argument in plan.arguments:
+        choices = _choices(argument)
+        output.append(
+            Completion(
+                dest=argument.dest,
+                flags=argument.flags,
+                help=argument.help if isinstance(argument.help, str) else "",
+                value=_value_kind(argument),
+                repeatable=argument.action is options.Action.COUNT
+                or argument.action in internal.ACCUMULATING
+                or argument.nargs in ("+", "*"),
+                choices=tuple(choices.lookup) if choices else (),
+            )
+        )
+    return tuple(output)
+
+
+def _choices(argument: internal.ArgumentSpec) -> internal.Choices | None:
+    convert = argument.type
+    if isinstance(argument.bulk, internal.BulkConversion):
+        convert = argument.bulk.type
+    return convert if isinstance(convert, internal.Choices) else None
+
+
+def _value_kind(argument: internal.ArgumentSpec) -> ValueKind:
+    if argument.action in NO_VALUE_ACTIONS:
+        return "none"
+    if _choices(argument) is not None:
+        return "choices"
+    convert = argument.type
+    if isinstance(convert, internal.StreamSource):
+        return "file"
+    if isinstance(argument.bulk, internal.BulkConversion):
+        convert = argument.bulk.type
+    if isinstance(convert, type) and issubclass(convert, pathlib.PurePath):
+        return "file"
+    return "any"
+
+
+def completion_script(definition: type, shell: str, prog: str | None = None) -> str:
+    """
+    A static completion script for definition. Cached per shell and prog.
+    """
+    if shell not in SHELLS:
+        raise ValueError(
+            f"Unsupported shell {shell!r}. Use one of {', '.join(SHELLS)}."
+        )
+    prog = prog or os.path.basename(sys.argv[0])
+    return _render(completion_cache.get(definition), shell, prog)
+
+
+completion_cache = processing.registry.cache(
+    lambda definition: completions(processing.plan_cache.get(definition))
+)
+
+
+# A script depends only on the completions, shell and prog, so scripts are
+# cached on those rather than stored in a per-definition cache entry.
+@functools.lru_cache(maxsize=processing.registry.maxsize)
+def _render(items: tuple[Completion, ...], shell: str, prog: str) -> str:
+    return RENDERERS[shell](items, prog)
+
+
+def _bash(items: tuple[Completion, ...], prog: str) -> str:
+    flags = [flag for item in items for flag in item.flags]
+    file_flags = [flag for item in items if item.value == "file" for flag in item.flags]
+    value_flags = [flag for item in items if item.value == "any" for flag in item.flags]
+    positional_files = any(not item.flags and item.value == "file" for item in items)
+    lines = [
+        f"_{_identifier(prog)}_complete() {{",
+        '    local cur="${COMP_WORDS[COMP_CWORD]}"',
+        '    local prev="${COMP_WORDS[COMP_CWORD-1]}"',
+        "    COMPREPLY=()",
+        '    case "$prev" in',
+    ]
+    if file_flags:
+        lines += [
+            f"        {'|'.join(file_flags)})",
+            "            compopt -o filenames",
+            '            COMPREPLY=($(compgen -f -- "$cur"))',
+            "            return;;",
+        ]
+    for item in items:
+        if item.flags and item.value == "choices":
+            lines += [
+                f"        {'|'.join(item.flags)})",
+                f'            COMPREPLY=($(compgen -W "{" ".join(item.choices)}" -- "$cur"))',
+                "            return;;",
+            ]
+    if value_flags:
+        lines += [f"        {'|'.join(value_flags)})", "            return;;"]
+    lines += [
+        "    esac",
+        '    if [[ "$cur" == -* ]]; then',
+        f'        COMPREPLY=($(compgen -W "{" ".join(flags)}" -- "$cur"))',
+        "        return",
+        "    fi",
+    ]
+    positional_choices = [
+        choice
+        for item in items
+        if not item.flags and item.value == "choices"
+        for choice in item.choices
+    ]
+    if positional_choices:
+        lines.append(
+            f'    COMPREPLY=($(compgen -W "{" ".join(positional_choices)}" -- "$cur"))'
+        )
+    if positional_files:
+        lines += [
+            "    compopt -o filenames",
+            '    COMPREPLY+=($(compgen -f -- "$cur"))',
+        ]
+    lines += ["}", f"complete -F _{_identifier(prog)}_complete {prog}", ""]
+    return "\n".join(lines)
+
+
+def _zsh(items: tuple[Completion, ...], prog: str) -> str:
+    lines = [f"#compdef {prog}", "", "_arguments -s \\"]
+    position = 1
+    for item in items:
+        words = " ".join(_zsh_escape(choice) for choice in item.choices)
+        action = {
+            "none": "",
+            "file": f":{item.dest}:_files",
+            "choices": f":{item.dest}:({words})",
+            "any": f":{item.dest}: ",
+        }
+        if item.flags:
+            exclusive = f"({' '.join(item.flags)})" if not item.repeatable else "*"
+            names = (
+                f"{{{','.join(item.flags)}}}" if len(item.flags) > 1 else item.flags[0]
+            )
+            help_text = _zsh_escape(item.help)
+            lines.append(
+                f"  '{exclusive}'{names}'[{help_text}]{action[item.value]}' \\"
+            )
+        else:
+            completer = {"file": "_files", "choices": f"({words})"}.get(item.value, " ")
+            spec = "*" if item.repeatable else str(position)
+            lines.append(f"  '{spec}:{_zsh_escape(item.dest)}:{completer}' \\")
+            position += 1
+    lines[-1] = lines[-1].removesuffix(" \\")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _fish(items: tuple[Completion, ...], prog: str) -> str:
+    lines = []
+    if not any(not item.flags and item.value == "file" for item in items):
+        lines.append(f"complete -c {prog} -f")
+    for item in items:
+        if not item.flags:
+            if item.value == "choices":
+                words = _single_quote(" ".join(item.choices))
+                lines.append(f"complete -c {prog} -a {words}")
+            continue
+        parts = [f"complete -c {prog}"]
+        for flag in item.flags:
+            if flag.startswith("--"):
+                parts.append(f"-l {flag[2:]}")
+            elif len(flag) == 2:
+                parts.append(f"-s {flag[1]}")
+            else:
+                parts.append(f"-o {flag[1:]}")
+        if item.value == "file":
+            parts.append("-r -F")
+        elif item.value == "choices":
+            parts.append(f"-x -a {_single_quote(' '.join(item.choices))}")
+        elif item.value == "any":
+            parts.append("-x")
+        if item.help:
+            parts.append(f"-d {_single_quote(item.help)}")
+        lines.append(" ".join(parts))
+    lines.append("")
+    return "\n".join(lines)
+
+
+RENDERERS: dict[str, typing.Callable[[tuple[Completion, ...], str], str]] = {
+    "bash": _bash,
+    "zsh": _zsh,
+    "fish": _fish,
+}
+
+
+def _identifier(prog: str) -> str:
+    return re.sub(r"\W", "_", prog)
+
+
+def _zsh_escape(text: str) -> str:
+    text = text.replace("\\", "\\\\").replace("[", "\\[").replace("]", "\\]")
+    return text.replace(":", "\\:").replace("'", "'\\''")
+
+
+def _single_quote(text: str) -> str:
+    return "'" + text.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def complete(definition: type, words: typing.Sequence[str]) -> list[str]:
+    """
+    Candidates for the last of words, the arguments typed so far.
+    """
+    items = completions(processing.plan_cache.get(definition))
+    current = words[-1] if words else ""
+    previous = words[-2] if len(words) > 1 else None
+    by_flag = {flag: item for item in items for flag in item.flags}
+
+    taking = by_flag.get(previous) if previous is not None else None
+    if taking is not None and taking.value != "none":
+        return _values(taking, current)
+    if current.startswith("-"):
+        return [flag for flag in by_flag if flag.startswith(current)]
+    candidates = []
+    for item in items:
+        if not item.flags and item.value in ("file", "choices"):
+            candidates += _values(item, current)
+    return sorted(set(candidates))
+
+
+def _values(item: Completion, current: str) -> list[str]:
+    if item.value == "file":
+        return _files(current)
+    return [choice for choice in item.choices if choice.startswith(current)]
+
+
+def _files(prefix: str) -> list[str]:
+    directory, _, start = prefix.rpartition("/")
+    try:
+        entries = os.scandir(directory or ".")
+    except OSError:
+        return []
+    candidates = []
+    with entries:
+        for entry in entries:
+            if entry.name.startswith(start) and (
+                start.startswith(".") or not entry.name.startswith(".")
+            ):
+                name = f"{directory}/{entry.name}" if directory else entry.name
+                candidates.append(name + "/" if entry.is_dir() else name)
+    return sorted(candidates)
+
+
+def handle(definition: type, args: typing.Sequence[str] | None = None) -> None:
+    """
+    Answer a __complete request and exit, or return if this isn't one.
+    """
+    if args is None:
+        args = sys.argv[1:]
+    if not args or args[0] != COMPLETE_COMMAND:
+        return
+    for candidate in complete(definition, args[1:]):
+        print(candidate)
+    raise SystemExit(0)
@@ -0,0 +1,83 @@
+"""
+Per-definition constructors.
+
+A constructor turns parsed values, keyed by dest, into an instance of the
+definition. It pulls the values out in field order with one itemgetter and
+passes them positionally, through _make for NamedTuples, so no keyword dict is
+built. __init__ still runs, so __post_init__, frozen and __slots__ dataclasses
+behave as usual.
+
+Only dataclass __init__ methods that take exactly the fields, in plan order,
+and NamedTuples that keep their own __new__ are called positionally. Others,
+such as dataclasses with keyword-only fields or a hand-written __init__, fall
+back to keyword arguments.
+
+Constructors are cached against their definition, which the cache holds
+weakly, so they take the definition as an argument instead of keeping it.
+"""
+
+import dataclasses
+import inspect
+import operator
+import typing
+
+from . import internal
+
+POSITIONAL = inspect.Parameter.POSITIONAL_OR_KEYWORD
+
+type Constructor[T] = typing.Callable[[type[T], dict[str, typing.Any]], T]
+
+
+def build_constructor[T](
+    definition: type[T], plan: internal.ParserPlan
+) -> Constructor[T]:
+    dests = plan.fields
+    if not dests:
+        return lambda definition, values: definition()
+
+    if isinstance(definition, internal.NamedTupleProtocol):
+        positional = definition._fields == dests and not _overrides_new(definition)
+        named_tuple = True
+    else:
+        positional = _positional_fields(definition) == dests
+        named_tuple = False
+
+    if not positional:
+        return lambda definition, values: definition(**values)
+
+    if len(dests) == 1:
+        (dest,) = dests
+        if named_tuple:
+            return lambda definition, values: definition._make((values[dest],))
+        return lambda definition, values: definition(values[dest])
+
+    getter = operator.itemgetter(*dests)
+    if named_tuple:
+        return lambda definition, values: definition._make(getter(values))
+    return lambda definition, values: definition(*getter(values))
+
+
+def _positional_fields(definition: type) -> tuple[str, ...] | None:
+    """
+    The parameters of a dataclass __init__ that takes every one positionally.
+    """
+    if not dataclasses.is_dataclass(definition):
+        return None
+    if not getattr(definition, "__dataclass_params__").init:
+        return None
+    parameters = tuple(inspect.signature(definition.__init__).parameters.values())
+    if any(parameter.kind is not POSITIONAL for parameter in parameters[1:]):
+        return None
+    return tuple(parameter.name for parameter in parameters[1:])
+
+
+def _overrides_new(definition: type) -> bool:
+    """
+    Whether a subclass of a NamedTuple replaced the __new__ that _make skips.
+    """
+    for cls in definition.__mro__:
+        if "_make" in vars(cls):
+            return False
+        if "__new__" in vars(cls):
+            return True
+    return False
@@ -0,0 +1,300 @@
+"""
+A dykes-native argv matcher for simple definitions.
+
+It understands the subset of argparse behavior that compile_plan produces and
+goes straight from argv to a dict of values. Anything it is not certain about,
+including every error and help request, raises Fallback so argparse can handle
+it. That keeps messages and help output identical to the argparse path.
+"""
+
+import bisect
+import dataclasses
+import typing
+
+from . import internal, options, processing
+
+STORES_VALUE = (internal.UNSET, options.Action.STORE)
+TAKES_NO_VALUE = (
+    options.Action.STORE_TRUE,
+    options.Action.STORE_FALSE,
+    options.Action.COUNT,
+)
+SUPPORTED_ACTIONS = STORES_VALUE + TAKES_NO_VALUE + internal.ACCUMULATING
+RESERVED_FLAGS = processing.HELP_FLAGS
+
+
+class Fallback(Exception):
+    """
+    The fast path cannot decide this argv. Let argparse parse it.
+    """
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Matcher:
+    """
+    Option lookup for one plan.
+
+    options maps every flag to its argument. long_flags holds the -- flags in
+    sorted order, --help included, so the flags an abbreviation could stand
+    for are one bisect away instead of a scan over every option.
+    """
+
+    arguments: tuple[internal.ArgumentSpec, ...]
+    options: dict[str, internal.ArgumentSpec]
+    positionals: tuple[internal.ArgumentSpec, ...]
+    long_flags: tuple[str, ...] = ()
+
+
+def build_matcher(plan: internal.ParserPlan) -> Matcher | None:
+    """
+    Build a Matcher for a plan, or None if the plan needs argparse.
+    """
+    flags: dict[str, internal.ArgumentSpec] = {}
+    positionals = []
+    for argument in plan.arguments:
+        if argument.action not in SUPPORTED_ACTIONS:
+            return None
+        if argument.is_positional:
+            positionals.append(argument)
+            continue
+        for flag in argument.flags:
+            unusual = not flag.startswith("--") and (
+                len(flag) != 2 or not flag.startswith("-")
+            )
+            if flag in flags or flag in RESERVED_FLAGS or unusual:
+                return None
+            flags[flag] = argument
+    long_flags = tuple(
+        sorted(flag for flag in (*flags, *RESERVED_FLAGS) if flag.startswith("--"))
+    )
+    return Matcher(plan.arguments, flags, tuple(positionals), long_flags)
+
+
+def lookup_long(matcher: Matcher, flag: str) -> internal.ArgumentSpec | None:
+    """
+    The argument for a -- flag or an unambiguous abbreviation of one.
+
+    Like argparse, an abbreviation matching more than one flag is ambiguous,
+    even when the flags belong to the same argument. Raises Fallback for
+    --help and its abbreviations.
+    """
+    argument = matcher.options.get(flag)
+    if argument is not None or len(flag) < 3:
+        return argument
+    long_flags = matcher.long_flags
+    start = bisect.bisect_left(long_flags, flag)
+    if start == len(long_flags) or not long_flags[start].startswith(flag):
+        return None
+    if start + 1 < len(long_flags) and long_flags[start + 1].startswith(flag):
+        return None
+    if long_flags[start] in RESERVED_FLAGS:
+        raise Fallback
+    return matcher.options[long_flags[start]]
+
+
+def parse(
+    matcher: Matcher,
+    args: typing.Sequence[str],
+    initial: dict[str, typing.Any] | None = None,
+) -> dict[str, typing.Any]:
+    """
+    Match args against a Matcher, returning values keyed by dest.
+
+    initial values stand in for defaults, as a pre-filled argparse namespace.
+    Raises Fallback whenever argparse must take over.
+    """
+    values: dict[str, typing.Any] = dict(initial) if initial else {}
+    positional_tokens: list[str] = []
+    option_seen = False
+    positionals_closed = False
+    index = 0
+    count = len(args)
+
+    while index < count:
+        token = args[index]
+        index += 1
+        if not token.startswith("-") or token == "-":
+            if positionals_closed or token == "-":
+                raise Fallback
+            if option_seen and not positional_tokens:
+                _check_leading_optional_positional(matcher)
+            positional_tokens.append(token)
+            continue
+
+        option_seen = True
+        if positional_tokens:
+            positionals_closed = True
+
+        explicit = None
+        argument = matcher.options.get(token)
+        if argument is None:
+            if token.startswith("--"):
+                token, equals, explicit = token.partition("=")
+                argument = lookup_long(matcher, token)
+                if argument is None or (equals and not explicit):
+                    raise Fallback
+                if not equals:
+                    explicit = None
+            else:
+                _apply_short_cluster(matcher, token, values)
+                continue
+
+        if argument.action in TAKES_NO_VALUE:
+            if explicit is not None:
+                raise Fallback
+            _apply_flag(argument, values)
+            continue
+
+        if explicit is not None:
+            if argument.nargs is not internal.UNSET:
+                raise Fallback
+            _store(argument, values, _convert(argument, explicit))
+            continue
+
+        end = index
+        while end < count and not args[end].startswith("-"):
+            end += 1
+        if end < count and args[end] == "-":
+            raise Fallback
+        taken = _option_arity(argument, end - index)
+        tokens = args[index : index + taken]
+        index += taken
+        _store(argument, values, _collect(argument, tokens))
+
+    _assign_positionals(matcher, positional_tokens, values)
+    output = {}
+    for argument in matcher.arguments:
+        value = values[argument.dest] if argument.dest in values else _default(argument)
+        # Absent arguments with a default_factory are left out, as by argparse.
+        if type(value) is not internal.DefaultFactory:
+            output[argument.dest] = value
+    return output
+
+
+def _check_leading_optional_positional(matcher: Matcher) -> None:
+    # argparse consumes a leading "?" or "*" positional as empty when argv
+    # starts with an option, so later tokens become unrecognized arguments.
+    if matcher.positionals and matcher.positionals[0].nargs in ("?", "*"):
+        raise Fallback
+
+
+def _apply_short_cluster(
+    matcher: Matcher, token: str, values: dict[str, typing.Any]
+) -> None:
+    cluster = []
+    for char in token[1:]:
+        argument = matcher.options.get(f"-{char}")
+        if argument is None or argument.action not in TAKES_NO_VALUE:
+            raise Fallback
+        cluster.append(argument)
+    for argument in cluster:
+        _apply_flag(argument, values)
+
+
+def _apply_flag(argument: internal.ArgumentSpec, values: dict[str, typing.Any]):
+    if argument.action is options.Action.COUNT:
+        current = values.get(argument.dest, argument.default)
+        if current is None or type(current) is internal.DefaultFactory:
+            current = 0
+        values[argument.dest] = current + 1
+    else:
+        values[argument.dest] = argument.action is options.Action.STORE_TRUE
+
+
+def _store(
+    argument: internal.ArgumentSpec, values: dict[str, typing.Any], value: typing.Any
+) -> None:
+    if argument.action in internal.ACCUMULATING:
+        items = internal.accumulator(values.get(argument.dest), argument.default)
+        if argument.action is options.Action.APPEND:
+            items.append(value)
+        else:
+            items.extend(value)
+        value = items
+    values[argument.dest] = value
+
+
+def _option_arity(argument: internal.ArgumentSpec, available: int) -> int:
+    nargs = argument.nargs
+    if nargs is internal.UNSET:
+        minimum, maximum = 1, 1
+    elif nargs == "?":
+        minimum, maximum = 0, 1
+    elif nargs == "*":
+        minimum, maximum = 0, available
+    elif nargs == "+":
+        minimum, maximum = 1, available
+    else:
+        minimum = maximum = typing.cast(int, nargs)
+    if available < minimum:
+        raise Fallback
+    return min(maximum, available)
+
+
+def _assign_positionals(
+    matcher: Matcher, tokens: list[str], values: dict[str, typing.Any]
+) -> None:
+    minimums = [_minimum(argument.nargs) for argument in matcher.positionals]
+    start = 0
+    for position, argument in enumerate(matcher.positionals):
+        available = len(tokens) - start - sum(minimums[position + 1 :])
+        if available < minimums[position]:
+            raise Fallback
+        if argument.nargs in ("*", "+"):
+            taken = available
+        elif argument.nargs == "?":
+            taken = min(1, available)
+        else:
+            taken = minimums[position]
+        if taken or argument.dest not in values:
+            # A positional that matched nothing keeps a pre-filled value.
+            values[argument.dest] = _collect(argument, tokens[start : start + taken])
+        start += taken
+    if start != len(tokens):
+        raise Fallback
+
+
+def _minimum(nargs: int | str | internal._Unset) -> int:
+    if nargs is internal.UNSET or nargs == "+":
+        return 1
+    elif nargs in ("?", "*"):
+        return 0
+    return typing.cast(int, nargs)
+
+
+def _collect(argument: internal.ArgumentSpec, tokens: typing.Sequence[str]):
+    nargs = argument.nargs
+    if nargs is internal.UNSET:
+        return _convert(argument, tokens[0])
+    elif nargs == "?":
+        if tokens:
+            return _convert(argument, tokens[0])
+        if argument.flags or type(argument.default) is internal.DefaultFactory:
+            return None
+        return _default(argument)
+    elif nargs == "*" and not tokens and not argument.flags:
+        default = argument.default
+        return default if default is not internal.UNSET else []
+    return [_convert(argument, token) for token in tokens]
+
+
+def _convert(argument: internal.ArgumentSpec, token: str) -> typing.Any:
+    if argument.type is internal.UNSET:
+        return token
+    try:
+        return argument.type(token)
+    except Exception:
+        raise Fallback
+
+
+def _default(argument: internal.ArgumentSpec) -> typing.Any:
+    default = argument.default
+    if default is internal.UNSET:
+        if argument.action is options.Action.STORE_TRUE:
+            return False
+        elif argument.action is options.Action.STORE_FALSE:
+            return True
+        return None
+    if isinstance(default, str) and argument.action in STORES_VALUE:
+        return _convert(argument, default)
+    return default
@@ -0,0 +1,313 @@
+"""
+Help rendering from compiled plans, cached per terminal width.
+
+argparse rebuilds and rewraps the whole help text on every --help. Parsers
+from lower_plan instead render it straight from the plan, following
+the running interpreter's HelpFormatter layout, and keep the text for each
+terminal width.
+With DYKES_SNAPSHOT_DIR set, rendered help is also kept on disk, so later
+processes skip the wrapping entirely.
+
+Set DYKES_HELP_STYLE=argparse to have argparse itself format help, byte for
+byte as it would without dykes. Plans the renderer does not understand,
+such as help strings with % format specifiers, and Python versions whose
+layout the renderer does not know, always use argparse.
+"""
+
+import os
+import re
+import sys
+import typing
+
+from . import internal, options, processing, snapshot
+
+# As in argparse, the modules only --help needs are imported when it runs.
+if typing.TYPE_CHECKING:
+    import pathlib
+
+STYLE_ENVIRONMENT_VARIABLE = "DYKES_HELP_STYLE"
+FORMAT_VERSION = 2
+HELP_TEXT = "show this help message and exit"
+TAKES_NO_VALUE = (
+    options.Action.STORE_TRUE,
+    options.Action.STORE_FALSE,
+    options.Action.STORE_CONST,
+    options.Action.APPEND_CONST,
+    options.Action.COUNT,
+)
+RENDERABLE = (
+    internal.UNSET,
+    options.Action.STORE,
+    options.Action.APPEND,
+    options.Action.EXTEND,
+    *TAKES_NO_VALUE,
+)
+USAGE_PART = re.compile(r"\(.*?\)+(?=\s|$)|\[.*?\]+(?=\s|$)|\S+")
+WHITESPACE = re.compile(r"\s+", re.ASCII)
+LONG_BREAK = re.compile(r"\n\n\n+")
+# The HelpFormatter layouts render reproduces. From 3.13, an option with
+# several flags shows its metavar once, and usage wraps whole arguments.
+KNOWN_LAYOUTS = ((3, 12), (3, 13))
+COMPACT_LAYOUT = sys.version_info >= (3, 13)
+
+
+CachedHelpParser = internal.CachedHelpParser
+
+
+def format_help(parser: CachedHelpParser) -> str:
+    """
+    Help for a parser from lower_plan, rendered from its plan and kept per
+    style and terminal width.
+    """
+    import shutil
+
+    style = os.environ.get(STYLE_ENVIRONMENT_VARIABLE) or "dykes"
+    width = shutil.get_terminal_size().columns - 2
+    texts = parser.__dict__.setdefault("_help_texts", {})
+    text = texts.get((style, width))
+    if text is None:
+        text = texts[(style, width)] = _render(parser, style, width)
+    return text
+
+
+def _render(parser: CachedHelpParser, style: str, width: int) -> str:
+    if style != "dykes" or parser.plan is None:
+        return super(CachedHelpParser, parser).format_help()
+    directory = snapshot.directory_from_environment()
+    key = _cache_key(parser.plan, parser.prog, width) if directory else ""
+    if directory is not None and (text := _load(directory, key)) is not None:
+        return text
+    text = render(parser.plan, parser.prog, width)
+    if text is None:
+        return super(CachedHelpParser, parser).format_help()
+    if directory is not None:
+        _store(directory, key, text)
+    return text
+
+
+class _Item(typing.NamedTuple):
+    invocation: str
+    usage: str
+    help: str | None
+    positional: bool
+
+
+def render(plan: internal.ParserPlan, prog: str, width: int) -> str | None:
+    """
+    The help argparse would print for plan at width, or None if the plan
+    uses something only argparse can format.
+    """
+    if sys.version_info[:2] not in KNOWN_LAYOUTS:
+        return None
+    items = [_Item(", ".join(processing.HELP_FLAGS), "[-h]", HELP_TEXT, False)]
+    for argument in plan.arguments:
+        item = _item(argument)
+        if item is None:
+            return None
+        items.append(item)
+
+    optionals = [item for item in items if not item.positional]
+    positionals = [item for item in items if item.positional]
+    parts = [f"usage: {_usage(prog, optionals, positionals, width)}\n\n"]
+    if plan.description is not None:
+        description = plan.description
+        if "%(prog)" in description:
+            description = description % {"prog": prog}
+        parts.append(_fill(description, max(width, 11)) + "\n\n")
+
+    max_length = max(len(item.invocation) + 2 for item in items)
+    help_position = min(max_length + 2, min(24, max(width - 20, 4)))
+    for heading, section in (
+        ("positional arguments", positionals),
+        ("options", optionals),
+    ):
+        if section:
+            formatted = "".join(_action(item, help_position, width) for item in section)
+            parts.append(f"\n{heading}:\n{formatted}\n")
+    return LONG_BREAK.sub("\n\n", "".join(parts)).strip("\n") + "\n"
+
+
+def _item(argument: internal.ArgumentSpec) -> _Item | None:
+    if argument.action not in RENDERABLE:
+        return None
+    help_text = argument.help if isinstance(argument.help, str) else None
+    if help_text is not None and "%" in help_text:
+        return None
+    if argument.is_positional:
+        metavar = argument.metavar or argument.dest
+        arguments = _format_args(argument.nargs, typing.cast(str, metavar))
+        return _Item(metavar, arguments, help_text, True)
+    elif argument.action in TAKES_NO_VALUE:
+        return _Item(
+            ", ".join(argument.flags), f"[{argument.flags[0]}]", help_text, False
+        )
+    metavar = argument.metavar or argument.dest.upper()
+    arguments = _format_args(argument.nargs, typing.cast(str, metavar))
+    if COMPACT_LAYOUT:
+        invocation = f"{', '.join(argument.flags)} {arguments}"
+    else:
+        invocation = ", ".join(f"{flag} {arguments}" for flag in argument.flags)
+    usage = f"{argument.flags[0]} {arguments}"
+    if not argument.required:
+        usage = f"[{usage}]"
+    return _Item(invocation, usage, help_text, False)
+
+
+def _format_args(nargs: typing.Any, metavar: str) -> str:
+    if nargs is internal.UNSET:
+        return metavar
+    elif nargs == "?":
+        return f"[{metavar}]"
+    elif nargs == "*":
+        return f"[{metavar} ...]"
+    elif nargs == "+":
+        return f"{metavar} [{metavar} ...]"
+    return " ".join([metavar] * nargs)
+
+
+def _actions_usage(items: list[_Item]) -> str:
+    text = " ".join(item.usage for item in items)
+    if COMPACT_LAYOUT:
+        return text
+    text = re.sub(r"([\[(]) ", r"\1", text)
+    text = re.sub(r" ([\])])", r"\1", text)
+    text = re.sub(r"[\[(] *[\])]", r"", text)
+    return text.strip()
+
+
+def _usage(
+    prog: str, optionals: list[_Item], positionals: list[_Item], width: int
+) -> str:
+    prefix = "usage: "
+    usage = " ".join(
+        part for part in (prog, _actions_usage(optionals + positionals)) if part
+    )
+    if len(prefix) + len(usage) <= width:
+        return usage
+
+    if COMPACT_LAYOUT:
+        opt_parts = [item.usage for item in optionals]
+        pos_parts = [item.usage for item in positionals]
+    else:
+        opt_parts = USAGE_PART.findall(_actions_usage(optionals))
+        pos_parts = USAGE_PART.findall(_actions_usage(positionals))
+
+    def get_lines(
+        parts: list[str], indent: str, prefix: str | None = None
+    ) -> list[str]:
+        lines = []
+        line: list[str] = []
+        line_length = len(prefix) - 1 if prefix is not None else len(indent) - 1
+        for part in parts:
+            if line_length + 1 + len(part) > width and line:
+                lines.append(indent + " ".join(line))
+                line = []
+                line_length = len(indent) - 1
+            line.append(part)
+            line_length += len(part) + 1
+        if line:
+            lines.append(indent + " ".join(line))
+        if prefix is not None:
+            lines[0] = lines[0][len(indent) :]
+        return lines
+
+    if len(prefix) + len(prog) <= 0.75 * width:
+        indent = " " * (len(prefix) + len(prog) + 1)
+        if opt_parts:
+            lines = get_lines([prog] + opt_parts, indent, prefix)
+            lines.extend(get_lines(pos_parts, indent))
+        elif pos_parts:
+            lines = get_lines([prog] + pos_parts, indent, prefix)
+        else:
+            lines = [prog]
+    else:
+        indent = " " * len(prefix)
+        lines = get_lines(opt_parts + pos_parts, indent)
+        if len(lines) > 1:
+            lines = get_lines(opt_parts, indent) + get_lines(pos_parts, indent)
+        lines = [prog] + lines
+    return "\n".join(lines)
+
+
+def _action(item: _Item, help_position: int, width: int) -> str:
+    help_width = max(width - help_position, 11)
+    action_width = help_position - 4
+    if not item.help:
+        return f"  {item.invocation}\n"
+    if len(item.invocation) <= action_width:
+        parts = [f"  {item.invocation:<{action_width}}  "]
+        indent_first = 0
+    else:
+        parts = [f"  {item.invocation}\n"]
+        indent_first = help_position
+    if item.help.strip():
+        lines = _wrap(item.help, help_width)
+        parts.append(" " * indent_first + lines[0] + "\n")
+        parts.extend(" " * help_position + line + "\n" for line in lines[1:])
+    elif not parts[0].endswith("\n"):
+        parts.append("\n")
+    return "".join(parts)
+
+
+def _wrap(text: str, width: int) -> list[str]:
+    text = WHITESPACE.sub(" ", text).strip()
+    # Most help fits on one line, where textwrap would return it unchanged.
+    if len(text) <= width:
+        return [text]
+    import textwrap
+
+    return textwrap.wrap(text, width)
+
+
+def _fill(text: str, width: int) -> str:
+    return "\n".join(_wrap(text, width))
+
+
+def _cache_key(plan: internal.ParserPlan, prog: str, width: int) -> str:
+    """
+    A digest of everything that shapes the help text.
+    """
+    import hashlib
+    import json
+
+    fingerprint = [
+        FORMAT_VERSION,
+        sys.version_info[:2],
+        prog,
+        width,
+        plan.description,
+        [
+            [
+                argument.dest,
+                argument.flags,
+                str(argument.action),
+                argument.help if isinstance(argument.help, str) else None,
+                str(argument.nargs),
+                argument.metavar if isinstance(argument.metavar, str) else None,
+                argument.required,
+            ]
+            for argument in plan.arguments
+        ],
+    ]
+    return hashlib.sha256(json.dumps(fingerprint).encode()).hexdigest()
+
+
+def _load(directory: "pathlib.Path", key: str) -> str | None:
+    try:
+        return snapshot.read_private(directory / f"help-{key}.txt")
+    except (OSError, ValueError):
+        return None
+
+
+def _store(directory: "pathlib.Path", key: str, text: str) -> None:
+    import tempfile
+
+    try:
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, suffix=".tmp", delete=False
+        ) as temporary:
+            temporary.write(text)
+        os.replace(temporary.name, directory / f"help-{key}.txt")
+    except OSError:
+        pass
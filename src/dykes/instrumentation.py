@@ -0,0 +1,176 @@
+"""
+Opt-in timing of the phases of building parsers and parsing arguments.
+
+Record a block of code:
+
+    with dykes.instrumentation.record() as recorder:
+        dykes.parse_args(Application)
+    print(recorder.to_json())
+
+A record() block only sees the phases run in its own thread or asyncio
+task, so concurrent recorders keep separate totals.
+
+Or set DYKES_PROFILE=1 to record for the whole process, every thread
+included, and read the totals with dykes.stats(). When nothing is
+recording, each phase costs a context variable lookup.
+
+Phases are "hints", "fields", "docstring", "meta_args", "add_argument",
+"fastpath", "argparse", "convert" and "construct". Per-field costs cover
+meta_args and add_argument and are keyed "Definition.field".
+"""
+
+import contextvars
+import dataclasses
+import os
+import time
+import typing
+
+ENVIRONMENT_VARIABLE = "DYKES_PROFILE"
+
+
+@dataclasses.dataclass(slots=True)
+class PhaseTotal:
+    count: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+
+    def add(self, duration: int) -> None:
+        self.count += 1
+        self.total_ns += duration
+        if duration > self.max_ns:
+            self.max_ns = duration
+
+
+@dataclasses.dataclass(eq=False)
+class Recorder:
+    """
+    Accumulated durations, in nanoseconds, per phase and per field.
+    """
+
+    phases: dict[str, PhaseTotal] = dataclasses.field(default_factory=dict)
+    fields: dict[str, PhaseTotal] = dataclasses.field(default_factory=dict)
+
+    def add(self, phase: str, field: str | None, duration: int) -> None:
+        totals = self.phases.get(phase)
+        if totals is None:
+            totals = self.phases[phase] = PhaseTotal()
+        totals.add(duration)
+        if field is not None:
+            totals = self.fields.get(field)
+            if totals is None:
+                totals = self.fields[field] = PhaseTotal()
+            totals.add(duration)
+
+    def as_dict(self) -> dict[str, dict[str, dict[str, int]]]:
+        return {
+            "phases": {
+                name: dataclasses.asdict(total) for name, total in self.phases.items()
+            },
+            "fields": {
+                name: dataclasses.asdict(total) for name, total in self.fields.items()
+            },
+        }
+
+    def to_json(self, **kwargs: typing.Any) -> str:
+        import json
+
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def clear(self) -> None:
+        self.phases.clear()
+        self.fields.clear()
+
+
+# The recorders of the running thread or task, innermost last.
+_active: contextvars.ContextVar[tuple[Recorder, ...]] = contextvars.ContextVar(
+    "dykes_recorders", default=()
+)
+_process_recorder = Recorder()
+_process_enabled = False
+
+
+class _Span:
+    __slots__ = ("phase", "field", "recorders", "start")
+
+    def __init__(self, phase: str, field: str | None, recorders: tuple[Recorder, ...]):
+        self.phase = phase
+        self.field = field
+        self.recorders = recorders
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info: object) -> None:
+        duration = time.perf_counter_ns() - self.start
+        for recorder in self.recorders:
+            recorder.add(self.phase, self.field, duration)
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(
+    phase: str, definition: str | None = None, field: str | None = None
+) -> typing.ContextManager[None]:
+    """
+    Time a phase, optionally charging it to one field of a named definition.
+    """
+    recorders = _active.get()
+    if _process_enabled:
+        recorders += (_process_recorder,)
+    if not recorders:
+        return _NO_SPAN
+    key = f"{definition}.{field}" if definition and field else None
+    return _Span(phase, key, recorders)
+
+
+class record:
+    """
+    Record phase timings for the duration of a with block, in the current
+    thread or asyncio task.
+    """
+
+    def __init__(self) -> None:
+        self.recorder = Recorder()
+        self._tokens: list[contextvars.Token] = []
+
+    def __enter__(self) -> Recorder:
+        self._tokens.append(_active.set((*_active.get(), self.recorder)))
+        return self.recorder
+
+    def __exit__(self, *exc_info: object) -> None:
+        _active.reset(self._tokens.pop())
+
+
+def enable() -> None:
+    """
+    Record for the rest of the process, as DYKES_PROFILE=1 does.
+    """
+    global _process_enabled
+    _process_enabled = True
+
+
+def disable() -> None:
+    global _process_enabled
+    _process_enabled = False
+
+
+def stats() -> dict[str, dict[str, dict[str, int]]]:
+    """
+    Totals recorded for the process since enable() or DYKES_PROFILE=1.
+    """
+    return _process_recorder.as_dict()
+
+
+if os.environ.get(ENVIRONMENT_VARIABLE, "") not in ("", "0"):
+    enable()
@@ -1,4 +1,11 @@
+import argparse
+import array
+import contextlib
 import dataclasses
+import enum
+import itertools
+import os
+import sys
 import typing
 
 from . import options
@@ -19,39 +26,450 @@ class _Unset:
 UNSET = _Unset()
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True, slots=True)
 class Field:
     name: str
     value: typing.Any
 
 
+@dataclasses.dataclass(frozen=True, slots=True)
+class DefaultFactory:
+    """
+    A field's default_factory, standing in as the default of an argument.
+
+    argparse never sees it: the argument is left out of the namespace when it
+    is absent, and only then is the factory called.
+    """
+
+    factory: typing.Callable[[], typing.Any]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class NestedAttribute:
+    """
+    The factory for one field of a nested definition whose own field has a
+    default_factory: it builds that default and reads the field from it.
+
+    A parse builds the default once and reads every absent field from it.
+    """
+
+    factory: typing.Callable[[], typing.Any]
+    path: tuple[str, ...]
+
+    def __call__(self) -> typing.Any:
+        return self.read(self.factory())
+
+    def read(self, value: typing.Any) -> typing.Any:
+        for name in self.path:
+            value = getattr(value, name)
+        return value
+
+
 @typing.runtime_checkable
 class NamedTupleProtocol(typing.Protocol):
     _fields: tuple[str]
     _field_defaults: dict[str, typing.Any]
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class ParameterOptions[T]:
+    """
+    An argument's options while it is being compiled. freeze() turns it into
+    the immutable ArgumentSpec stored in plans.
+    """
+
     dest: str | _Unset
     type: typing.Type[T] | typing.Callable[[], T] | _Unset
-    flags: list[str] | _Unset = UNSET
+    flags: tuple[str, ...] | _Unset = UNSET
     help: str | _Unset = UNSET
     action: options.Action | _Unset = UNSET
     default: T | _Unset = UNSET
     nargs: int | typing.Literal["?", "+", "*"] | _Unset = UNSET
+    bulk: options.Bulk | _Unset = UNSET
+    metavar: str | _Unset = UNSET
+    container: typing.Type[typing.Any] | _Unset = UNSET
 
-    def as_dict(self) -> dict[str, typing.Any]:
-        output = {
-            key: value
-            for key, value in dataclasses.asdict(self).items()
-            if value is not UNSET
-        }
-        return output
+    def freeze(self) -> "ArgumentSpec":
+        return ArgumentSpec(
+            dest=typing.cast(str, self.dest),
+            flags=self.flags if self.flags else (),
+            type=UNSET if self.bulk else self.type,
+            help=self.help,
+            action=self.action,
+            default=self.default,
+            nargs=self.nargs,
+            bulk=(
+                BulkConversion(self.type, self.bulk.container, self.bulk.memoize)
+                if isinstance(self.bulk, options.Bulk)
+                else UNSET
+            ),
+            metavar=self.metavar,
+            required=not self.flags and self.nargs not in ("?", "*"),
+            container=self.container,
+        )
 
 
-@typing.runtime_checkable
-class HasOrigin(typing.Protocol):
+@dataclasses.dataclass(frozen=True, slots=True)
+class StreamSource:
+    """
+    Argument type for Iterator[T] fields.
+
+    Opens the named file, or stdin for "-", and lazily yields one converted
+    value per non-blank line. /dev/fd/N names an inherited file descriptor.
+    """
+
+    type: typing.Callable[[str], typing.Any] = str
+
+    def __call__(self, source: str) -> typing.Iterator[typing.Any]:
+        if source == "-":
+            return self._values(contextlib.nullcontext(sys.stdin))
+        try:
+            file = open(source, encoding=sys.getfilesystemencoding())
+        except OSError as error:
+            raise argparse.ArgumentTypeError(
+                f"can't open '{source}': {error}"
+            ) from None
+        return self._values(file)
+
+    def _values(
+        self, file: typing.ContextManager[typing.TextIO]
+    ) -> typing.Iterator[typing.Any]:
+        convert = self.type
+        with file as lines:
+            for line in lines:
+                if value := line.rstrip("\r\n"):
+                    yield convert(value)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ParseSettings:
+    fast: bool = False
+    response_files: bool = False
+    env_prefix: str | None = None
+    config: os.PathLike[str] | str | None = None
+
+
+ARRAY_TYPECODES = {int: "q", float: "d"}
+CHOICES_LISTED = 8
+
+
+class ConversionError(ValueError):
+    """
+    A token could not be converted. Its argument holds the token.
+    """
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class BulkConversion:
+    """
+    Converts every token of a list argument in one pass.
+    """
+
+    type: typing.Callable[[str], typing.Any]
+    container: type = list
+    memoize: bool = False
+
+    def __call__(self, tokens: list[str]) -> typing.Any:
+        convert = self._converter()
+        try:
+            if self.container is array.array:
+                return array.array(ARRAY_TYPECODES[self.type], map(convert, tokens))
+            elif convert is str:
+                return tokens if self.container is list else self.container(tokens)
+            return self.container(map(convert, tokens))
+        except (TypeError, ValueError):
+            for token in tokens:
+                try:
+                    self.type(token)
+                except (TypeError, ValueError):
+                    raise ConversionError(token) from None
+            raise
+
+    def _converter(self) -> typing.Callable[[str], typing.Any]:
+        if not self.memoize:
+            return self.type
+        elif self.type is str:
+            return sys.intern
+        memo: dict[str, typing.Any] = {}
+        convert = self.type
+
+        def memoized(token: str) -> typing.Any:
+            try:
+                return memo[token]
+            except KeyError:
+                value = memo[token] = convert(token)
+                return value
+
+        return memoized
+
+
+class Accumulated(list):
+    """
+    A list an accumulating action started during this parse, so it can grow
+    in place. argparse's own append and extend copy the list every time.
+    """
+
+
+ACCUMULATING = (options.Action.APPEND, options.Action.EXTEND)
+COLLECTIONS = (list, tuple, set, frozenset)
+
+
+def accumulator(current: typing.Any, default: typing.Any) -> Accumulated:
+    """
+    The list to add an occurrence to, given the argument's current value.
+
+    The first occurrence starts from a copy of the default, as in argparse,
+    and drops any value from the environment or a config file.
+    """
+    if type(current) is Accumulated:
+        return current
+    return Accumulated(default if isinstance(default, COLLECTIONS) else ())
+
+
+class AppendAction(argparse._AppendAction):
+    def __call__(self, parser, namespace, values, option_string=None):
+        items = accumulator(getattr(namespace, self.dest, None), self.default)
+        items.append(values)
+        setattr(namespace, self.dest, items)
+
+
+class ExtendAction(argparse._ExtendAction):
+    def __call__(self, parser, namespace, values, option_string=None):
+        items = accumulator(getattr(namespace, self.dest, None), self.default)
+        items.extend(values)
+        setattr(namespace, self.dest, items)
+
+
+class OptionalPositionalAction(argparse._StoreAction):
+    """
+    Stores a "?" or "*" positional. When it matched nothing, a value from the
+    environment or a config file, pre-filled in the namespace, is kept
+    instead of being replaced by the default.
+    """
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        unmatched = values is self.default or (self.nargs == "*" and values == [])
+        current = getattr(namespace, self.dest, self.default)
+        if not unmatched or current is self.default:
+            setattr(namespace, self.dest, values)
+
+
+class CachedHelpParser(argparse.ArgumentParser):
+    """
+    An ArgumentParser whose help comes from its plan, cached per width.
+
+    lower_plan sets plan after adding the arguments. The renderer, in
+    dykes.helptext, is only imported when help is asked for.
+    """
+
+    plan: "ParserPlan | None" = None
+
+    def format_help(self) -> str:
+        from . import helptext
+
+        return helptext.format_help(self)
+
+
+ACTION_CLASSES: dict[typing.Any, type[argparse.Action]] = {
+    options.Action.APPEND: AppendAction,
+    options.Action.EXTEND: ExtendAction,
+}
+
+
+class ChoiceError(argparse.ArgumentTypeError, ValueError):
+    """
+    A token is not one of the choices. argparse shows the message as is;
+    bulk conversion and config sources treat it as any bad value.
+    """
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Choices:
+    """
+    Argument type for Literal and Enum fields.
+
+    Converts and validates a token with one dict lookup, keyed by the Literal
+    values as strings or the Enum member values. Members whose values are not
+    strings, such as auto() numbers, are keyed by name instead. Either way the
+    other spelling is accepted too, so a StrEnum takes "high" and "HIGH".
+    argparse's own choices check scans a list and its errors list every
+    choice; these list a few.
+    """
+
+    source: type[enum.Enum] | tuple[typing.Any, ...]
+    lookup: dict[str, typing.Any] = dataclasses.field(
+        init=False, repr=False, compare=False
+    )
+    aliases: dict[str, typing.Any] = dataclasses.field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        lookup: dict[str, typing.Any] = {}
+        aliases: dict[str, typing.Any] = {}
+        if isinstance(self.source, tuple):
+            lookup = {str(value): value for value in self.source}
+        else:
+            for member in self.source:
+                if isinstance(member.value, str):
+                    lookup.setdefault(member.value, member)
+                    aliases.setdefault(member.name, member)
+                else:
+                    lookup.setdefault(member.name, member)
+                    aliases.setdefault(str(member.value), member)
+        object.__setattr__(self, "lookup", lookup)
+        object.__setattr__(self, "aliases", aliases)
+
+    @property
+    def __name__(self) -> str:
+        return self.source.__name__ if isinstance(self.source, type) else "choice"
+
+    def __call__(self, token: str) -> typing.Any:
+        try:
+            return self.lookup[token]
+        except KeyError:
+            if token in self.aliases:
+                return self.aliases[token]
+            names = ", ".join(repr(name) for name in self._listed())
+            raise ChoiceError(
+                f"invalid choice: {token!r} (choose from {names}{self._more(', ')})"
+            ) from None
+
+    def metavar(self) -> str:
+        return "{" + ",".join(self._listed()) + self._more(",") + "}"
+
+    def _listed(self) -> list[str]:
+        return list(itertools.islice(self.lookup, CHOICES_LISTED))
+
+    def _more(self, separator: str) -> str:
+        hidden = len(self.lookup) - CHOICES_LISTED
+        return f"{separator}... {hidden} more" if hidden > 0 else ""
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ArgumentSpec:
+    """
+    A single resolved argument of a ParserPlan.
+
+    Fields left UNSET are not passed on to argparse.
+    """
+
+    dest: str
+    flags: tuple[str, ...] = ()
+    type: typing.Callable[[str], typing.Any] | _Unset = UNSET
+    help: str | _Unset = UNSET
+    action: options.Action | _Unset = UNSET
+    default: typing.Any = UNSET
+    nargs: int | typing.Literal["?", "+", "*"] | _Unset = UNSET
+    bulk: BulkConversion | _Unset = UNSET
+    metavar: str | _Unset = UNSET
+    required: bool = False
+    container: typing.Type[typing.Any] | _Unset = UNSET
+
+    @property
+    def is_positional(self) -> bool:
+        return not self.flags
+
     @property
-    def __origin__(self) -> type | None:
-        return None
+    def name_or_flags(self) -> tuple[str, ...]:
+        return self.flags if self.flags else (self.dest,)
+
+    def kwargs(self) -> dict[str, typing.Any]:
+        """
+        Keyword arguments for ArgumentParser.add_argument, without name_or_flags.
+
+        Required arguments stay required unless lower_plan relaxes them for
+        a parse where the environment or a config file supplied them. Append
+        and extend use dykes' accumulating actions, and "?" and "*"
+        positionals keep such values when they match nothing.
+        """
+        output: dict[str, typing.Any] = {}
+        if self.flags:
+            output["dest"] = self.dest
+        if self.type is not UNSET:
+            output["type"] = self.type
+        if self.help is not UNSET:
+            output["help"] = self.help
+        if self.required and self.flags:
+            output["required"] = True
+        if self.action is not UNSET:
+            output["action"] = ACTION_CLASSES.get(self.action, self.action)
+        elif not self.flags and self.nargs in ("?", "*"):
+            output["action"] = OptionalPositionalAction
+        if isinstance(self.default, DefaultFactory):
+            # Absent values stay out of the namespace, so parsers keep
+            # argparse-native results. argparse would convert a "?"
+            # positional's string default, so those take None instead.
+            positional_optional = not self.flags and self.nargs == "?"
+            output["default"] = None if positional_optional else argparse.SUPPRESS
+        elif self.default is not UNSET:
+            output["default"] = self.default
+        if self.nargs is not UNSET:
+            output["nargs"] = self.nargs
+        if self.metavar is not UNSET:
+            output["metavar"] = self.metavar
+        return output
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class NestedSpec:
+    """
+    A field holding another definition. Its arguments are flattened into the
+    parent plan with dests prefixed by "dest." and rebuilt after parsing.
+    """
+
+    dest: str
+    definition: type
+    plan: "ParserPlan"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ParserPlan:
+    """
+    The compiled form of a definition: everything needed to build a parser.
+
+    fields names the definition's own fields in order. It differs from the
+    argument dests only when there are nested definitions.
+    """
+
+    description: str | None
+    arguments: tuple[ArgumentSpec, ...]
+    name: str = ""
+    nested: tuple[NestedSpec, ...] = ()
+    fields: tuple[str, ...] = dataclasses.field(init=False)
+    conversions: tuple[ArgumentSpec, ...] = dataclasses.field(init=False)
+    factories: tuple[ArgumentSpec, ...] = dataclasses.field(init=False)
+    required: tuple[ArgumentSpec, ...] = dataclasses.field(init=False)
+    containers: tuple[ArgumentSpec, ...] = dataclasses.field(init=False)
+
+    def __post_init__(self):
+        fields = tuple(
+            dict.fromkeys(
+                argument.dest.partition(".")[0] for argument in self.arguments
+            )
+        )
+        object.__setattr__(self, "fields", fields)
+        required = tuple(argument for argument in self.arguments if argument.required)
+        object.__setattr__(self, "required", required)
+        conversions = tuple(
+            argument for argument in self.arguments if argument.bulk is not UNSET
+        )
+        object.__setattr__(self, "conversions", conversions)
+        factories = tuple(
+            argument
+            for argument in self.arguments
+            if isinstance(argument.default, DefaultFactory)
+        )
+        object.__setattr__(self, "factories", factories)
+        containers = tuple(
+            argument
+            for argument in self.arguments
+            if argument.container is not UNSET or argument.action in ACCUMULATING
+        )
+        object.__setattr__(self, "containers", containers)
+
+    def __iter__(self) -> typing.Iterator[ArgumentSpec]:
+        return iter(self.arguments)
+
+    def __len__(self) -> int:
+        return len(self.arguments)
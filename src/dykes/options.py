@@ -4,7 +4,6 @@ Argument Parser Options
 Provided for public API use.
 """
 
-import dataclasses
 import typing
 from enum import StrEnum, auto
 
@@ -38,16 +37,47 @@ StoreTrue = typing.Annotated[bool, Action.STORE_TRUE]
 StoreFalse = typing.Annotated[bool, Action.STORE_FALSE]
 
 
-@dataclasses.dataclass(frozen=True)
-class NArgs:
+class NArgs(typing.NamedTuple):
     value: int | typing.Literal["*", "+", "?"]
 
 
+class Bulk(typing.NamedTuple):
+    """
+    Convert a list field's values in one pass after parsing.
+
+    container is the result type: list, tuple, or array.array for list[int]
+    and list[float]. memoize converts each distinct token only once and
+    interns strings, which pays off when values repeat.
+
+        paths: Annotated[list[Path], Bulk(tuple, memoize=True)]
+    """
+
+    container: type = list
+    memoize: bool = False
+
+
 class Flags:
-    value: list[str]
+    """
+    The option strings for a field, in place of the generated -x/--long-name.
+
+        path: Annotated[Path, Flags("-p", "--path")]
+    """
+
+    __slots__ = ("value", "_hash")
+
+    value: tuple[str, ...]
 
     def __init__(self, *args: str):
-        self.value = list(args)
+        self.value = args
+        self._hash = hash((Flags, args))
 
     def __hash__(self):
-        return hash(f"Flags[{','.join(self.value)}]")
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not Flags:
+            return NotImplemented
+        return self.value == other.value
+
+    def __repr__(self) -> str:
+        return f"Flags{self.value!r}"
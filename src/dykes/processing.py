@@ -5,23 +5,71 @@ This is all the things used internally to turn your definitions into something u
 """
 
 import argparse
+import array
+import collections
+import collections.abc
+import contextlib
 import dataclasses
+import itertools
+import operator
+import os
+import sys
+import threading
 import typing
+import weakref
 from inspect import getdoc
 from sys import argv
 
-from . import options, internal, utils
+from . import cache, construct, options, internal, utils
+
+# Help rendering, snapshots, environment and config sources, the fast path
+# and instrumentation are imported by the code paths that use them, so a
+# plain parse does not pay for them.
+if typing.TYPE_CHECKING:
+    from . import fastpath, sources
+
+SNAPSHOT_ENVIRONMENT_VARIABLE = "DYKES_SNAPSHOT_DIR"
+PROFILE_ENVIRONMENT_VARIABLE = "DYKES_PROFILE"
 
 NO_TYPE = options.Action.COUNT, options.Action.STORE_FALSE, options.Action.STORE_TRUE
+STREAM_ORIGINS = collections.abc.Iterator, collections.abc.Iterable
+HELP_FLAGS = ("-h", "--help")
 MUST_BE_FLAG = (
     options.Action.COUNT,
     options.Action.STORE_TRUE,
     options.Action.STORE_FALSE,
+    options.Action.APPEND,
+    options.Action.EXTEND,
 )
+NO_SPAN = contextlib.nullcontext()
+
+
+def span(
+    phase: str, definition: str | None = None, field: str | None = None
+) -> typing.ContextManager[None]:
+    """
+    instrumentation.span once dykes.instrumentation is imported, and a no-op
+    until then: nothing can be recording before it is.
+    """
+    instrumentation = sys.modules.get(f"{__package__}.instrumentation")
+    if instrumentation is None:
+        return NO_SPAN
+    return instrumentation.span(phase, definition, field)
+
+
+if os.environ.get(PROFILE_ENVIRONMENT_VARIABLE):
+    # Starts recording for the whole process, unless DYKES_PROFILE is 0.
+    from . import instrumentation  # noqa: F401
 
 
 def parse_args[ArgsType](
-    parameter_definition: type[ArgsType], *, args: list | None = None
+    parameter_definition: type[ArgsType],
+    *,
+    args: list | None = None,
+    fast: bool = False,
+    response_files: bool = False,
+    env_prefix: str | None = None,
+    config: os.PathLike[str] | str | None = None,
 ) -> ArgsType:
     """
     Process arguments and conform them to an input type.
@@ -43,76 +91,796 @@ def parse_args[ArgsType](
 
         args = parse_args(Application)
         print(args)
+
+    The parser for each definition is built once and reused. Use clear_cache if
+    a definition is changed after first use.
+
+    With fast=True, simple argv are matched by dykes directly instead of
+    argparse. Errors and help are still produced by argparse.
+
+    With response_files=True, an argument like @path is replaced by the lines
+    of that file, one argument per line, as argparse's fromfile_prefix_chars.
+
+    With env_prefix or config set, values missing from the command line are
+    read from environment variables (env_prefix plus the upper-cased field
+    name) and then from the TOML file config (keys are field names), before
+    falling back to defaults. See dykes.sources.
     """
     if args is None:
         args = argv[1:]
-    parser = build_parser(parameter_definition)
-    parsed = parser.parse_args(args)
-    return parameter_definition(**vars(parsed))
+    settings = internal.ParseSettings(
+        fast=fast, response_files=response_files, env_prefix=env_prefix, config=config
+    )
+    return parse(parameter_definition, args, parser_cache.get, settings)
 
 
-def build_parser(application_definition: type) -> argparse.ArgumentParser:
-    description = getdoc(application_definition)
-    parser = argparse.ArgumentParser(description=description)
-    hints = typing.get_type_hints(application_definition, include_extras=True)
-    fields = _get_fields(application_definition)
+def parse_known[ArgsType](
+    parameter_definition: type[ArgsType],
+    *,
+    args: list | None = None,
+    fast: bool = False,
+    response_files: bool = False,
+    env_prefix: str | None = None,
+    config: os.PathLike[str] | str | None = None,
+) -> tuple[ArgsType, list[str]]:
+    """
+    Parse the args a definition knows and return the rest, in order.
 
-    for dest, cls in hints.items():
-        origin = utils.get_origin(cls)
-        parameter_options: internal.ParameterOptions = internal.ParameterOptions(
-            dest=dest,
-            type=utils.get_field_type(cls),
-            default=fields[dest].value if fields[dest].value else internal.UNSET,
+        options, remaining = dykes.parse_known(GlobalOptions)
+        plugin = load_plugin(options.plugin)
+        plugin.main(remaining)
+
+    Unknown arguments are returned instead of rejected; other errors and help
+    exit as they do for parse_args, which the keyword arguments also match.
+    To split one argv between several definitions, use dykes.Stages.
+    """
+    if args is None:
+        args = argv[1:]
+    settings = internal.ParseSettings(
+        fast=fast, response_files=response_files, env_prefix=env_prefix, config=config
+    )
+    try:
+        args, layered = prepare(
+            args, settings, sources_for(parameter_definition, settings)
         )
+    except (OSError, internal.ConversionError) as error:
+        parser_cache.get(parameter_definition).error(str(error))
+    plan = plan_cache.get(parameter_definition)
+    values, remaining = match_values(
+        plan,
+        args,
+        lambda: parser_cache.get(parameter_definition),
+        matcher_cache.get(parameter_definition) if fast else None,
+        layered,
+        known=True,
+    )
+    with span("construct"):
+        return _construct(parameter_definition, plan, values), remaining
+
+
+class ParseError(Exception):
+    """
+    A command line was rejected, or asked for help, instead of being parsed.
+
+    status is the exit status argparse would have used, and output is the text
+    it would have printed.
+    """
+
+    def __init__(self, message: str, status: int = 2, output: str = ""):
+        super().__init__(message, status, output)
+        self.message = message
+        self.status = status
+        self.output = output
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class RaisingArgumentParser(internal.CachedHelpParser):
+    """
+    An ArgumentParser that raises ParseError instead of printing and exiting.
+    """
+
+    def print_help(self, file=None):
+        raise ParseError("help requested", status=0, output=self.format_help())
+
+    def error(self, message: str) -> typing.NoReturn:
+        output = f"{self.format_usage()}{self.prog}: error: {message}\n"
+        raise ParseError(message, status=2, output=output)
+
+    def exit(self, status: int = 0, message: str | None = None) -> typing.NoReturn:
+        raise ParseError(message or "", status=status, output=message or "")
+
+
+def parse_many[ArgsType](
+    parameter_definition: type[ArgsType],
+    arguments: typing.Iterable[typing.Sequence[str] | str],
+    *,
+    fast: bool = False,
+    response_files: bool = False,
+    env_prefix: str | None = None,
+    config: os.PathLike[str] | str | None = None,
+    processes: int | None = None,
+    chunksize: int = 1000,
+) -> typing.Iterator[ArgsType | ParseError]:
+    """
+    Parse many command lines against one definition.
+
+    Yields an instance, or the ParseError that rejected it, for each item in
+    order. Items may be argv lists or whole command line strings, which are
+    split with shlex.
+
+        for result in parse_many(Application, recorded_lines):
+            if isinstance(result, dykes.ParseError):
+                log.warning(result.message)
+
+    fast, response_files, env_prefix and config work as for parse_args.
+
+    With processes set, chunks of chunksize items are parsed in a process pool.
+    The definition must then be importable by the worker processes.
+    """
+    settings = internal.ParseSettings(
+        fast=fast, response_files=response_files, env_prefix=env_prefix, config=config
+    )
+    if processes is None:
+        for item in arguments:
+            yield _parse_item(parameter_definition, item, settings)
+        return
+
+    # Imported here: it pulls in logging, which plain parses never need.
+    import concurrent.futures
+
+    chunks = itertools.batched(arguments, chunksize)
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        pending: collections.deque[concurrent.futures.Future] = collections.deque()
+        for chunk in chunks:
+            pending.append(
+                executor.submit(_parse_chunk, parameter_definition, chunk, settings)
+            )
+            if len(pending) > processes * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
 
-        parameter_options = utils.get_meta_args(cls, parameter_options)
+def _parse_chunk[ArgsType](
+    parameter_definition: type[ArgsType],
+    chunk: typing.Iterable[typing.Sequence[str] | str],
+    settings: internal.ParseSettings,
+) -> list[ArgsType | ParseError]:
+    return [_parse_item(parameter_definition, item, settings) for item in chunk]
 
-        if parameter_options.action is internal.UNSET:
-            if parameter_options.type is bool:
-                if parameter_options.default is True:
-                    parameter_options.action = options.Action.STORE_FALSE
-                elif parameter_options.default in (False, internal.UNSET):
-                    parameter_options.action = options.Action.STORE_TRUE
 
-        if parameter_options.action in NO_TYPE:
-            parameter_options.type = internal.UNSET
+def _parse_item[ArgsType](
+    parameter_definition: type[ArgsType],
+    item: typing.Sequence[str] | str,
+    settings: internal.ParseSettings,
+) -> ArgsType | ParseError:
+    try:
+        if isinstance(item, str):
+            import shlex
 
-        store_flag_unset = (
-            parameter_options.action is options.Action.STORE
-            and parameter_options.flags is internal.UNSET
+            try:
+                item = shlex.split(item)
+            except ValueError as err:
+                raise ParseError(str(err)) from None
+        return parse(parameter_definition, item, raising_parser_cache.get, settings)
+    except ParseError as err:
+        return err
+
+
+def parse[ArgsType](
+    parameter_definition: type[ArgsType],
+    args: typing.Sequence[str],
+    parser_for: typing.Callable[[type], argparse.ArgumentParser],
+    settings: internal.ParseSettings,
+) -> ArgsType:
+    """
+    Parse args with the parser parser_for returns for the definition. The
+    building block of parse_args, parse_many, subcommands and served
+    applications.
+    """
+    try:
+        args, layered = prepare(
+            args, settings, sources_for(parameter_definition, settings)
         )
-        # If explicit Store action, we assume it's a flag.
-        must_be_flag_unset = (
-            parameter_options.action in MUST_BE_FLAG and not parameter_options.flags
+    except (OSError, internal.ConversionError) as error:
+        parser_for(parameter_definition).error(str(error))
+    return match(parameter_definition, args, parser_for, settings.fast, layered)
+
+
+def sources_for(
+    parameter_definition: type, settings: internal.ParseSettings
+) -> "tuple[sources.Source, ...]":
+    """
+    The environment and config sources of a definition, if the settings
+    read any.
+    """
+    if settings.env_prefix is None and settings.config is None:
+        return ()
+    return source_cache.get(parameter_definition)
+
+
+def prepare(
+    args: typing.Sequence[str],
+    settings: internal.ParseSettings,
+    argument_sources: "tuple[sources.Source, ...]",
+) -> tuple[typing.Sequence[str], dict[str, typing.Any] | None]:
+    """
+    Read everything a parse needs from outside argv: response files, the
+    environment and config files. Touches no caches besides config files, so
+    it can run in a worker thread.
+    """
+    if settings.response_files:
+        args = expand_response_files(args)
+    if not argument_sources:
+        return args, None
+    from . import sources
+
+    config = None
+    if settings.config is not None:
+        config = sources.read_config(settings.config)
+    layered = sources.layered_values(
+        argument_sources, settings.env_prefix, config, str(settings.config)
+    )
+    return args, layered
+
+
+def match[ArgsType](
+    parameter_definition: type[ArgsType],
+    args: typing.Sequence[str],
+    parser_for: typing.Callable[[type], argparse.ArgumentParser],
+    fast: bool,
+    layered: dict[str, typing.Any] | None,
+) -> ArgsType:
+    """
+    Build the definition from args once prepare has read everything else.
+    """
+    plan = plan_cache.get(parameter_definition)
+    values, _ = match_values(
+        plan,
+        args,
+        lambda: parser_for(parameter_definition),
+        matcher_cache.get(parameter_definition) if fast else None,
+        layered,
+    )
+    with span("construct"):
+        return _construct(parameter_definition, plan, values)
+
+
+def match_values(
+    plan: internal.ParserPlan,
+    args: typing.Sequence[str],
+    parser: typing.Callable[[], argparse.ArgumentParser],
+    matcher: "fastpath.Matcher | None",
+    layered: dict[str, typing.Any] | None,
+    known: bool = False,
+) -> tuple[dict[str, typing.Any], list[str]]:
+    """
+    Converted values keyed by dest, and the args left over.
+
+    Only known parses leave args over; the others reject them as argparse does.
+    """
+    counts = None
+    if layered:
+        layered, counts = _split_counts(plan, layered)
+    if matcher is not None:
+        from . import fastpath
+
+        try:
+            with span("fastpath"):
+                values = fastpath.parse(matcher, args, layered)
+            if counts:
+                _apply_counts(plan, values, counts)
+            with span("convert"):
+                return _finish_values(plan, values), []
+        except (fastpath.Fallback, internal.ConversionError):
+            pass
+    argument_parser = parser()
+    if layered:
+        filled = frozenset(
+            argument.dest
+            for argument in plan.arguments
+            if argument.dest in layered
+            and (argument.is_positional or argument.required)
         )
-        if store_flag_unset or must_be_flag_unset:
-            parameter_options.flags = [f"-{dest[0]}", f"--{dest.replace('_', '-')}"]
+        if filled:
+            argument_parser = _relaxed_parser(argument_parser, plan, filled)
+    with span("argparse"):
+        namespace = argparse.Namespace(**layered) if layered else None
+        if known:
+            namespace, remaining = argument_parser.parse_known_args(args, namespace)
+        else:
+            namespace, remaining = argument_parser.parse_args(args, namespace), []
+        # The namespace is ours alone, so its __dict__ is used without a copy.
+        values = namespace.__dict__
+    if counts:
+        _apply_counts(plan, values, counts)
+    try:
+        with span("convert"):
+            return _finish_values(plan, values), remaining
+    except internal.ConversionError as error:
+        argument_parser.error(str(error))
+
+
+def _split_counts(
+    plan: internal.ParserPlan, layered: dict[str, typing.Any]
+) -> tuple[dict[str, typing.Any], dict[str, typing.Any]]:
+    """
+    Take Count values out of the values from the environment and config
+    files. They replace the default when the flag is absent, but a flag on
+    the command line counts up from the default, not from them.
+    """
+    counts = {
+        argument.dest: layered[argument.dest]
+        for argument in plan.arguments
+        if argument.action is options.Action.COUNT and argument.dest in layered
+    }
+    if not counts:
+        return layered, counts
+    return {
+        dest: value for dest, value in layered.items() if dest not in counts
+    }, counts
+
+
+def _apply_counts(
+    plan: internal.ParserPlan,
+    values: dict[str, typing.Any],
+    counts: dict[str, typing.Any],
+) -> None:
+    for argument in plan.arguments:
+        dest = argument.dest
+        # A count that occurred at least once is past its default.
+        if dest in counts and values.get(dest, argument.default) == argument.default:
+            values[dest] = counts[dest]
+
+
+_relaxed_parsers: weakref.WeakKeyDictionary[
+    argparse.ArgumentParser, dict[frozenset[str], argparse.ArgumentParser]
+] = weakref.WeakKeyDictionary()
+_relaxed_lock = threading.Lock()
 
-        if parameter_options.action is options.Action.COUNT:
-            parameter_options.default = (
-                parameter_options.default if parameter_options.default else 0
+
+def _relaxed_parser(
+    parser: argparse.ArgumentParser,
+    plan: internal.ParserPlan,
+    filled: frozenset[str],
+) -> argparse.ArgumentParser:
+    """
+    A copy of parser in which the positionals named in filled are optional,
+    for parses where the environment or a config file supplied them. Built
+    once per parser and set of positionals.
+    """
+    with _relaxed_lock:
+        variants = _relaxed_parsers.setdefault(parser, {})
+        relaxed = variants.get(filled)
+        if relaxed is None:
+            relaxed = variants[filled] = lower_plan(
+                plan, type(parser), parser.prog, optional=filled
             )
+        return relaxed
+
+
+def _finish_values(
+    plan: internal.ParserPlan, values: dict[str, typing.Any]
+) -> dict[str, typing.Any]:
+    _check_required(plan, values)
+    _collect_containers(plan, values)
+    values = _convert_bulk(plan, values)
+    _apply_default_factories(plan, values)
+    return values
 
-        if origin is list and parameter_options.nargs is internal.UNSET:
-            parameter_options.nargs = "+"
 
-        flag_unset = parameter_options.flags is internal.UNSET
-        default_set = parameter_options.default is not internal.UNSET
-        nargs_not_default_friendly = parameter_options.nargs not in ("?", "*")
-        if default_set and flag_unset and nargs_not_default_friendly:
+def _construct[ArgsType](
+    parameter_definition: type[ArgsType],
+    plan: internal.ParserPlan,
+    values: dict[str, typing.Any],
+) -> ArgsType:
+    for nested in plan.nested:
+        values[nested.dest] = construct_nested(nested, values)
+    return constructor_cache.get(parameter_definition)(parameter_definition, values)
+
+
+def construct_nested(
+    nested: internal.NestedSpec, values: dict[str, typing.Any]
+) -> typing.Any:
+    """
+    Build a nested definition from its "dest." prefixed values, removing them.
+    """
+    inner = {
+        argument.dest: values.pop(f"{nested.dest}.{argument.dest}")
+        for argument in nested.plan.arguments
+    }
+    return _construct(nested.definition, nested.plan, inner)
+
+
+def _check_required(plan: internal.ParserPlan, values: dict[str, typing.Any]) -> None:
+    if not plan.required:
+        return
+    missing = [
+        argument.flags[0] if argument.flags else argument.metavar or argument.dest
+        for argument in plan.required
+        if values.get(argument.dest) is None
+    ]
+    if missing:
+        raise internal.ConversionError(
+            f"the following arguments are required: {', '.join(missing)}"
+        )
+
+
+def expand_response_files(args: typing.Iterable[str], prefix: str = "@") -> list[str]:
+    """
+    Replace every prefix-marked argument with the lines of the file it names.
+
+    Files may refer to further response files.
+    """
+    expanded = []
+    for arg in args:
+        if not arg.startswith(prefix):
+            expanded.append(arg)
+            continue
+        with open(
+            arg[len(prefix) :],
+            encoding=sys.getfilesystemencoding(),
+            errors=sys.getfilesystemencodeerrors(),
+        ) as file:
+            lines = file.read().splitlines()
+        expanded.extend(expand_response_files(lines, prefix))
+    return expanded
+
+
+def _convert_bulk(
+    plan: internal.ParserPlan, values: dict[str, typing.Any]
+) -> dict[str, typing.Any]:
+    for argument in plan.conversions:
+        conversion = typing.cast(internal.BulkConversion, argument.bulk)
+        tokens = values.get(argument.dest)
+        if type(tokens) is not list or tokens is argument.default:
+            continue
+        try:
+            values[argument.dest] = conversion(tokens)
+        except internal.ConversionError as error:
+            name = "/".join(argument.flags) if argument.flags else argument.dest
+            type_name = getattr(conversion.type, "__name__", repr(conversion.type))
+            raise internal.ConversionError(
+                f"argument {name}: invalid {type_name} value: {error.args[0]!r}"
+            ) from None
+    return values
+
+
+def _collect_containers(
+    plan: internal.ParserPlan, values: dict[str, typing.Any]
+) -> None:
+    """
+    Give accumulated and multi-valued arguments their annotated type: one
+    copy per argument, however often it occurred.
+    """
+    for argument in plan.containers:
+        value = values.get(argument.dest)
+        if type(value) is internal.Accumulated:
+            values[argument.dest] = (argument.container or list)(value)
+        elif argument.container and type(value) is list:
+            values[argument.dest] = argument.container(value)
+
+
+def _apply_default_factories(
+    plan: internal.ParserPlan, values: dict[str, typing.Any]
+) -> None:
+    # The default of a nested field is built once, however many of its
+    # fields are absent, keyed by the nested field's dest.
+    bases: dict[str, typing.Any] = {}
+    for argument in plan.factories:
+        default = typing.cast(internal.DefaultFactory, argument.default)
+        value = values.get(argument.dest, default)
+        # Absent, or None from argparse for a "?" positional.
+        absent = value is default or (value is None and argument.is_positional)
+        if not absent:
+            continue
+        factory = default.factory
+        if type(factory) is internal.NestedAttribute:
+            prefix = argument.dest.rsplit(".", len(factory.path))[0]
+            if prefix not in bases:
+                bases[prefix] = factory.factory()
+            values[argument.dest] = factory.read(bases[prefix])
+        else:
+            values[argument.dest] = factory()
+
+
+def build_parser(application_definition: type) -> argparse.ArgumentParser:
+    """
+    Build a fresh ArgumentParser for a definition.
+    """
+    return lower_plan(compile_plan(application_definition))
+
+
+def compile_plan(application_definition: type) -> internal.ParserPlan:
+    """
+    Resolve a definition into an immutable ParserPlan.
+
+    The plan can be inspected, or turned into an ArgumentParser with lower_plan.
+
+    Fields typed as another dataclass or NamedTuple are flattened into
+    prefixed options, --db-host for db.host. Nested definitions are compiled
+    once through plan_cache, however many definitions include them.
+    """
+    name = application_definition.__qualname__
+    with span("docstring"):
+        description = getdoc(application_definition)
+    with span("hints"):
+        hints = typing.get_type_hints(application_definition, include_extras=True)
+    with span("fields"):
+        fields = _get_fields(application_definition)
+    arguments = []
+    nested = []
+
+    for dest, cls in hints.items():
+        with span("meta_args", name, dest):
+            if (definition := _nested_definition(cls)) is None:
+                arguments.append(_compile_argument(dest, cls, fields[dest]))
+                continue
+            nested_plan = plan_cache.get(definition)
+            if not nested_plan.arguments:
+                raise ValueError(f"Nested definition {definition.__name__} is empty.")
+            nested.append(internal.NestedSpec(dest, definition, nested_plan))
+            arguments.extend(_flatten(dest, nested_plan, fields[dest].value))
+    check_flag_collisions(arguments)
+    return internal.ParserPlan(
+        description=description,
+        arguments=tuple(arguments),
+        name=name,
+        nested=tuple(nested),
+    )
+
+
+def _nested_definition(cls: type) -> type | None:
+    origin = utils.get_origin(cls)
+    if not isinstance(origin, type):
+        return None
+    elif dataclasses.is_dataclass(origin):
+        return origin
+    elif issubclass(origin, tuple) and hasattr(origin, "_fields"):
+        return origin
+    return None
+
+
+def _flatten(
+    dest: str, plan: internal.ParserPlan, default: typing.Any = internal.UNSET
+) -> typing.Iterator[internal.ArgumentSpec]:
+    """
+    A nested plan's arguments as options of the parent.
+
+    Long flags gain the field's prefix and short flags are dropped, since
+    they would clash between siblings. Positionals become options, required
+    unless they had a default. When the field itself has a default, each
+    option defaults to the matching attribute of it instead; a Count given on
+    the command line then counts up from zero.
+    """
+    prefix = f"--{dest.replace('_', '-')}-"
+    for argument in plan.arguments:
+        flags = tuple(
+            prefix + flag[2:] for flag in argument.flags if flag.startswith("--")
+        )
+        if not flags:
+            flags = (prefix + argument.dest.replace("_", "-"),)
+        if argument.is_positional:
+            argument = dataclasses.replace(
+                argument,
+                nargs=internal.UNSET if argument.nargs == "?" else argument.nargs,
+                required=argument.default is internal.UNSET
+                and argument.nargs not in ("?", "*"),
+            )
+        if default is not internal.UNSET:
+            argument = dataclasses.replace(
+                argument, default=_nested_default(default, argument), required=False
+            )
+        if argument.metavar is internal.UNSET and argument.action not in NO_TYPE:
+            # argparse would show DB.HOST; HOST reads better after --db-host.
+            metavar = argument.dest.rpartition(".")[2].upper()
+            argument = dataclasses.replace(argument, metavar=metavar)
+        yield dataclasses.replace(argument, dest=f"{dest}.{argument.dest}", flags=flags)
+
+
+def _nested_default(default: typing.Any, argument: internal.ArgumentSpec) -> typing.Any:
+    path = tuple(argument.dest.split("."))
+    if isinstance(default, internal.DefaultFactory):
+        return internal.DefaultFactory(internal.NestedAttribute(default.factory, path))
+    for name in path:
+        default = getattr(default, name)
+    return default
+
+
+def check_flag_collisions(
+    arguments: typing.Iterable[internal.ArgumentSpec],
+    name: typing.Callable[[internal.ArgumentSpec], str] = operator.attrgetter("dest"),
+) -> None:
+    """
+    Reject plans where two arguments share a flag, typically the generated
+    short flag of fields that start with the same letter. Errors call each
+    argument by name, its dest unless given.
+    """
+    owners = dict.fromkeys(HELP_FLAGS, "help")
+    for argument in arguments:
+        argument_name = name(argument)
+        for flag in argument.flags:
+            owner = owners.setdefault(flag, argument_name)
+            if owner != argument_name:
+                raise ValueError(
+                    f"{owner} and {argument_name} both use the flag {flag}. "
+                    "Give one of them explicit Flags."
+                )
+
+
+def _compile_argument(
+    dest: str, cls: type, field: internal.Field
+) -> internal.ArgumentSpec:
+    origin = utils.get_origin(cls)
+    parameter_options: internal.ParameterOptions = internal.ParameterOptions(
+        dest=dest,
+        type=utils.get_field_type(cls),
+        default=field.value,
+    )
+
+    parameter_options = utils.get_meta_args(cls, parameter_options)
+    if isinstance(parameter_options.type, internal.Choices):
+        parameter_options.metavar = parameter_options.type.metavar()
+
+    if parameter_options.action is internal.UNSET:
+        if parameter_options.type is bool:
+            if parameter_options.default is True:
+                parameter_options.action = options.Action.STORE_FALSE
+            elif parameter_options.default in (False, internal.UNSET):
+                parameter_options.action = options.Action.STORE_TRUE
+
+    if parameter_options.action in NO_TYPE:
+        parameter_options.type = internal.UNSET
+
+    store_flag_unset = (
+        parameter_options.action is options.Action.STORE
+        and parameter_options.flags is internal.UNSET
+    )
+    # If explicit Store action, we assume it's a flag.
+    must_be_flag_unset = (
+        parameter_options.action in MUST_BE_FLAG and not parameter_options.flags
+    )
+    if store_flag_unset or must_be_flag_unset:
+        parameter_options.flags = (f"-{dest[0]}", f"--{dest.replace('_', '-')}")
+
+    if parameter_options.action is options.Action.COUNT:
+        if isinstance(parameter_options.default, internal.DefaultFactory):
+            raise ValueError("Count arguments cannot use default_factory.")
+        if parameter_options.default is internal.UNSET:
+            parameter_options.default = 0
+
+    length = None
+    if origin in (set, frozenset, tuple):
+        parameter_options.container = origin
+        if origin is tuple:
+            length = utils.tuple_length(cls)
+
+    if parameter_options.action in internal.ACCUMULATING:
+        if length is not None:
             raise ValueError(
-                "Positional arguments cannot have defaults without NumberOfArguments '?' or '*'."
+                "Append and Extend collect any number of values. Use tuple[T, ...]."
             )
-        arguments = parameter_options.as_dict()
-        dest = arguments["dest"]
-        flags = arguments.pop("flags", None)
-        name_or_flags = flags if flags else [dest]
-        if not flags:
-            arguments.pop("dest")
-        parser.add_argument(*name_or_flags, **arguments)
+        if parameter_options.default is internal.UNSET:
+            # An option that never occurs collects nothing.
+            parameter_options.default = internal.DefaultFactory(
+                parameter_options.container or list
+            )
+        if (
+            parameter_options.action is options.Action.EXTEND
+            and parameter_options.nargs is internal.UNSET
+        ):
+            parameter_options.nargs = "+"
+    elif origin in internal.COLLECTIONS and parameter_options.nargs is internal.UNSET:
+        # tuple[int, int] takes exactly two values; tuple[int, ...] any number.
+        parameter_options.nargs = "+" if length is None else length
+
+    if origin in STREAM_ORIGINS:
+        if parameter_options.nargs is not internal.UNSET:
+            raise ValueError("Streamed fields take exactly one source.")
+        parameter_options.type = internal.StreamSource(parameter_options.type)
+
+    if isinstance(bulk := parameter_options.bulk, options.Bulk):
+        if origin is not list:
+            raise ValueError("Bulk conversion only applies to list fields.")
+        if (
+            bulk.container is array.array
+            and parameter_options.type not in internal.ARRAY_TYPECODES
+        ):
+            raise ValueError("Bulk array.array results need list[int] or list[float].")
+
+    flag_unset = parameter_options.flags is internal.UNSET
+    default_set = parameter_options.default is not internal.UNSET
+    nargs_not_default_friendly = parameter_options.nargs not in ("?", "*")
+    if default_set and flag_unset and nargs_not_default_friendly:
+        raise ValueError(
+            "Positional arguments cannot have defaults without NumberOfArguments '?' or '*'."
+        )
+    return parameter_options.freeze()
+
+
+def lower_plan(
+    plan: internal.ParserPlan,
+    parser_class: type[argparse.ArgumentParser] = internal.CachedHelpParser,
+    prog: str | None = None,
+    *,
+    optional: typing.Container[str] = (),
+) -> argparse.ArgumentParser:
+    """
+    Build an ArgumentParser from a compiled ParserPlan.
+
+    Parsers derived from CachedHelpParser render their help from the plan.
+    Positionals whose dest is in optional are not required.
+    """
+    parser = parser_class(prog=prog, description=plan.description)
+    for argument in plan.arguments:
+        with span("add_argument", plan.name, argument.dest):
+            action = parser.add_argument(*argument.name_or_flags, **argument.kwargs())
+        if argument.dest in optional:
+            action.required = False
+    if isinstance(parser, internal.CachedHelpParser):
+        parser.plan = plan
     return parser
 
 
+def _load_plan(application_definition: type) -> internal.ParserPlan:
+    """
+    Compile a definition, going through the snapshot directory if one is set.
+    """
+    if not os.environ.get(SNAPSHOT_ENVIRONMENT_VARIABLE):
+        return compile_plan(application_definition)
+    from . import snapshot
+
+    directory = snapshot.directory_from_environment()
+    plan = snapshot.load(application_definition, directory)
+    if plan is None:
+        plan = compile_plan(application_definition)
+        snapshot.store(application_definition, plan, directory)
+    return plan
+
+
+def _load_matcher(application_definition: type) -> "fastpath.Matcher":
+    from . import fastpath
+
+    return fastpath.build_matcher(plan_cache.get(application_definition))
+
+
+def _load_sources(application_definition: type) -> "tuple[sources.Source, ...]":
+    from . import sources
+
+    return sources.compile_sources(plan_cache.get(application_definition))
+
+
+# Every per-definition cache. Shared by all threads; values are built once
+# and never mutated afterwards. argparse does not modify a parser while
+# parsing, so the cached parsers can serve concurrent parses.
+registry = cache.Registry()
+plan_cache = registry.cache(_load_plan)
+parser_cache = registry.cache(lambda definition: lower_plan(plan_cache.get(definition)))
+raising_parser_cache = registry.cache(
+    lambda definition: lower_plan(
+        plan_cache.get(definition), parser_class=RaisingArgumentParser
+    )
+)
+matcher_cache = registry.cache(_load_matcher)
+source_cache = registry.cache(_load_sources)
+constructor_cache = registry.cache(
+    lambda definition: construct.build_constructor(
+        definition, plan_cache.get(definition)
+    )
+)
+
+
+def clear_cache(definition: type | None = None) -> None:
+    """
+    Forget everything cached for definition, or for all definitions if None.
+
+    Needed if a definition class is modified after it was first parsed.
+    """
+    registry.invalidate(definition)
+
+
 class _Field(typing.Protocol):
     default: typing.Any
     default_factory: typing.Callable[[], typing.Any]
@@ -122,7 +890,7 @@ def _get_default(data_class_field: _Field):
     if data_class_field.default is not dataclasses.MISSING:
         return data_class_field.default
     elif data_class_field.default_factory is not dataclasses.MISSING:
-        return data_class_field.default_factory()
+        return internal.DefaultFactory(data_class_field.default_factory)
     else:
         return internal.UNSET
 
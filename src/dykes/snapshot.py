@@ -0,0 +1,304 @@
+"""
+On-disk snapshots of compiled plans.
+
+A snapshot stores a ParserPlan as JSON, keyed by a hash of the source file of
+the module that defines the definition. Loading a fresh snapshot rebuilds the
+plan without resolving type hints. A missing, stale or unreadable snapshot
+loads as None, and the caller compiles the definition as usual.
+
+Only the defining module is hashed. If a definition uses types or defaults
+from other modules that change, clear the snapshot directory.
+
+Set the DYKES_SNAPSHOT_DIR environment variable to enable snapshots for
+parse_args and friends. Snapshots name the types and factories the parser
+calls, so they are only loaded from a directory and files owned by the
+current user that nobody else can write to.
+"""
+
+import enum
+import importlib
+import os
+import stat
+import sys
+import typing
+
+from . import internal, options
+
+# The disk and hashing modules are imported by the functions that use them,
+# so parses without a snapshot directory never load them.
+if typing.TYPE_CHECKING:
+    import pathlib
+
+FORMAT_VERSION = 7
+ENVIRONMENT_VARIABLE = "DYKES_SNAPSHOT_DIR"
+JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+class Unsnapshottable(ValueError):
+    """
+    The plan holds something that cannot be stored by reference or as JSON.
+    """
+
+
+def directory_from_environment() -> "pathlib.Path | None":
+    directory = os.environ.get(ENVIRONMENT_VARIABLE)
+    if not directory:
+        return None
+    import pathlib
+
+    return pathlib.Path(directory)
+
+
+def source_hash(definition: type) -> str | None:
+    """
+    Hash of the source file defining definition, or None if there isn't one.
+    """
+    module = sys.modules.get(definition.__module__)
+    file_name = getattr(module, "__file__", None)
+    if file_name is None:
+        return None
+    import hashlib
+
+    try:
+        with open(file_name, "rb") as file:
+            source = file.read()
+    except OSError:
+        return None
+    return hashlib.sha256(source).hexdigest()
+
+
+def snapshot_path(definition: type, directory: "pathlib.Path") -> "pathlib.Path":
+    return directory / f"{definition.__module__}.{definition.__qualname__}.json"
+
+
+def load(definition: type, directory: "pathlib.Path") -> internal.ParserPlan | None:
+    """
+    Load the snapshot of definition's plan, or None if it is missing or stale.
+    """
+    import json
+
+    digest = source_hash(definition)
+    if digest is None:
+        return None
+    try:
+        text = read_private(snapshot_path(definition, directory))
+        if text is None:
+            return None
+        data = json.loads(text)
+        if data["version"] != FORMAT_VERSION or data["source_hash"] != digest:
+            return None
+        return plan_from_dict(data["plan"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError, ImportError):
+        return None
+
+
+def read_private(path: "pathlib.Path") -> str | None:
+    """
+    The text of path, or None unless it and its directory belong to the
+    current user and are not writable by group or others.
+    """
+    with open(path, encoding="utf-8") as file:
+        if not _private(os.fstat(file.fileno())) or not _private(os.stat(path.parent)):
+            return None
+        return file.read()
+
+
+def _private(status: os.stat_result) -> bool:
+    if not hasattr(os, "getuid"):
+        return True
+    return status.st_uid == os.getuid() and not status.st_mode & (
+        stat.S_IWGRP | stat.S_IWOTH
+    )
+
+
+def store(
+    definition: type, plan: internal.ParserPlan, directory: "pathlib.Path"
+) -> bool:
+    """
+    Write a snapshot of plan. Returns False if the plan cannot be snapshotted
+    or the directory cannot be written.
+    """
+    import json
+    import tempfile
+
+    digest = source_hash(definition)
+    if digest is None or "<locals>" in definition.__qualname__:
+        return False
+    try:
+        data = {
+            "version": FORMAT_VERSION,
+            "source_hash": digest,
+            "plan": plan_to_dict(plan),
+        }
+    except Unsnapshottable:
+        return False
+
+    try:
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, suffix=".tmp", delete=False
+        ) as temporary:
+            json.dump(data, temporary, separators=(",", ":"))
+        os.replace(temporary.name, snapshot_path(definition, directory))
+    except OSError:
+        return False
+    return True
+
+
+def plan_to_dict(plan: internal.ParserPlan) -> dict[str, typing.Any]:
+    return {
+        "description": plan.description,
+        "name": plan.name,
+        "arguments": [_argument_to_dict(argument) for argument in plan.arguments],
+        "nested": [
+            {
+                "dest": nested.dest,
+                "definition": _reference(nested.definition),
+                "plan": plan_to_dict(nested.plan),
+            }
+            for nested in plan.nested
+        ],
+    }
+
+
+def plan_from_dict(data: dict[str, typing.Any]) -> internal.ParserPlan:
+    return internal.ParserPlan(
+        description=data["description"],
+        name=data["name"],
+        arguments=tuple(
+            _argument_from_dict(argument) for argument in data["arguments"]
+        ),
+        nested=tuple(
+            internal.NestedSpec(
+                dest=nested["dest"],
+                definition=_resolve(nested["definition"]),
+                plan=plan_from_dict(nested["plan"]),
+            )
+            for nested in data["nested"]
+        ),
+    )
+
+
+def _argument_to_dict(argument: internal.ArgumentSpec) -> dict[str, typing.Any]:
+    output: dict[str, typing.Any] = {"dest": argument.dest}
+    if argument.flags:
+        output["flags"] = list(argument.flags)
+    if isinstance(argument.type, internal.StreamSource):
+        output["stream"] = _reference(argument.type.type)
+    elif isinstance(argument.type, internal.Choices):
+        output["choices"] = _choices_to_dict(argument.type)
+    elif argument.type is not internal.UNSET:
+        output["type"] = _reference(argument.type)
+    if argument.help is not internal.UNSET:
+        output["help"] = argument.help
+    if argument.action is not internal.UNSET:
+        output["action"] = str(argument.action)
+    if isinstance(argument.default, internal.DefaultFactory):
+        output["default_factory"] = _reference(argument.default.factory)
+    elif argument.default is not internal.UNSET:
+        output["default"] = _json_value(argument.default)
+    if argument.nargs is not internal.UNSET:
+        output["nargs"] = argument.nargs
+    if argument.metavar is not internal.UNSET:
+        output["metavar"] = argument.metavar
+    if argument.required:
+        output["required"] = True
+    if argument.container is not internal.UNSET:
+        output["container"] = _reference(argument.container)
+    if isinstance(argument.bulk, internal.BulkConversion):
+        output["bulk"] = {
+            "type": _reference(argument.bulk.type),
+            "container": _reference(argument.bulk.container),
+            "memoize": argument.bulk.memoize,
+        }
+    return output
+
+
+def _argument_from_dict(data: dict[str, typing.Any]) -> internal.ArgumentSpec:
+    return internal.ArgumentSpec(
+        dest=data["dest"],
+        flags=tuple(data.get("flags", ())),
+        type=_type_from_dict(data),
+        help=data.get("help", internal.UNSET),
+        action=options.Action(data["action"]) if "action" in data else internal.UNSET,
+        default=_default_from_dict(data),
+        nargs=data.get("nargs", internal.UNSET),
+        bulk=_bulk_from_dict(data["bulk"]) if "bulk" in data else internal.UNSET,
+        metavar=data.get("metavar", internal.UNSET),
+        required=data.get("required", False),
+        container=_resolve(data["container"])
+        if "container" in data
+        else internal.UNSET,
+    )
+
+
+def _type_from_dict(data: dict[str, typing.Any]) -> typing.Any:
+    if "stream" in data:
+        return internal.StreamSource(_resolve(data["stream"]))
+    elif "choices" in data:
+        choices = data["choices"]
+        if "enum" in choices:
+            return internal.Choices(_resolve(choices["enum"]))
+        return internal.Choices(tuple(_from_json(choices["literal"])))
+    elif "type" in data:
+        return _resolve(data["type"])
+    return internal.UNSET
+
+
+def _default_from_dict(data: dict[str, typing.Any]) -> typing.Any:
+    if "default_factory" in data:
+        return internal.DefaultFactory(_resolve(data["default_factory"]))
+    elif "default" in data:
+        return _from_json(data["default"])
+    return internal.UNSET
+
+
+def _choices_to_dict(choices: internal.Choices) -> dict[str, typing.Any]:
+    if isinstance(choices.source, tuple):
+        return {"literal": _json_value(list(choices.source))}
+    return {"enum": _reference(choices.source)}
+
+
+def _bulk_from_dict(data: dict[str, typing.Any]) -> internal.BulkConversion:
+    return internal.BulkConversion(
+        type=_resolve(data["type"]),
+        container=_resolve(data["container"]),
+        memoize=data["memoize"],
+    )
+
+
+def _reference(value: typing.Any) -> str:
+    module = getattr(value, "__module__", None)
+    qualname = getattr(value, "__qualname__", None)
+    if module is None or qualname is None or "<" in qualname:
+        raise Unsnapshottable(f"{value!r} cannot be imported by name.")
+    return f"{module}:{qualname}"
+
+
+def _resolve(reference: str) -> typing.Any:
+    module_name, _, qualname = reference.partition(":")
+    value: typing.Any = importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        value = getattr(value, attribute)
+    return value
+
+
+def _json_value(value: typing.Any) -> typing.Any:
+    """
+    value as JSON. Enum members are stored by reference, as {"member": ...}.
+    """
+    if type(value) in JSON_SCALARS:
+        return value
+    elif isinstance(value, enum.Enum):
+        return {"member": f"{_reference(type(value))}.{value.name}"}
+    elif type(value) is list:
+        return [_json_value(item) for item in value]
+    raise Unsnapshottable(f"Default {value!r} cannot be stored as JSON.")
+
+
+def _from_json(value: typing.Any) -> typing.Any:
+    if type(value) is dict:
+        return _resolve(value["member"])
+    elif type(value) is list:
+        return [_from_json(item) for item in value]
+    return value
@@ -0,0 +1,189 @@
+"""
+Environment variable and config file sources for definitions.
+
+Each argument can be read from an environment variable, PREFIX plus the
+upper-cased dest, and from a TOML config file key, the dest in snake_case or
+kebab-case. Fields of nested definitions use PREFIX_DB_HOST and the host key
+of a [db] table. The command line beats the environment, which beats the config
+file, which beats the definition's defaults.
+"""
+
+import dataclasses
+import os
+import shlex
+import typing
+
+from . import internal, options
+
+TRUE_STRINGS = frozenset(("1", "true", "yes", "on"))
+FALSE_STRINGS = frozenset(("0", "false", "no", "off"))
+FLAG_ACTIONS = (options.Action.STORE_TRUE, options.Action.STORE_FALSE)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Source:
+    """
+    Where one argument may be found outside the command line.
+    """
+
+    argument: internal.ArgumentSpec
+    environment_suffix: str
+    config_keys: tuple[str, ...]
+
+
+def compile_sources(plan: internal.ParserPlan) -> tuple[Source, ...]:
+    return tuple(
+        Source(
+            argument=argument,
+            environment_suffix=argument.dest.upper().replace(".", "_"),
+            config_keys=tuple(dict.fromkeys((argument.dest, _kebab(argument.dest)))),
+        )
+        for argument in plan.arguments
+    )
+
+
+def _kebab(dest: str) -> str:
+    return dest.replace("_", "-")
+
+
+_config_cache: dict[str, tuple[tuple[int, int], dict[str, typing.Any]]] = {}
+
+
+def read_config(path: os.PathLike[str] | str) -> dict[str, typing.Any]:
+    """
+    Read a TOML config file, reusing the last result until the file changes.
+
+    A missing file reads as empty. Unreadable or malformed files raise
+    internal.ConversionError.
+    """
+    name = os.fspath(path)
+    try:
+        stat = os.stat(name)
+    except FileNotFoundError:
+        return {}
+    except OSError as error:
+        raise internal.ConversionError(f"{name}: {error}") from None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _config_cache.get(name)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    # Imported here so parses without a config file never load the parser.
+    import tomllib
+
+    try:
+        with open(name, "rb") as file:
+            data = tomllib.load(file)
+    except (OSError, tomllib.TOMLDecodeError) as error:
+        raise internal.ConversionError(f"{name}: {error}") from None
+    _config_cache[name] = (stamp, data)
+    return data
+
+
+def layered_values(
+    sources: tuple[Source, ...],
+    env_prefix: str | None,
+    config: dict[str, typing.Any] | None,
+    config_name: str = "config",
+) -> dict[str, typing.Any]:
+    """
+    Values found in the environment or config, keyed by dest.
+
+    Raises internal.ConversionError with an argparse style message for values
+    that do not convert.
+    """
+    values: dict[str, typing.Any] = {}
+    environ = os.environ
+    for source in sources:
+        if env_prefix is not None:
+            name = env_prefix + source.environment_suffix
+            raw = environ.get(name)
+            if raw is not None:
+                values[source.argument.dest] = _from_string(
+                    source.argument, raw, f"environment variable {name}"
+                )
+                continue
+        if config:
+            for key in source.config_keys:
+                value = _lookup(config, key)
+                if value is not internal.UNSET:
+                    values[source.argument.dest] = _from_config(
+                        source.argument, value, f"{config_name} key {key}"
+                    )
+                    break
+    return values
+
+
+def _lookup(config: dict[str, typing.Any], key: str) -> typing.Any:
+    """
+    The value at a dotted key, descending into tables, or UNSET.
+    """
+    value: typing.Any = config
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return internal.UNSET
+        value = value[part]
+    return value
+
+
+def _from_string(argument: internal.ArgumentSpec, raw: str, origin: str) -> typing.Any:
+    action = argument.action
+    if action in FLAG_ACTIONS:
+        lowered = raw.strip().lower()
+        if lowered in TRUE_STRINGS or lowered in FALSE_STRINGS:
+            return lowered in TRUE_STRINGS
+        _fail(origin, "bool", raw)
+    elif action is options.Action.COUNT:
+        return _convert(int, raw, origin)
+    elif _is_multiple(argument):
+        return [_convert(argument.type, token, origin) for token in shlex.split(raw)]
+    return _convert(argument.type, raw, origin)
+
+
+def _from_config(
+    argument: internal.ArgumentSpec, value: typing.Any, origin: str
+) -> typing.Any:
+    if argument.action in FLAG_ACTIONS:
+        if type(value) is not bool:
+            _fail(origin, "bool", value)
+        return value
+    elif argument.action is options.Action.COUNT:
+        if type(value) is not int:
+            _fail(origin, "int", value)
+        return value
+    elif _is_multiple(argument):
+        if not isinstance(value, list):
+            _fail(origin, "list", value)
+        return [_convert(argument.type, item, origin) for item in value]
+    return _convert(argument.type, value, origin)
+
+
+def _is_multiple(argument: internal.ArgumentSpec) -> bool:
+    return (
+        argument.nargs in ("+", "*")
+        or type(argument.nargs) is int
+        or argument.action in internal.ACCUMULATING
+    )
+
+
+def _convert(convert: typing.Any, value: typing.Any, origin: str) -> typing.Any:
+    """
+    Convert a string, or a TOML scalar by way of its text, as the command
+    line would. Choices validate TOML numbers against their members the same
+    way. Tables and arrays are rejected.
+    """
+    type_name = getattr(
+        convert, "__name__", "str" if convert is internal.UNSET else repr(convert)
+    )
+    if isinstance(value, (dict, list)):
+        _fail(origin, type_name, value)
+    token = value if isinstance(value, str) else str(value)
+    if convert is internal.UNSET:
+        return token
+    try:
+        return convert(token)
+    except Exception:
+        _fail(origin, type_name, value)
+
+
+def _fail(origin: str, type_name: str, value: typing.Any) -> typing.NoReturn:
+    raise internal.ConversionError(f"{origin}: invalid {type_name} value: {value!r}")
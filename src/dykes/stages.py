@@ -0,0 +1,186 @@
+"""
+Several definitions parsed from one argv in a single pass.
+
+A dispatcher with global options and a plugin with options of its own can
+parse both at once, instead of once per stage:
+
+    stages = dykes.Stages(GlobalOptions, PluginOptions)
+    (global_options, plugin_options), remaining = stages.parse_known()
+
+One parser knows every stage's flags, so a value meant for a later stage is
+never taken for an earlier stage's positional. Stages may not share a flag.
+"""
+
+import argparse
+import dataclasses
+import os
+import threading
+import typing
+from sys import argv
+
+from . import fastpath, internal, processing, sources
+
+
+class Stages:
+    """
+    Definitions that split one command line between them, in order.
+
+    Positionals are filled stage by stage. Each stage's values are parsed,
+    converted and built exactly as dykes.parse_args would.
+    """
+
+    def __init__(
+        self,
+        *definitions: type,
+        description: str | None = None,
+        prog: str | None = None,
+    ):
+        if not definitions:
+            raise ValueError("Stages needs at least one definition.")
+        self.definitions = definitions
+        self.description = description
+        self.prog = prog
+        self._plan: internal.ParserPlan | None = None
+        self._parser: argparse.ArgumentParser | None = None
+        self._matcher: fastpath.Matcher | None = None
+        self._sources: tuple[sources.Source, ...] | None = None
+        self._lock = threading.RLock()
+
+    @property
+    def plan(self) -> internal.ParserPlan:
+        """
+        One plan holding every stage. Stage i's dests are prefixed with "i.".
+        """
+        with self._lock:
+            if self._plan is None:
+                plan = self._compose()
+                self._matcher = fastpath.build_matcher(plan)
+                self._plan = plan
+            return self._plan
+
+    @property
+    def parser(self) -> argparse.ArgumentParser:
+        with self._lock:
+            if self._parser is None:
+                self._parser = processing.lower_plan(self.plan, prog=self.prog)
+            return self._parser
+
+    def _compose(self) -> internal.ParserPlan:
+        arguments = []
+        stages = []
+        # Collisions name the field as Definition.field, not by its stage dest.
+        names: dict[str, str] = {}
+        for index, definition in enumerate(self.definitions):
+            plan = processing.plan_cache.get(definition)
+            stages.append(internal.NestedSpec(str(index), definition, plan))
+            for argument in plan.arguments:
+                names[f"{index}.{argument.dest}"] = (
+                    f"{definition.__name__}.{argument.dest}"
+                )
+                metavar = argument.metavar
+                if (
+                    metavar is internal.UNSET
+                    and argument.action not in processing.NO_TYPE
+                ):
+                    # Keep help and errors free of the stage prefix.
+                    metavar = argument.dest
+                    if not argument.is_positional:
+                        metavar = metavar.upper()
+                arguments.append(
+                    dataclasses.replace(
+                        argument, dest=f"{index}.{argument.dest}", metavar=metavar
+                    )
+                )
+        processing.check_flag_collisions(
+            arguments, lambda argument: names[argument.dest]
+        )
+        return internal.ParserPlan(
+            description=self.description,
+            arguments=tuple(arguments),
+            name="+".join(definition.__name__ for definition in self.definitions),
+            nested=tuple(stages),
+        )
+
+    def _sources_for(
+        self, settings: internal.ParseSettings
+    ) -> tuple[sources.Source, ...]:
+        if settings.env_prefix is None and settings.config is None:
+            return ()
+        with self._lock:
+            if self._sources is None:
+                # Each stage keeps its own names in the environment and config.
+                by_dest = {argument.dest: argument for argument in self.plan.arguments}
+                self._sources = tuple(
+                    dataclasses.replace(
+                        source, argument=by_dest[f"{index}.{source.argument.dest}"]
+                    )
+                    for index, definition in enumerate(self.definitions)
+                    for source in processing.source_cache.get(definition)
+                )
+            return self._sources
+
+    def parse_known(
+        self,
+        args: list | None = None,
+        *,
+        fast: bool = False,
+        response_files: bool = False,
+        env_prefix: str | None = None,
+        config: os.PathLike[str] | str | None = None,
+    ) -> tuple[tuple[typing.Any, ...], list[str]]:
+        """
+        An instance of each definition, and the args none of them knew.
+
+        The keyword arguments work as they do for dykes.parse_args.
+        """
+        if args is None:
+            args = argv[1:]
+        settings = internal.ParseSettings(
+            fast=fast,
+            response_files=response_files,
+            env_prefix=env_prefix,
+            config=config,
+        )
+        try:
+            args, layered = processing.prepare(
+                args, settings, self._sources_for(settings)
+            )
+        except (OSError, internal.ConversionError) as error:
+            self.parser.error(str(error))
+        plan = self.plan
+        values, remaining = processing.match_values(
+            plan,
+            args,
+            lambda: self.parser,
+            self._matcher if fast else None,
+            layered,
+            known=True,
+        )
+        with processing.span("construct"):
+            instances = tuple(
+                processing.construct_nested(stage, values) for stage in plan.nested
+            )
+        return instances, remaining
+
+    def parse_args(
+        self,
+        args: list | None = None,
+        *,
+        fast: bool = False,
+        response_files: bool = False,
+        env_prefix: str | None = None,
+        config: os.PathLike[str] | str | None = None,
+    ) -> tuple[typing.Any, ...]:
+        """
+        An instance of each definition. Arguments no stage knows are errors.
+        """
+        instances, remaining = self.parse_known(
+            args,
+            fast=fast,
+            response_files=response_files,
+            env_prefix=env_prefix,
+            config=config,
+        )
+        if remaining:
+            self.parser.error(f"unrecognized arguments: {' '.join(remaining)}")
+        return instances
@@ -0,0 +1,154 @@
+"""
+Subcommands, each described by its own definition.
+
+Only the selected subcommand is introspected and gets a full parser. Help and
+errors at the top level use each command's name and docstring summary.
+"""
+
+import argparse
+import collections.abc
+import dataclasses
+import inspect
+import os
+import re
+import threading
+import typing
+from sys import argv
+
+from . import internal, processing
+
+
+def command_name(definition: type) -> str:
+    """
+    The kebab-case name of a definition class: AddFile becomes add-file.
+    """
+    return re.sub(r"(?<!^)(?=[A-Z])", "-", definition.__name__).lower()
+
+
+def summary(definition: type) -> str:
+    """
+    The first line of a definition's docstring.
+
+    Undocumented dataclasses and NamedTuples have no summary, rather than the
+    signature their decorator or base class wrote as the docstring.
+    """
+    doc = inspect.getdoc(definition)
+    if not doc or doc == _generated_doc(definition):
+        return ""
+    return doc.splitlines()[0].strip()
+
+
+def _generated_doc(definition: type) -> str | None:
+    if dataclasses.is_dataclass(definition):
+        signature = str(inspect.signature(definition)).replace(" -> None", "")
+        return f"{definition.__name__}{signature}"
+    if fields := getattr(definition, "_fields", None):
+        # As namedtuple writes it, with a trailing comma for a single field.
+        arguments = ", ".join(fields) + ("," if len(fields) == 1 else "")
+        return f"{definition.__name__}({arguments})"
+    return None
+
+
+class Commands[T]:
+    """
+    A set of subcommands, selected by the first positional argument.
+
+    Commands take a mapping of names to definitions, or a union of definitions
+    named after their classes:
+
+        commands = dykes.Commands(AddFile | RemoveFile)
+        command = commands.parse_args()
+
+        match command:
+            case AddFile(path=path):
+                ...
+    """
+
+    def __init__(
+        self,
+        commands: collections.abc.Mapping[str, type[T]] | typing.Any,
+        *,
+        description: str | None = None,
+        prog: str | None = None,
+    ):
+        if isinstance(commands, collections.abc.Mapping):
+            self.commands: dict[str, type[T]] = dict(commands)
+        else:
+            members = typing.get_args(commands) or (commands,)
+            self.commands = {command_name(member): member for member in members}
+        if not self.commands:
+            raise ValueError("Commands needs at least one command.")
+        self.description = description
+        self.prog = prog
+        self.summaries = {
+            name: summary(definition) for name, definition in self.commands.items()
+        }
+        self._parser: argparse.ArgumentParser | None = None
+        self._subparsers: dict[str, argparse.ArgumentParser] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def parser(self) -> argparse.ArgumentParser:
+        """
+        The top-level parser. Its subcommand parsers are empty stand-ins.
+        """
+        with self._lock:
+            if self._parser is None:
+                parser = argparse.ArgumentParser(
+                    prog=self.prog, description=self.description
+                )
+                subparsers = parser.add_subparsers(dest="command", required=True)
+                for name, help_text in self.summaries.items():
+                    subparsers.add_parser(name, help=help_text, add_help=False)
+                self._parser = parser
+            return self._parser
+
+    def subparser(self, name: str) -> argparse.ArgumentParser:
+        """
+        The full parser for one subcommand, built on first use.
+        """
+        with self._lock:
+            parser = self._subparsers.get(name)
+            if parser is None:
+                plan = processing.plan_cache.get(self.commands[name])
+                parser = processing.lower_plan(plan, prog=f"{self.parser.prog} {name}")
+                self._subparsers[name] = parser
+            return parser
+
+    def parse_args(
+        self,
+        args: list | None = None,
+        *,
+        fast: bool = False,
+        response_files: bool = False,
+        env_prefix: str | None = None,
+        config: os.PathLike[str] | str | None = None,
+    ) -> T:
+        """
+        Parse args for the selected subcommand and return its definition.
+
+        The keyword arguments work as they do for dykes.parse_args.
+        """
+        if args is None:
+            args = argv[1:]
+        if response_files:
+            try:
+                args = processing.expand_response_files(args)
+            except OSError as error:
+                self.parser.error(str(error))
+
+        if not args or args[0] not in self.commands:
+            # No usable command: argparse reports the problem or prints help.
+            self.parser.parse_args(args)
+            self.parser.error("the command must be the first argument")
+
+        name = args[0]
+        settings = internal.ParseSettings(
+            fast=fast, env_prefix=env_prefix, config=config
+        )
+        return processing.parse(
+            self.commands[name],
+            args[1:],
+            lambda definition: self.subparser(name),
+            settings,
+        )
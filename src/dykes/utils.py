@@ -1,3 +1,5 @@
+import collections.abc
+import enum
 import typing
 
 from . import internal, options
@@ -14,11 +16,14 @@ def get_origin(t: type) -> type:
     if result is None:
         return t
     elif result is typing.Annotated:
-        if isinstance(t, internal.HasOrigin) and isinstance(
-            t.__origin__,
-            (type, typing.GenericAlias),  # type:ignore
-        ):  # Make mypy happy.
-            return get_origin(t.__origin__)
+        # A plain getattr: isinstance against a runtime checkable protocol
+        # costs more than the rest of compiling a field.
+        inner = getattr(t, "__origin__", None)
+        if isinstance(
+            inner,
+            (type, typing.GenericAlias, typing._GenericAlias),  # type:ignore
+        ):
+            return get_origin(typing.cast(type, inner))
         else:
             raise ValueError(
                 "Annotated without a type or annotations. Please subscript Annotated."
@@ -42,9 +47,49 @@ def get_field_type(cls: type) -> type:
         elif len(type_args) == 0:
             return str
         else:
-            return type_args[0]
+            return as_choices(type_args[0])
+    elif origin in (set, frozenset, tuple):
+        if type(cls) is typing._AnnotatedAlias:  # type:ignore
+            cls = typing.get_args(cls)[0]
+        type_args = tuple(arg for arg in typing.get_args(cls) if arg is not ...)
+        if len(set(type_args)) > 1:
+            raise ValueError(
+                f"dykes does not support {origin.__name__}s with multiple type values. Use {origin.__name__}[T] or tuple[T, ...]."
+            )
+        return as_choices(type_args[0]) if type_args else str
+    elif origin in (collections.abc.Iterator, collections.abc.Iterable):
+        if type(cls) is typing._AnnotatedAlias:  # type:ignore
+            cls = typing.get_args(cls)[0]
+        type_args = typing.get_args(cls)
+        return as_choices(type_args[0]) if type_args else str
+    elif type(cls) is typing._AnnotatedAlias:  # type:ignore
+        return get_field_type(typing.get_args(cls)[0])
     else:
-        return cls
+        return as_choices(cls)
+
+
+def tuple_length(cls: type) -> int | None:
+    """
+    The number of values a fixed-length tuple hint such as tuple[int, int]
+    holds, or None for tuple[T, ...] and bare tuple.
+    """
+    if type(cls) is typing._AnnotatedAlias:  # type:ignore
+        cls = typing.get_args(cls)[0]
+    type_args = typing.get_args(cls)
+    if not type_args or ... in type_args:
+        return None
+    return len(type_args)
+
+
+def as_choices(cls: typing.Any) -> typing.Any:
+    """
+    Literal and Enum types become Choices; anything else is returned as is.
+    """
+    if typing.get_origin(cls) is typing.Literal:
+        return internal.Choices(typing.get_args(cls))
+    elif isinstance(cls, type) and issubclass(cls, enum.Enum):
+        return internal.Choices(cls)
+    return cls
 
 
 def get_meta_args[FieldType](
@@ -60,6 +105,8 @@ def get_meta_args[FieldType](
                 parameter_options.nargs = datum.value
             elif is_instance_unique(datum, options.Flags, parameter_options):
                 parameter_options.flags = datum.value
+            elif is_instance_unique(datum, options.Bulk, parameter_options):
+                parameter_options.bulk = datum
 
     return parameter_options
 
@@ -68,11 +115,14 @@ type_map = {
     options.Action: "action",
     options.NArgs: "nargs",
     options.Flags: "flags",
+    options.Bulk: "bulk",
     str: "help",
 }
 
 
-def is_instance_unique[T: (str, options.Action, options.NArgs, options.Flags)](
+def is_instance_unique[
+    T: (str, options.Action, options.NArgs, options.Flags, options.Bulk)
+](
     value: typing.Any, check_type: type[T], parameter_options: internal.ParameterOptions
 ) -> typing.TypeGuard[T]:
     if not isinstance(value, check_type):
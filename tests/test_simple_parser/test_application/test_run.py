@@ -0,0 +1,59 @@
+import dataclasses
+import typing
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import application
+
+
+@dataclasses.dataclass
+class Greet:
+    """Greet someone."""
+
+    name: str
+    shout: bool
+
+    def __call__(self) -> str:
+        greeting = f"Hello, {self.name}!"
+        return greeting.upper() if self.shout else greeting
+
+
+class Add(typing.NamedTuple):
+    numbers: Annotated[list[int], dykes.options.NArgs("+")]
+
+    def __call__(self) -> int:
+        return sum(self.numbers)
+
+
+@dataclasses.dataclass
+class NotCallable:
+    name: str
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_run_calls_the_instance(fast):
+    assert dykes.run(Greet, args=["Ada"], fast=fast) == "Hello, Ada!"
+    assert dykes.run(Greet, args=["Ada", "-s"], fast=fast) == "HELLO, ADA!"
+    assert dykes.run(Add, args=["1", "2", "3"], fast=fast) == 6
+
+
+def test_run_needs_call():
+    with pytest.raises(ValueError, match="NotCallable has no __call__"):
+        dykes.run(NotCallable, args=["x"])
+
+
+def test_run_exits_on_bad_arguments(capsys):
+    with pytest.raises(SystemExit) as error:
+        dykes.run(Add, args=["one"])
+
+    assert error.value.code == 2
+    assert "invalid int value" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "code, status", ((None, 0), (0, 0), (3, 3), (256 + 4, 4), ("failed", 1))
+)
+def test_exit_status(code, status):
+    assert application.exit_status(code) == status
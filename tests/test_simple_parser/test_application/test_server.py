@@ -0,0 +1,147 @@
+import dataclasses
+import os
+import pathlib
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+import dykes
+from dykes import application, client
+
+SOURCE_ROOT = pathlib.Path(dykes.__file__).parents[1]
+
+APPLICATION = textwrap.dedent(
+    """
+    import dataclasses
+    import os
+    import sys
+    import typing
+
+    import dykes
+
+    IMPORTED_IN = os.getpid()
+
+
+    @dataclasses.dataclass
+    class Echo:
+        \"\"\"Echo stdin, with some facts about the process.\"\"\"
+
+        prefix: str
+        fail: typing.Annotated[int, dykes.options.Flags("--fail")] = 0
+
+        def __call__(self) -> int:
+            for line in sys.stdin:
+                print(self.prefix + line.rstrip("\\n"))
+            print(f"cwd={os.getcwd()}")
+            print(f"env={os.environ.get('ECHO_SETTING')}")
+            print(f"warm={IMPORTED_IN == os.getppid()}")
+            print("to stderr", file=sys.stderr)
+            return self.fail
+    """
+)
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "echo_application.py").write_text(APPLICATION)
+    path = tmp_path / "echo.sock"
+    code = (
+        f"import sys; sys.path.insert(0, {str(tmp_path)!r})\n"
+        "import echo_application\n"
+        "from dykes import application, processing\n"
+        # A parser cached under another name must not leak into prog.
+        "processing.parser_cache.get(echo_application.Echo)\n"
+        f"application.serve(echo_application.Echo, {str(path)!r}, prog='echo')\n"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        env={**os.environ, "PYTHONPATH": str(SOURCE_ROOT)},
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while not path.exists():
+            assert process.poll() is None, "the server exited"
+            assert time.monotonic() < deadline, "the server did not start"
+            time.sleep(0.01)
+        yield path
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def _call(path, args, stdin=b""):
+    with (
+        open(path.parent / "in", "w+b") as stdin_file,
+        open(path.parent / "out", "w+b") as stdout,
+        open(path.parent / "err", "w+b") as stderr,
+    ):
+        stdin_file.write(stdin)
+        stdin_file.seek(0)
+        status = client.call(
+            path, args, (stdin_file.fileno(), stdout.fileno(), stderr.fileno())
+        )
+        stdout.seek(0)
+        stderr.seek(0)
+        return status, stdout.read().decode(), stderr.read().decode()
+
+
+def test_requests_run_in_the_warm_process(server, tmp_path, monkeypatch):
+    work = tmp_path / "work"
+    work.mkdir()
+    monkeypatch.chdir(work)
+    monkeypatch.setenv("ECHO_SETTING", "forwarded")
+
+    status, out, err = _call(server, [">> "], b"one\ntwo\n")
+
+    assert status == 0
+    assert out.splitlines() == [
+        ">> one",
+        ">> two",
+        f"cwd={work}",
+        "env=forwarded",
+        "warm=True",
+    ]
+    assert err == "to stderr\n"
+
+
+def test_exit_status_and_errors_are_forwarded(server):
+    assert _call(server, ["x", "--fail", "3"])[0] == 3
+
+    status, out, err = _call(server, ["x", "--fail", "three"])
+
+    assert status == 2
+    assert out == ""
+    assert err.startswith("usage: echo [-h] [--fail FAIL] prefix")
+
+
+def test_help_is_forwarded(server):
+    status, out, _ = _call(server, ["--help"])
+
+    assert status == 0
+    assert "Echo stdin, with some facts about the process." in out
+
+
+def test_repeat_requests(server):
+    for index in range(5):
+        assert _call(server, [str(index)], b"line\n")[1].startswith(f"{index}line\n")
+
+
+def test_socket_is_private(server):
+    assert server.stat().st_mode & 0o077 == 0
+
+
+def test_other_files_are_not_replaced(tmp_path):
+    @dataclasses.dataclass
+    class Noop:
+        def __call__(self) -> None:
+            pass
+
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me")
+
+    with pytest.raises(FileExistsError):
+        application.serve(Noop, path)
+    assert path.read_text() == "keep me"
@@ -0,0 +1,102 @@
+import dataclasses
+import gc
+
+import pytest
+
+import dykes
+from dykes import cache, processing
+
+
+def _make_definition(name="Application"):
+    @dataclasses.dataclass
+    class Application:
+        dry_run: bool
+
+    Application.__name__ = name
+    return Application
+
+
+def test_get_builds_once():
+    calls = []
+
+    def builder(definition):
+        calls.append(definition)
+        return object()
+
+    definitions = cache.DefinitionCache(builder)
+    Application = _make_definition()
+
+    first = definitions.get(Application)
+    second = definitions.get(Application)
+
+    assert first is second
+    assert calls == [Application]
+
+
+def test_maxsize_evicts_least_recently_used():
+    definitions = cache.DefinitionCache(lambda definition: object(), maxsize=2)
+    first, second, third = (_make_definition(str(i)) for i in range(3))
+
+    definitions.get(first)
+    definitions.get(second)
+    definitions.get(first)
+    definitions.get(third)
+
+    assert first in definitions
+    assert second not in definitions
+    assert third in definitions
+
+
+def test_maxsize_must_be_positive():
+    with pytest.raises(ValueError):
+        cache.DefinitionCache(lambda definition: None, maxsize=0)
+
+
+def test_definitions_are_weakly_held():
+    definitions = cache.DefinitionCache(lambda definition: object())
+    definitions.get(_make_definition())
+    gc.collect()
+
+    assert len(definitions) == 0
+
+
+def test_invalidate_single_definition():
+    definitions = cache.DefinitionCache(lambda definition: object())
+    first, second = _make_definition("first"), _make_definition("second")
+    definitions.get(first)
+    definitions.get(second)
+
+    definitions.invalidate(first)
+
+    assert first not in definitions
+    assert second in definitions
+
+
+def test_invalidate_everything():
+    definitions = cache.DefinitionCache(lambda definition: object())
+    definitions.get(_make_definition("first"))
+    definitions.get(_make_definition("second"))
+
+    definitions.invalidate()
+
+    assert len(definitions) == 0
+
+
+def test_parse_args_reuses_parser():
+    Application = _make_definition()
+
+    dykes.parse_args(Application, args=[])
+    parser = processing.parser_cache.get(Application)
+    args = dykes.parse_args(Application, args=["-d"])
+
+    assert args.dry_run is True
+    assert processing.parser_cache.get(Application) is parser
+
+
+def test_clear_cache_rebuilds_parser():
+    Application = _make_definition()
+    parser = processing.parser_cache.get(Application)
+
+    dykes.clear_cache(Application)
+
+    assert processing.parser_cache.get(Application) is not parser
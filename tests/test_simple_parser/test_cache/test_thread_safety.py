@@ -0,0 +1,174 @@
+import concurrent.futures
+import dataclasses
+import threading
+import typing
+
+import pytest
+
+import dykes
+from dykes import cache, processing
+
+THREADS = 32
+PARSES_PER_THREAD = 50
+
+
+def _make_definitions(count):
+    definitions = []
+    for index in range(count):
+
+        @dataclasses.dataclass
+        class Application:
+            paths: list[str]
+            count: typing.Annotated[int, dykes.options.Flags("-c", "--count")] = 1
+            dry_run: bool = False
+
+        Application.__name__ = f"Application{index}"
+        definitions.append(Application)
+    return definitions
+
+
+def test_builder_runs_once_under_contention():
+    calls = []
+    release = threading.Event()
+
+    def builder(definition):
+        calls.append(definition)
+        release.wait()
+        return object()
+
+    definitions = cache.DefinitionCache(builder)
+    (Application,) = _make_definitions(1)
+
+    with concurrent.futures.ThreadPoolExecutor(THREADS) as executor:
+        futures = [
+            executor.submit(definitions.get, Application) for _ in range(THREADS)
+        ]
+        release.set()
+        results = {id(future.result()) for future in futures}
+
+    assert calls == [Application]
+    assert len(results) == 1
+
+
+def test_build_error_reaches_waiters_and_is_not_cached():
+    started = threading.Event()
+    release = threading.Event()
+    attempts = []
+
+    def builder(definition):
+        attempts.append(definition)
+        if len(attempts) == 1:
+            started.set()
+            release.wait()
+            raise KeyError("broken")
+        return "built"
+
+    definitions = cache.DefinitionCache(builder)
+    (Application,) = _make_definitions(1)
+
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        first = executor.submit(definitions.get, Application)
+        started.wait()
+        second = executor.submit(definitions.get, Application)
+        release.set()
+        with pytest.raises(KeyError):
+            first.result()
+        with pytest.raises(KeyError):
+            second.result()
+
+    assert Application not in definitions
+    assert definitions.get(Application) == "built"
+
+
+def test_reentrant_build_raises():
+    definitions: cache.DefinitionCache = cache.DefinitionCache(
+        lambda definition: definitions.get(definition)
+    )
+    (Application,) = _make_definitions(1)
+
+    with pytest.raises(RecursionError):
+        definitions.get(Application)
+
+
+def test_registry_invalidates_every_cache():
+    registry = cache.Registry()
+    first = registry.cache(lambda definition: object())
+    second = registry.cache(lambda definition: object())
+    (Application,) = _make_definitions(1)
+    first.get(Application)
+    second.get(Application)
+
+    registry.invalidate(Application)
+
+    assert Application not in first
+    assert Application not in second
+
+
+def test_registry_resize():
+    registry = cache.Registry(maxsize=4)
+    definitions = registry.cache(lambda definition: object())
+
+    registry.resize(1)
+    for definition in _make_definitions(3):
+        definitions.get(definition)
+
+    assert definitions.maxsize == 1
+    assert len(definitions) == 1
+    with pytest.raises(ValueError):
+        registry.resize(0)
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_concurrent_parses_compile_each_definition_once(monkeypatch, fast):
+    definitions = _make_definitions(4)
+    compiled = []
+    compile_plan = processing.compile_plan
+
+    def counting_compile_plan(definition):
+        compiled.append(definition)
+        return compile_plan(definition)
+
+    monkeypatch.setattr(processing, "compile_plan", counting_compile_plan)
+    barrier = threading.Barrier(THREADS)
+
+    def work(thread_index):
+        barrier.wait()
+        results = []
+        for parse_index in range(PARSES_PER_THREAD):
+            definition = definitions[(thread_index + parse_index) % len(definitions)]
+            args = ["a", "b", "-c", str(parse_index)]
+            results.append(
+                (
+                    definition,
+                    parse_index,
+                    dykes.parse_args(definition, args=args, fast=fast),
+                )
+            )
+        return results
+
+    with concurrent.futures.ThreadPoolExecutor(THREADS) as executor:
+        results = [
+            item
+            for future in [executor.submit(work, index) for index in range(THREADS)]
+            for item in future.result()
+        ]
+
+    assert sorted(compiled, key=id) == sorted(definitions, key=id)
+    assert len(results) == THREADS * PARSES_PER_THREAD
+    for definition, parse_index, parsed in results:
+        assert type(parsed) is definition
+        assert parsed.paths == ["a", "b"]
+        assert parsed.count == parse_index
+
+
+def test_parsing_leaves_shared_parser_unchanged():
+    (Application,) = _make_definitions(1)
+    parser = processing.parser_cache.get(Application)
+    before = [vars(action).copy() for action in parser._actions]
+    defaults = dict(parser._defaults)
+
+    dykes.parse_args(Application, args=["a", "-c", "3", "-d"])
+    dykes.parse_args(Application, args=["b"])
+
+    assert [vars(action) for action in parser._actions] == before
+    assert parser._defaults == defaults
@@ -0,0 +1,170 @@
+import dataclasses
+import pathlib
+import shutil
+import subprocess
+import typing
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import completion
+
+
+@dataclasses.dataclass
+class Application:
+    """Copy things around."""
+
+    source: Annotated[pathlib.Path, "Where to copy from."]
+    dry_run: bool
+    verbosity: dykes.Count
+    target: Annotated[pathlib.Path, dykes.options.Flags("-t", "--target")] = (
+        pathlib.Path(".")
+    )
+    name: Annotated[str, dykes.options.Flags("--name"), "A [short] name: 'x'."] = "x"
+
+
+@dataclasses.dataclass
+class Inputs:
+    lines: typing.Iterator[str]
+    sizes: Annotated[list[int], dykes.options.Flags("--sizes")]
+    paths: Annotated[
+        list[pathlib.Path], dykes.options.Flags("--paths"), dykes.options.Bulk(tuple)
+    ]
+
+
+def test_completions_classify_arguments():
+    items = {
+        item.dest: item
+        for item in completion.completions(dykes.compile_plan(Application))
+    }
+
+    assert items["help"].flags == ("-h", "--help")
+    assert items["source"].value == "file"
+    assert items["dry_run"].value == "none"
+    assert items["verbosity"].repeatable
+    assert items["target"].value == "file"
+    assert items["name"].value == "any"
+
+
+def test_streams_and_bulk_paths_complete_files():
+    items = {
+        item.dest: item for item in completion.completions(dykes.compile_plan(Inputs))
+    }
+
+    assert items["lines"].value == "file"
+    assert items["sizes"].value == "any"
+    assert items["sizes"].repeatable
+    assert items["paths"].value == "file"
+
+
+def test_scripts_are_cached():
+    first = completion.completion_script(Application, "bash", prog="copy")
+
+    assert completion.completion_script(Application, "bash", prog="copy") is first
+    assert completion.completion_script(Application, "bash", prog="other") != first
+
+
+def test_unknown_shell_raises():
+    with pytest.raises(ValueError):
+        completion.completion_script(Application, "tcsh", prog="copy")
+
+
+def _bash_complete(script: str, words: list[str], cwd: pathlib.Path) -> list[str]:
+    line = " ".join(f"'{word}'" for word in words)
+    program = (
+        f"{script}\n"
+        f"COMP_WORDS=({line}); COMP_CWORD={len(words) - 1}\n"
+        "_copy_complete 2>/dev/null\n"
+        'printf "%s\\n" "${COMPREPLY[@]}"\n'
+    )
+    result = subprocess.run(
+        ["bash", "-c", program], capture_output=True, text=True, cwd=cwd, check=True
+    )
+    return result.stdout.split()
+
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason="bash is not installed")
+def test_bash_script_completes_without_python(tmp_path):
+    (tmp_path / "notes.txt").write_text("")
+    script = completion.completion_script(Application, "bash", prog="copy")
+
+    assert subprocess.run(["bash", "-n"], input=script, text=True).returncode == 0
+    assert _bash_complete(script, ["copy", "--d"], tmp_path) == ["--dry-run"]
+    assert _bash_complete(script, ["copy", "-t", "no"], tmp_path) == ["notes.txt"]
+    assert _bash_complete(script, ["copy", "--name", ""], tmp_path) == []
+    assert _bash_complete(script, ["copy", "no"], tmp_path) == ["notes.txt"]
+
+
+def test_zsh_script():
+    script = completion.completion_script(Application, "zsh", prog="copy")
+
+    assert script.startswith("#compdef copy\n")
+    assert "'1:source:_files'" in script
+    assert "'(-d --dry-run)'{-d,--dry-run}'[]'" in script
+    assert "'*'{-v,--verbosity}'[]'" in script
+    assert "'(-t --target)'{-t,--target}'[]:target:_files'" in script
+    assert "'(--name)'--name'[A \\[short\\] name\\: '\\''x'\\''.]:name: '" in script
+
+
+def test_fish_script():
+    script = completion.completion_script(Application, "fish", prog="copy")
+    lines = script.splitlines()
+
+    assert "complete -c copy -s d -l dry-run" in lines
+    assert "complete -c copy -s t -l target -r -F" in lines
+    assert "complete -c copy -l name -x -d 'A [short] name: \\'x\\'.'" in lines
+    assert "complete -c copy -f" not in lines
+
+
+def test_complete_flags_and_values(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "a.csv").write_text("")
+    (tmp_path / ".hidden").write_text("")
+
+    assert completion.complete(Application, ["--ver"]) == ["--verbosity"]
+    assert completion.complete(Application, ["-t", "d"]) == ["data/"]
+    assert completion.complete(Application, ["-t", "data/"]) == ["data/a.csv"]
+    assert completion.complete(Application, ["--name", ""]) == []
+    assert completion.complete(Application, [""]) == ["data/"]
+    assert completion.complete(Application, ["."]) == [".hidden"]
+
+
+def test_handle_prints_candidates_without_constructing(capsys):
+    @dataclasses.dataclass
+    class Guarded:
+        dry_run: bool
+
+        def __post_init__(self):
+            raise AssertionError("constructed")
+
+    with pytest.raises(SystemExit) as exit_info:
+        completion.handle(Guarded, ["__complete", "--d"])
+
+    assert exit_info.value.code == 0
+    assert capsys.readouterr().out == "--dry-run\n"
+
+
+def test_handle_ignores_other_arguments():
+    assert completion.handle(Application, ["source.txt"]) is None
+
+
+@dataclasses.dataclass
+class Paint:
+    finish: typing.Literal["matte", "gloss"]
+    coats: Annotated[typing.Literal[1, 2], dykes.options.Flags("--coats")] = 1
+
+
+def test_choices_complete_their_values():
+    assert completion.complete(Paint, ["--coats", ""]) == ["1", "2"]
+    assert completion.complete(Paint, ["g"]) == ["gloss"]
+    assert '--coats)\n            COMPREPLY=($(compgen -W "1 2"' in (
+        completion.completion_script(Paint, "bash", prog="paint")
+    )
+    assert "'1:finish:(matte gloss)'" in completion.completion_script(
+        Paint, "zsh", prog="paint"
+    )
+    assert "complete -c paint -l coats -x -a '1 2'" in completion.completion_script(
+        Paint, "fish", prog="paint"
+    )
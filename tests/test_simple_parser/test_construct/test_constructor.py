@@ -0,0 +1,135 @@
+import dataclasses
+import gc
+import typing
+import weakref
+
+import dykes
+from dykes import construct, processing
+
+
+def _constructor(definition):
+    constructor = construct.build_constructor(
+        definition, processing.compile_plan(definition)
+    )
+    return lambda values: constructor(definition, values)
+
+
+class Point(typing.NamedTuple):
+    x: int
+    y: typing.Annotated[int, dykes.options.NArgs("?")] = 0
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class Frozen:
+    path: str
+    count: typing.Annotated[int, dykes.options.Flags("-c")] = 1
+
+
+@dataclasses.dataclass
+class KeywordOnly:
+    path: str
+    verbose: bool = dataclasses.field(default=False, kw_only=True)
+
+
+@dataclasses.dataclass
+class Single:
+    path: str
+
+
+@dataclasses.dataclass
+class Empty:
+    pass
+
+
+def test_named_tuple_uses_make(monkeypatch):
+    made = []
+    make = Point._make
+    monkeypatch.setattr(
+        Point,
+        "_make",
+        classmethod(lambda cls, values: made.append(values) or make(values)),
+    )
+
+    point = _constructor(Point)({"y": 2, "x": 1})
+
+    assert point == Point(1, 2)
+    assert made == [(1, 2)]
+
+
+def test_slots_frozen_dataclass():
+    instance = _constructor(Frozen)({"count": 3, "path": "a"})
+
+    assert instance == Frozen("a", 3)
+
+
+def test_keyword_only_fields_fall_back_to_keywords():
+    instance = _constructor(KeywordOnly)({"path": "a", "verbose": True})
+
+    assert instance == KeywordOnly("a", verbose=True)
+
+
+@dataclasses.dataclass(init=False)
+class HandWritten:
+    name: str
+    size: int
+
+    def __init__(self, size, name):
+        self.name = name
+        self.size = size
+
+
+class Scaled(Point):
+    def __new__(cls, x, y=0):
+        return super().__new__(cls, x * 10, y)
+
+
+def test_hand_written_init_falls_back_to_keywords():
+    instance = _constructor(HandWritten)({"name": "x", "size": 3})
+
+    assert (instance.name, instance.size) == ("x", 3)
+
+
+def test_overridden_new_falls_back_to_keywords():
+    assert _constructor(Scaled)({"x": 2, "y": 1}) == (20, 1)
+    assert dykes.parse_args(Scaled, args=["2"], fast=True) == (20, 0)
+
+
+def test_single_and_empty_definitions():
+    assert _constructor(Single)({"path": "a"}) == Single("a")
+    assert _constructor(Empty)({}) == Empty()
+
+
+def test_post_init_still_runs():
+    @dataclasses.dataclass
+    class Checked:
+        path: str
+
+        def __post_init__(self):
+            self.path = self.path.upper()
+
+    assert dykes.parse_args(Checked, args=["a"]).path == "A"
+
+
+def test_parse_args_builds_through_cached_constructor():
+    for fast in (False, True):
+        assert dykes.parse_args(Frozen, args=["a", "-c", "2"], fast=fast) == Frozen(
+            "a", 2
+        )
+        assert dykes.parse_args(Point, args=["1", "2"], fast=fast) == Point(1, 2)
+
+    assert Frozen in processing.constructor_cache
+
+
+def test_cached_constructors_do_not_keep_definitions_alive():
+    for kind in ("dataclass", "namedtuple"):
+        if kind == "dataclass":
+            Transient = dataclasses.make_dataclass("Transient", [("path", str)])
+        else:
+            Transient = typing.NamedTuple("Transient", [("path", str)])
+        for fast in (False, True):
+            assert dykes.parse_args(Transient, args=["a"], fast=fast).path == "a"
+        reference = weakref.ref(Transient)
+        del Transient
+        gc.collect()
+
+        assert reference() is None
@@ -0,0 +1,113 @@
+import dataclasses
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import fastpath
+
+VERBOSE = dykes.options.Flags("--verbose", "--loud")
+
+
+@dataclasses.dataclass
+class Application:
+    verbose: Annotated[bool, VERBOSE]
+    version: Annotated[bool, dykes.options.Flags("--version-check")]
+    number: Annotated[int, dykes.options.Flags("--number")] = 1
+    name: Annotated[str, dykes.options.Flags("--name")] = "anonymous"
+
+
+@dataclasses.dataclass
+class Server:
+    host: Annotated[str, dykes.options.Flags("--host")] = "localhost"
+    hello: Annotated[str, dykes.options.Flags("--hello")] = "hi"
+
+
+def _matcher(definition=Application):
+    matcher = fastpath.build_matcher(dykes.compile_plan(definition))
+    assert matcher is not None
+    return matcher
+
+
+@pytest.mark.white_box
+@pytest.mark.parametrize(
+    "flag, dest",
+    [
+        ("--verbose", "verbose"),
+        ("--verb", "verbose"),
+        ("--lo", "verbose"),
+        ("--version", "version"),
+        ("--nu", "number"),
+        ("--na", "name"),
+        ("--ver", None),
+        ("--n", None),
+        ("--", None),
+        ("--missing", None),
+    ],
+)
+def test_lookup_long(flag, dest):
+    argument = fastpath.lookup_long(_matcher(), flag)
+
+    assert (argument.dest if argument else None) == dest
+
+
+@pytest.mark.white_box
+@pytest.mark.parametrize(
+    "flag, dest",
+    [("--ho", "host"), ("--hell", "hello"), ("--he", None), ("--hel", None)],
+)
+def test_lookup_long_knows_help(flag, dest):
+    argument = fastpath.lookup_long(_matcher(Server), flag)
+
+    assert (argument.dest if argument else None) == dest
+
+
+@pytest.mark.white_box
+def test_help_abbreviations_fall_back():
+    with pytest.raises(fastpath.Fallback):
+        fastpath.lookup_long(_matcher(Server), "--help")
+    with pytest.raises(fastpath.Fallback):
+        fastpath.lookup_long(_matcher(), "--he")
+
+
+@pytest.mark.white_box
+def test_long_flags_are_sorted():
+    matcher = _matcher()
+
+    assert list(matcher.long_flags) == sorted(matcher.long_flags)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--verb"],
+        ["--nu", "4", "--na=bob"],
+        ["--lo", "--version"],
+        ["--ver"],
+        ["--n", "3"],
+        ["--nu="],
+        ["--", "--nu"],
+    ],
+)
+def test_abbreviations_match_argparse(capsys, args):
+    _assert_same(capsys, Application, args)
+
+
+@pytest.mark.parametrize(
+    "args", [["--he", "x"], ["--hel", "x"], ["--hell", "x"], ["--help"], ["--h"]]
+)
+def test_help_abbreviations_match_argparse(capsys, args):
+    _assert_same(capsys, Server, args)
+
+
+def _assert_same(capsys, definition, args):
+    def run(fast):
+        dykes.clear_cache(definition)
+        try:
+            result = dykes.parse_args(definition, args=args, fast=fast)
+        except SystemExit as exit_info:
+            result = ("exit", exit_info.code)
+        output = capsys.readouterr()
+        return result, output.out, output.err
+
+    assert run(fast=True) == run(fast=False)
@@ -0,0 +1,134 @@
+"""
+The fast path must be indistinguishable from the argparse path.
+"""
+
+import dataclasses
+import pathlib
+from typing import Annotated, NamedTuple
+
+import pytest
+
+import dykes
+from dykes import fastpath, processing
+
+
+@dataclasses.dataclass
+class Application:
+    """A sample application."""
+
+    path: Annotated[pathlib.Path, "The path to operate on."]
+    dry_run: bool
+    prompt: dykes.StoreFalse
+    verbosity: dykes.Count
+
+
+@dataclasses.dataclass
+class Lists:
+    paths: list[pathlib.Path]
+    numbers: Annotated[list[int], dykes.options.Flags("-n", "--numbers")]
+    tags: Annotated[
+        list[str], dykes.options.Flags("--tags"), dykes.options.NArgs("*")
+    ] = dataclasses.field(default_factory=list)
+
+
+@dataclasses.dataclass
+class Optionals:
+    name: Annotated[str, dykes.options.NArgs("?")] = "anonymous"
+    level: Annotated[int, dykes.Action.STORE] = 3
+    quiet: dykes.StoreTrue = False
+
+
+class Pair(NamedTuple):
+    first: int
+    second: Annotated[str, dykes.options.NArgs(2)]
+    force: bool
+
+
+DEFINITIONS_AND_ARGS = [
+    (Application, ["file.txt"]),
+    (Application, ["file.txt", "-d"]),
+    (Application, ["-d", "file.txt"]),
+    (Application, ["--dry-run", "-p", "file.txt", "-vvv"]),
+    (Application, ["-dv", "file.txt", "--verbosity"]),
+    (Application, ["--prompt", "--", "file.txt"]),
+    (Application, ["--dry", "file.txt"]),
+    (Application, []),
+    (Application, ["a", "b"]),
+    (Application, ["a", "-x"]),
+    (Application, ["a", "-d", "b"]),
+    (Application, ["-h"]),
+    (Application, ["--help"]),
+    (Application, ["-"]),
+    (Lists, ["a", "b", "-n", "1", "2"]),
+    (Lists, ["-n", "1", "2", "--tags", "x", "y", "--", "a"]),
+    (Lists, ["a", "--numbers", "3", "--tags"]),
+    (Lists, ["a", "-n", "one"]),
+    (Lists, ["a", "-n"]),
+    (Lists, ["-n", "1", "a"]),
+    (Lists, ["a", "--numbers=4"]),
+    (Optionals, []),
+    (Optionals, ["bob"]),
+    (Optionals, ["bob", "--level", "5", "-q"]),
+    (Optionals, ["--level=7"]),
+    (Optionals, ["-l", "7", "bob"]),
+    (Optionals, ["-q", "-l"]),
+    (Optionals, ["--level", "seven"]),
+    (Optionals, ["-l", "-1"]),
+    (Pair, ["1", "a", "b"]),
+    (Pair, ["1", "a", "b", "-f"]),
+    (Pair, ["1", "a"]),
+    (Pair, ["x", "a", "b"]),
+    (Pair, ["1", "a", "b", "c"]),
+]
+
+HANDLED = [
+    (Application, ["file.txt"]),
+    (Application, ["-d", "file.txt"]),
+    (Application, ["--dry-run", "-p", "file.txt", "-vvv"]),
+    (Application, ["-dv", "file.txt", "--verbosity"]),
+    (Lists, ["a", "b", "-n", "1", "2"]),
+    (Lists, ["a", "--numbers", "3", "--tags"]),
+    (Optionals, []),
+    (Optionals, ["bob", "--level", "5", "-q"]),
+    (Optionals, ["--level=7"]),
+    (Pair, ["1", "a", "b", "-f"]),
+]
+
+
+def _run(capsys, definition, args, fast):
+    dykes.clear_cache(definition)
+    try:
+        result = dykes.parse_args(definition, args=args, fast=fast)
+    except SystemExit as exit_info:
+        result = ("exit", exit_info.code)
+    output = capsys.readouterr()
+    return result, output.out, output.err
+
+
+@pytest.mark.parametrize("definition, args", DEFINITIONS_AND_ARGS)
+def test_fast_path_matches_argparse(capsys, definition, args):
+    expected = _run(capsys, definition, args, fast=False)
+    actual = _run(capsys, definition, args, fast=True)
+
+    assert actual == expected
+
+
+@pytest.mark.white_box
+@pytest.mark.parametrize("definition, args", HANDLED)
+def test_fast_path_handles_simple_args(definition, args):
+    matcher = fastpath.build_matcher(dykes.compile_plan(definition))
+    assert matcher is not None
+
+    values = fastpath.parse(matcher, args)
+
+    expected = vars(processing.build_parser(definition).parse_args(args))
+    assert values == expected
+
+
+@pytest.mark.white_box
+def test_unsupported_action_has_no_matcher():
+    @dataclasses.dataclass
+    class Application:
+        name: Annotated[str, dykes.Action.STORE_CONST, dykes.options.Flags("-n")]
+
+    assert fastpath.build_matcher(dykes.compile_plan(Application)) is None
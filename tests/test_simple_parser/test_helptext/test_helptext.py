@@ -0,0 +1,155 @@
+import argparse
+import dataclasses
+import enum
+import pathlib
+import typing
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import helptext, processing
+
+WIDTHS = [10, 30, 52, 80, 118, 200]
+
+
+class Colour(enum.Enum):
+    RED = "red"
+    GREEN = "green"
+
+
+@dataclasses.dataclass
+class Application:
+    """
+    Copy files from one place to another, keeping their permissions and
+    timestamps where the destination supports them.
+    """
+
+    source: Annotated[pathlib.Path, "Where to copy from."]
+    destinations: Annotated[
+        list[pathlib.Path], dykes.options.NArgs("+"), "Where to copy to."
+    ]
+    dry_run: Annotated[
+        bool, "Only print what would be copied, without touching anything."
+    ]
+    verbosity: dykes.Count
+    colour: Annotated[Colour, dykes.options.Flags("--colour")] = Colour.RED
+    mode: Annotated[
+        typing.Literal["copy", "link", "move"], dykes.options.Flags("-m", "--mode")
+    ] = "copy"
+    pairs: Annotated[
+        list[int], dykes.options.Flags("--pairs"), dykes.options.NArgs(2)
+    ] = dataclasses.field(default_factory=list)
+    extra: Annotated[
+        list[str], dykes.options.Flags("--extra"), dykes.options.NArgs("*")
+    ] = dataclasses.field(default_factory=list)
+    a_rather_long_option_name_that_overflows: Annotated[
+        str, dykes.options.Flags("--a-rather-long-option-name-that-overflows"), "Wraps."
+    ] = ""
+    blank: Annotated[str, dykes.options.Flags("--blank"), "   "] = ""
+
+
+@dataclasses.dataclass
+class Bare:
+    pass
+
+
+@dataclasses.dataclass
+class OnlyPositionals:
+    """%(prog)s reads names."""
+
+    names: Annotated[list[str], dykes.options.NArgs("*")]
+
+
+@dataclasses.dataclass
+class Percent:
+    rate: Annotated[float, dykes.options.Flags("--rate"), "Rate in %(type)s."] = 1.0
+
+
+def _argparse_help(definition, prog, monkeypatch, width):
+    monkeypatch.setenv("COLUMNS", str(width + 2))
+    plan = processing.compile_plan(definition)
+    return processing.lower_plan(plan, argparse.ArgumentParser, prog).format_help()
+
+
+@pytest.mark.parametrize("definition", [Application, Bare, OnlyPositionals])
+@pytest.mark.parametrize("width", WIDTHS)
+@pytest.mark.parametrize("prog", ["cp", "a-program-name-long-enough-to-move-usage"])
+def test_render_matches_argparse(monkeypatch, definition, width, prog):
+    expected = _argparse_help(definition, prog, monkeypatch, width)
+
+    rendered = helptext.render(processing.compile_plan(definition), prog, width)
+
+    assert rendered == expected
+
+
+def test_percent_help_falls_back_to_argparse(monkeypatch):
+    plan = processing.compile_plan(Percent)
+    assert helptext.render(plan, "rate", 80) is None
+
+    monkeypatch.setenv("COLUMNS", "82")
+    parser = processing.lower_plan(plan, prog="rate")
+    assert parser.format_help() == _argparse_help(Percent, "rate", monkeypatch, 80)
+    assert "Rate in float." in parser.format_help()
+
+
+def test_unknown_layout_falls_back_to_argparse(monkeypatch):
+    monkeypatch.setattr(helptext, "KNOWN_LAYOUTS", ())
+    plan = processing.compile_plan(Application)
+    assert helptext.render(plan, "cp", 80) is None
+
+    monkeypatch.setenv("COLUMNS", "82")
+    parser = processing.lower_plan(plan, prog="cp")
+    assert parser.format_help() == _argparse_help(Application, "cp", monkeypatch, 80)
+
+
+def test_help_is_cached_per_width(monkeypatch):
+    parser = processing.lower_plan(processing.compile_plan(Application), prog="cp")
+    renders = []
+    render = helptext.render
+
+    def counting_render(*args):
+        renders.append(args[2])
+        return render(*args)
+
+    monkeypatch.setattr(helptext, "render", counting_render)
+    monkeypatch.setenv("COLUMNS", "82")
+    first = parser.format_help()
+    assert parser.format_help() is first
+    monkeypatch.setenv("COLUMNS", "42")
+    narrow = parser.format_help()
+
+    assert renders == [80, 40]
+    assert narrow != first
+
+
+def test_argparse_style_is_byte_identical(monkeypatch):
+    monkeypatch.setenv(helptext.STYLE_ENVIRONMENT_VARIABLE, "argparse")
+    monkeypatch.setattr(helptext, "render", None)
+    monkeypatch.setenv("COLUMNS", "62")
+    parser = processing.lower_plan(processing.compile_plan(Application), prog="cp")
+
+    assert parser.format_help() == _argparse_help(Application, "cp", monkeypatch, 60)
+
+
+def test_help_is_cached_on_disk(monkeypatch, tmp_path):
+    monkeypatch.setenv("DYKES_SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setenv("COLUMNS", "82")
+    plan = processing.compile_plan(Application)
+    text = processing.lower_plan(plan, prog="cp").format_help()
+    (stored,) = tmp_path.glob("help-*.txt")
+    assert stored.read_text() == text
+
+    monkeypatch.setattr(helptext, "render", None)
+    assert processing.lower_plan(plan, prog="cp").format_help() == text
+
+
+def test_parse_errors_carry_rendered_help(monkeypatch):
+    monkeypatch.setenv("COLUMNS", "82")
+
+    with pytest.raises(dykes.ParseError) as error:
+        processing.raising_parser_cache.get(Application).parse_args(["-h"])
+
+    assert error.value.status == 0
+    assert error.value.output.startswith("usage: ")
+    assert "Only print what would be copied" in error.value.output
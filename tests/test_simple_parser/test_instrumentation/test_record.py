@@ -0,0 +1,156 @@
+import dataclasses
+import json
+import os
+import subprocess
+import sys
+import pathlib
+import threading
+
+import pytest
+
+import dykes
+from dykes import instrumentation
+
+
+@dataclasses.dataclass
+class Application:
+    path: str
+    dry_run: bool
+
+
+def test_record_build_and_parse_phases():
+    dykes.clear_cache(Application)
+
+    with instrumentation.record() as recorder:
+        dykes.parse_args(Application, args=["x", "-d"])
+
+    phases = recorder.as_dict()["phases"]
+    for phase in (
+        "docstring",
+        "hints",
+        "fields",
+        "meta_args",
+        "add_argument",
+        "argparse",
+        "convert",
+        "construct",
+    ):
+        assert phases[phase]["count"] >= 1
+        assert phases[phase]["total_ns"] >= phases[phase]["max_ns"] >= 0
+    assert phases["meta_args"]["count"] == 2
+
+
+def test_record_per_field_costs():
+    dykes.clear_cache(Application)
+
+    with instrumentation.record() as recorder:
+        dykes.parse_args(Application, args=["x"])
+
+    fields = recorder.as_dict()["fields"]
+    assert set(fields) == {"Application.path", "Application.dry_run"}
+    assert fields["Application.path"]["count"] == 2
+
+
+def test_record_fast_path():
+    with instrumentation.record() as recorder:
+        dykes.parse_args(Application, args=["x"], fast=True)
+
+    phases = recorder.as_dict()["phases"]
+    assert "fastpath" in phases
+    assert "argparse" not in phases
+
+
+def test_to_json_round_trips():
+    with instrumentation.record() as recorder:
+        dykes.parse_args(Application, args=["x"])
+
+    assert json.loads(recorder.to_json()) == recorder.as_dict()
+
+
+def test_nothing_recorded_outside_block():
+    with instrumentation.record() as recorder:
+        pass
+    dykes.parse_args(Application, args=["x"])
+
+    assert recorder.as_dict() == {"phases": {}, "fields": {}}
+
+
+def test_record_ignores_other_threads():
+    inside = threading.Event()
+    leave = threading.Event()
+
+    def record_in_thread():
+        with instrumentation.record() as recorder:
+            inside.set()
+            leave.wait()
+        results.append(recorder.as_dict())
+
+    results: list[dict] = []
+    thread = threading.Thread(target=record_in_thread)
+    thread.start()
+    inside.wait()
+    with instrumentation.record() as recorder:
+        dykes.parse_args(Application, args=["x"])
+    leave.set()
+    thread.join()
+
+    assert results == [{"phases": {}, "fields": {}}]
+    assert recorder.as_dict()["phases"]["argparse"]["count"] == 1
+
+
+def test_nested_records_both_see_inner_phases():
+    with instrumentation.record() as outer:
+        with instrumentation.record() as inner:
+            dykes.parse_args(Application, args=["x"])
+        dykes.parse_args(Application, args=["y"])
+
+    assert inner.as_dict()["phases"]["argparse"]["count"] == 1
+    assert outer.as_dict()["phases"]["argparse"]["count"] == 2
+
+
+@pytest.fixture
+def process_recorder():
+    instrumentation.enable()
+    yield instrumentation._process_recorder
+    instrumentation.disable()
+    instrumentation._process_recorder.clear()
+
+
+def test_stats_summarizes_process(process_recorder):
+    dykes.parse_args(Application, args=["x"])
+    dykes.parse_args(Application, args=["y"])
+
+    assert dykes.stats()["phases"]["argparse"]["count"] == 2
+
+
+def test_process_stats_include_other_threads(process_recorder):
+    thread = threading.Thread(
+        target=dykes.parse_args, args=(Application,), kwargs={"args": ["x"]}
+    )
+    thread.start()
+    thread.join()
+
+    assert dykes.stats()["phases"]["argparse"]["count"] == 1
+
+
+def test_environment_variable_enables_stats():
+    source_root = pathlib.Path(dykes.__file__).parents[1]
+    code = (
+        "import dataclasses, dykes\n"
+        "@dataclasses.dataclass\n"
+        "class A:\n"
+        "    flag: bool\n"
+        "dykes.parse_args(A, args=['-f'])\n"
+        "print(dykes.stats()['phases']['construct']['count'])\n"
+    )
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(source_root),
+        instrumentation.ENVIRONMENT_VARIABLE: "1",
+    }
+
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env
+    )
+
+    assert result.stdout.strip() == "1"
@@ -0,0 +1,60 @@
+"""
+The benchmarks/ suite runs and compares results with a baseline.
+"""
+
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+import dykes
+
+BENCHMARKS = pathlib.Path(__file__).parents[3] / "benchmarks"
+SOURCE_ROOT = pathlib.Path(dykes.__file__).parents[1]
+
+pytestmark = pytest.mark.benchmark
+
+
+def _run(*arguments: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": str(SOURCE_ROOT)}
+    return subprocess.run(
+        [sys.executable, str(BENCHMARKS / "run.py"), "--sizes", "1", "12"]
+        + ["--repeat", "1", *arguments],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+
+
+def test_results_are_written_as_json(tmp_path):
+    output = tmp_path / "results.json"
+
+    result = _run("--output", str(output))
+
+    assert result.returncode == 0, result.stderr
+    results = json.loads(output.read_text())
+    assert sorted(results["results"]) == [
+        "dataclass-1",
+        "dataclass-12",
+        "namedtuple-1",
+        "namedtuple-12",
+    ]
+    assert {"build_parser_us", "parse_us", "help_us", "cold_parse_peak_kib"} <= set(
+        results["results"]["dataclass-12"]
+    )
+
+
+def test_regressions_fail_the_run(tmp_path):
+    output = tmp_path / "results.json"
+    assert _run("--output", str(output)).returncode == 0
+    baseline = json.loads(output.read_text())
+    baseline["results"]["dataclass-12"]["cold_parse_peak_kib"] = 0.1
+    (tmp_path / "baseline.json").write_text(json.dumps(baseline))
+
+    result = _run("--baseline", str(tmp_path / "baseline.json"), "--noise", "1")
+
+    assert result.returncode == 1
+    assert "regression: dataclass-12 cold_parse_peak_kib: 0.1 ->" in result.stderr
@@ -0,0 +1,40 @@
+"""
+Help rendering against argparse's HelpFormatter on the 500-field definition.
+"""
+
+import argparse
+
+import pytest
+
+from dykes import helptext, processing
+
+from .test_large_definition import _best_us, _large_definition
+
+pytestmark = pytest.mark.benchmark
+
+
+def _plan():
+    definition = _large_definition()
+    # make_dataclass documents the class with its 30 kB signature.
+    definition.__doc__ = "Exercise every kind of field."
+    return processing.compile_plan(definition)
+
+
+def test_render_is_faster_than_argparse():
+    plan = _plan()
+    parser = processing.lower_plan(plan, argparse.ArgumentParser, "large")
+
+    argparse_us = _best_us(parser.format_help)
+    dykes_us = _best_us(lambda: helptext.render(plan, "large", 78))
+
+    assert dykes_us < argparse_us
+
+
+def test_cached_help_is_nearly_free():
+    plan = _plan()
+    parser = processing.lower_plan(plan, prog="large")
+    cold_us = _best_us(parser.format_help, 1)
+
+    warm_us = _best_us(parser.format_help)
+
+    assert warm_us * 20 < cold_us
@@ -0,0 +1,118 @@
+"""
+Build and parse costs for a synthetic 500-field definition.
+
+Budgets can be overridden with environment variables on slow machines. The
+timed tests are marked as benchmarks and only run with ``pytest -m benchmark``.
+"""
+
+import dataclasses
+import os
+import statistics
+import time
+import typing
+
+import pytest
+
+import dykes
+from dykes import processing
+
+FIELDS = 500
+COMPILE_BUDGET_US = int(os.environ.get("DYKES_LARGE_COMPILE_BUDGET_US", 60_000))
+LOWER_BUDGET_US = int(os.environ.get("DYKES_LARGE_LOWER_BUDGET_US", 80_000))
+WARM_PARSE_BUDGET_US = int(os.environ.get("DYKES_LARGE_PARSE_BUDGET_US", 10_000))
+
+
+def _large_definition() -> type:
+    fields: list[tuple[str, typing.Any, typing.Any]] = []
+    for index in range(FIELDS):
+        kind = index % 4
+        if kind == 0:
+            flags = dykes.options.Flags(f"--flag-{index}")
+            fields.append((f"flag_{index}", typing.Annotated[bool, flags], False))
+        elif kind == 1:
+            flags = dykes.options.Flags(f"--count-{index}")
+            fields.append((f"count_{index}", typing.Annotated[int, flags], 0))
+        elif kind == 2:
+            flags = dykes.options.Flags(f"--name-{index}")
+            hint = typing.Annotated[str, flags, f"Name number {index}."]
+            fields.append((f"name_{index}", hint, ""))
+        else:
+            flags = dykes.options.Flags(f"--items-{index}")
+            hint = typing.Annotated[list[int], flags, dykes.options.NArgs("*")]
+            fields.append(
+                (f"items_{index}", hint, dataclasses.field(default_factory=list))
+            )
+    return dataclasses.make_dataclass(
+        "Large",
+        [
+            (name, hint, default)
+            if isinstance(default, dataclasses.Field)
+            else (name, hint, dataclasses.field(default=default))
+            for name, hint, default in fields
+        ],
+    )
+
+
+def _best_us(function, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        function()
+        timings.append((time.perf_counter_ns() - start) / 1_000)
+    return min(timings)
+
+
+@pytest.mark.benchmark
+def test_compile_and_lower_within_budget():
+    definition = _large_definition()
+    plan = processing.compile_plan(definition)
+    assert len(plan) == FIELDS
+
+    assert _best_us(lambda: processing.compile_plan(definition)) < COMPILE_BUDGET_US
+    assert _best_us(lambda: processing.lower_plan(plan)) < LOWER_BUDGET_US
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("fast", [False, True])
+def test_warm_parse_within_budget(fast):
+    definition = _large_definition()
+    args = ["--flag-0", "--count-1", "3", "--name-2", "x", "--items-3", "1", "2"]
+    parsed = dykes.parse_args(definition, args=args, fast=fast)
+    assert parsed.items_3 == [1, 2] and parsed.items_499 == []
+
+    warm = statistics.median(
+        _best_us(lambda: dykes.parse_args(definition, args=args, fast=fast), 1)
+        for _ in range(20)
+    )
+
+    assert warm < WARM_PARSE_BUDGET_US
+
+
+def test_flags_hash_is_precomputed():
+    flags = dykes.options.Flags("-p", "--path")
+
+    assert hash(flags) == hash(dykes.options.Flags("-p", "--path"))
+    assert flags == dykes.options.Flags("-p", "--path")
+    assert flags != dykes.options.Flags("--path")
+    with pytest.raises(AttributeError):
+        flags.extra = True
+
+
+APPEND_REPEATS = 50_000
+APPEND_BUDGET_US = int(os.environ.get("DYKES_APPEND_BUDGET_US", 1_000_000))
+
+
+@pytest.mark.benchmark
+def test_repeated_append_is_linear():
+    # argparse itself rescans every option index per option, so only the
+    # fast path can keep long runs of repeats linear.
+    @dataclasses.dataclass
+    class Tagged:
+        tags: typing.Annotated[list[str], dykes.Action.APPEND]
+
+    args = ["-t", "x"] * APPEND_REPEATS
+    dykes.parse_args(Tagged, args=args[:2], fast=True)
+
+    elapsed = _best_us(lambda: dykes.parse_args(Tagged, args=args, fast=True), 1)
+
+    assert elapsed < APPEND_BUDGET_US
@@ -0,0 +1,209 @@
+"""
+Startup cost budgets.
+
+Budgets are deliberately generous so they only trip on real regressions, and
+can be overridden with environment variables on slow machines. The timed
+tests are marked as benchmarks and only run with ``pytest -m benchmark``.
+"""
+
+import importlib.util
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+
+import pytest
+
+import dykes
+
+IMPORT_BUDGET_US = int(os.environ.get("DYKES_IMPORT_BUDGET_US", 10_000))
+COLD_PARSE_BUDGET_US = int(os.environ.get("DYKES_COLD_PARSE_BUDGET_US", 20_000))
+WARM_PARSE_BUDGET_US = int(os.environ.get("DYKES_WARM_PARSE_BUDGET_US", 1_000))
+# FIRST_PARSE took about 30 ms, compiled, before the parse caches, fast path
+# and sources were added; the budget allows half as much again.
+FIRST_PARSE_BUDGET_US = int(os.environ.get("DYKES_FIRST_PARSE_BUDGET_US", 45_000))
+
+# Modules only some parses need; a plain first parse must not import them.
+# shutil is missing because argparse imports it to build any parser.
+DEFERRED_MODULES = (
+    "concurrent.futures",
+    "dykes.fastpath",
+    "dykes.helptext",
+    "dykes.instrumentation",
+    "dykes.snapshot",
+    "dykes.sources",
+    "hashlib",
+    "json",
+    "logging",
+    "shlex",
+    "tempfile",
+    "textwrap",
+    "tomllib",
+)
+FIRST_PARSE = """
+import time
+
+start = time.perf_counter_ns()
+import dataclasses
+import sys
+
+import dykes
+
+
+@dataclasses.dataclass
+class Application:
+    name: str
+    verbosity: dykes.Count
+    dry_run: bool
+
+
+dykes.parse_args(Application, args=["x", "-vv", "-d"])
+elapsed = (time.perf_counter_ns() - start) // 1_000
+print(elapsed, *sorted(set(sys.modules) & {modules!r}))
+"""
+
+EXAMPLES = pathlib.Path(__file__).parents[3] / "examples"
+SOURCE_ROOT = pathlib.Path(dykes.__file__).parents[1]
+
+
+def _run_python(*arguments: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": str(SOURCE_ROOT)}
+    return subprocess.run(
+        [sys.executable, *arguments],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+def _import_times(module: str, preloaded: str) -> dict[str, int]:
+    """
+    Cumulative import time in microseconds per module, from -X importtime.
+
+    Modules in preloaded are imported first so they are not counted.
+    """
+    result = _run_python(
+        "-X", "importtime", "-c", f"import {preloaded}\nimport {module}"
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "statement",
+    (
+        "import dykes; dykes.Count",
+        "from dykes import StoreTrue, StoreFalse",
+        "from dykes.options import Action, NArgs, Flags",
+    ),
+)
+def test_type_aliases_do_not_import_argparse(statement):
+    result = _run_python(
+        "-c", f"{statement}\nimport sys\nprint('argparse' in sys.modules)"
+    )
+
+    assert result.stdout.strip() == "False"
+
+
+def test_lazy_attributes_resolve():
+    result = _run_python(
+        "-c", "import dykes, sys; dykes.parse_args; print('argparse' in sys.modules)"
+    )
+
+    assert result.stdout.strip() == "True"
+
+
+@pytest.mark.parametrize(
+    "attribute",
+    (
+        "instrumentation.record",
+        "completion.completion_script",
+        "application.serve",
+        "options.Flags",
+    ),
+)
+def test_submodules_resolve_after_plain_import(attribute):
+    result = _run_python("-c", f"import dykes\nprint(callable(dykes.{attribute}))")
+
+    assert result.stdout.strip() == "True"
+
+
+def test_unknown_attributes_raise_attribute_error():
+    result = _run_python(
+        "-c", "import dykes\nprint(hasattr(dykes, 'missing'), hasattr(dykes, '_x'))"
+    )
+
+    assert result.stdout.strip() == "False False"
+
+
+@pytest.mark.benchmark
+def test_import_cost_within_budget():
+    # typing and enum are needed by any definition, so only what dykes adds on
+    # top of them is budgeted.
+    times = _import_times("dykes", preloaded="typing, enum")
+
+    assert times["dykes"] < IMPORT_BUDGET_US
+
+
+def _first_parse() -> tuple[int, list[str]]:
+    result = _run_python("-c", FIRST_PARSE.format(modules=set(DEFERRED_MODULES)))
+    elapsed, *loaded = result.stdout.split()
+    return int(elapsed), loaded
+
+
+def test_first_parse_skips_deferred_modules():
+    _, loaded = _first_parse()
+
+    assert loaded == []
+
+
+@pytest.mark.benchmark
+def test_first_parse_within_budget():
+    elapsed = min(_first_parse()[0] for _ in range(3))
+
+    assert elapsed < FIRST_PARSE_BUDGET_US
+
+
+def _load_example(name: str):
+    spec = importlib.util.spec_from_file_location(
+        f"example_{name}", EXAMPLES / f"{name}.py"
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _time_us(function) -> float:
+    start = time.perf_counter_ns()
+    function()
+    return (time.perf_counter_ns() - start) / 1_000
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "example, definition, args",
+    (
+        ("basic", "WordCounterArgs", ["words.txt", "-d", "-vv"]),
+        ("example_application", "ExampleApplication", ["~", "-d", "-vv"]),
+    ),
+)
+def test_example_parse_latency_within_budget(example, definition, args):
+    application = getattr(_load_example(example), definition)
+
+    dykes.clear_cache(application)
+    cold = _time_us(lambda: dykes.parse_args(application, args=args))
+    warm = statistics.median(
+        _time_us(lambda: dykes.parse_args(application, args=args)) for _ in range(50)
+    )
+
+    assert cold < COLD_PARSE_BUDGET_US
+    assert warm < WARM_PARSE_BUDGET_US
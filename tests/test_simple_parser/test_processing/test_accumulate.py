@@ -0,0 +1,156 @@
+import argparse
+import dataclasses
+import typing
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import internal, processing
+from dykes.options import Flags, NArgs
+
+Append = dykes.Action.APPEND
+Extend = dykes.Action.EXTEND
+
+
+@dataclasses.dataclass
+class Tags:
+    tags: Annotated[list[str], Append]
+    unique: Annotated[set[str], Append, Flags("--unique")]
+    frozen: Annotated[frozenset[int], Append, Flags("--frozen")]
+    ordered: Annotated[tuple[str, ...], Append, Flags("--ordered")]
+    numbers: Annotated[list[int], Extend, Flags("--numbers")]
+
+
+class Defaults(typing.NamedTuple):
+    tags: Annotated[list[str], Append, Flags("--tag")] = ["base"]
+    pairs: Annotated[list[int], Append, NArgs(2), Flags("--pair")] = []
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_occurrences_accumulate(fast):
+    args = ["-t", "a", "--tags", "b", "--unique", "x", "--unique", "x"]
+    args += ["--frozen", "1", "--frozen", "2", "--ordered", "q", "--ordered", "p"]
+    args += ["--numbers", "1", "2", "--numbers", "3"]
+
+    parsed = dykes.parse_args(Tags, args=args, fast=fast)
+
+    assert parsed == Tags(["a", "b"], {"x"}, frozenset((1, 2)), ("q", "p"), [1, 2, 3])
+    assert type(parsed.tags) is list and type(parsed.numbers) is list
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_absent_options_collect_nothing(fast):
+    parsed = dykes.parse_args(Tags, args=[], fast=fast)
+
+    assert parsed == Tags([], set(), frozenset(), (), [])
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_default_is_copied_not_changed(fast):
+    parsed = dykes.parse_args(
+        Defaults, args=["--tag", "x", "--pair", "1", "2", "--pair", "3", "4"], fast=fast
+    )
+
+    assert parsed == Defaults(["base", "x"], [[1, 2], [3, 4]])
+    assert Defaults._field_defaults["tags"] == ["base"]
+    assert dykes.parse_args(Defaults, args=[], fast=fast) == Defaults(["base"], [])
+
+
+def test_heavy_repetition_matches_between_paths():
+    args = [arg for index in range(5_000) for arg in ("--tag", str(index % 7))]
+
+    fast = dykes.parse_args(Defaults, args=args, fast=True)
+    slow = dykes.parse_args(Defaults, args=args)
+
+    assert fast == slow
+    assert len(fast.tags) == 5_001
+
+
+def test_append_grows_one_list_in_place():
+    action = internal.AppendAction(["--tag"], "tags", default=["base"])
+    namespace = argparse.Namespace(tags=action.default)
+
+    action(None, namespace, "a")
+    first = namespace.tags
+    action(None, namespace, "b")
+
+    assert namespace.tags is first
+    assert first == ["base", "a", "b"]
+    assert action.default == ["base"]
+
+
+def test_plan_records_container():
+    plan = dykes.compile_plan(Tags)
+    arguments = {argument.dest: argument for argument in plan.arguments}
+
+    assert arguments["tags"].nargs is internal.UNSET
+    assert arguments["numbers"].nargs == "+"
+    assert arguments["unique"].container is set
+    assert arguments["tags"].flags == ("-t", "--tags")
+    assert [argument.dest for argument in plan.containers] == [
+        "tags",
+        "unique",
+        "frozen",
+        "ordered",
+        "numbers",
+    ]
+
+
+def test_command_line_replaces_environment(monkeypatch):
+    monkeypatch.setenv("APP_UNIQUE", "a b a")
+
+    assert dykes.parse_args(Tags, args=[], env_prefix="APP_").unique == {"a", "b"}
+    assert dykes.parse_args(Tags, args=["--unique", "c"], env_prefix="APP_").unique == {
+        "c"
+    }
+
+
+def test_collection_fields_without_accumulating():
+    @dataclasses.dataclass
+    class Names:
+        names: set[str]
+        sizes: Annotated[tuple[int, ...], Flags("--sizes")] = ()
+
+    parsed = dykes.parse_args(Names, args=["a", "b", "a", "--sizes", "1", "2"])
+
+    assert parsed == Names({"a", "b"}, (1, 2))
+
+
+def test_mixed_tuples_are_rejected():
+    @dataclasses.dataclass
+    class Mixed:
+        pair: Annotated[tuple[int, str], Append, Flags("--pair")]
+
+    with pytest.raises(ValueError, match="tuples with multiple type values"):
+        processing.compile_plan(Mixed)
+
+
+@dataclasses.dataclass
+class Point:
+    position: tuple[int, int]
+    size: Annotated[tuple[float, float], Flags("--size")] = (1.0, 1.0)
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_fixed_length_tuples_take_that_many_values(fast):
+    parsed = dykes.parse_args(Point, args=["3", "4", "--size", "2", "5"], fast=fast)
+
+    assert parsed == Point((3, 4), (2.0, 5.0))
+    assert dykes.compile_plan(Point).arguments[0].nargs == 2
+
+
+@pytest.mark.parametrize("args", (["3"], ["3", "4", "5"], ["3", "4", "--size", "2"]))
+@pytest.mark.parametrize("fast", (True, False))
+def test_fixed_length_tuples_reject_other_counts(args, fast):
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Point, args=args, fast=fast)
+
+
+def test_accumulating_fixed_length_tuples_are_rejected():
+    @dataclasses.dataclass
+    class Pairs:
+        pairs: Annotated[tuple[int, int], Append, Flags("--pair")]
+
+    with pytest.raises(ValueError, match="Use tuple"):
+        processing.compile_plan(Pairs)
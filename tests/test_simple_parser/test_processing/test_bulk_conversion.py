@@ -0,0 +1,118 @@
+import array
+import dataclasses
+import pathlib
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import internal
+from dykes.options import Bulk, Flags
+
+
+@pytest.mark.parametrize(
+    "element, container, tokens, expected",
+    (
+        (int, list, ["1", "2", "3"], [1, 2, 3]),
+        (float, tuple, ["1.5", "2"], (1.5, 2.0)),
+        (int, array.array, ["4", "5"], array.array("q", [4, 5])),
+        (float, array.array, ["0.5"], array.array("d", [0.5])),
+        (pathlib.Path, list, ["a", "b"], [pathlib.Path("a"), pathlib.Path("b")]),
+        (str, tuple, ["x", "y"], ("x", "y")),
+    ),
+)
+@pytest.mark.parametrize("fast", (True, False))
+def test_bulk_containers(element, container, tokens, expected, fast):
+    @dataclasses.dataclass
+    class Application:
+        values: Annotated[list[element], Bulk(container)]
+
+    args = dykes.parse_args(Application, args=tokens, fast=fast)
+
+    assert args.values == expected
+    assert type(args.values) is container
+
+
+def test_bulk_memoize_reuses_values():
+    @dataclasses.dataclass
+    class Application:
+        paths: Annotated[list[pathlib.Path], Bulk(memoize=True)]
+        names: Annotated[list[str], Bulk(memoize=True), Flags("-n")]
+
+    args = dykes.parse_args(
+        Application, args=["a", "b", "a", "-n", "left", "left"], fast=True
+    )
+
+    assert args.paths == [pathlib.Path("a"), pathlib.Path("b"), pathlib.Path("a")]
+    assert args.paths[0] is args.paths[2]
+    assert args.names[0] is args.names[1]
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_bulk_conversion_error_matches_argparse(capsys, fast):
+    @dataclasses.dataclass
+    class Bulked:
+        numbers: Annotated[list[int], Bulk()]
+
+    @dataclasses.dataclass
+    class Plain:
+        numbers: list[int]
+
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Plain, args=["1", "two"])
+    expected = capsys.readouterr().err
+
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Bulked, args=["1", "two"], fast=fast)
+
+    assert capsys.readouterr().err == expected
+
+
+def test_bulk_error_in_parse_many():
+    @dataclasses.dataclass
+    class Application:
+        numbers: Annotated[list[int], Flags("-n"), Bulk()]
+
+    (result,) = dykes.parse_many(Application, [["-n", "1", "x"]])
+
+    assert isinstance(result, dykes.ParseError)
+    assert result.message == "argument -n: invalid int value: 'x'"
+
+
+def test_bulk_keeps_default_factory_value():
+    @dataclasses.dataclass
+    class Application:
+        numbers: Annotated[list[int], dykes.options.NArgs("*"), Bulk(tuple)] = (
+            dataclasses.field(default_factory=lambda: [7])
+        )
+
+    assert dykes.parse_args(Application, args=[]).numbers == [7]
+    assert dykes.parse_args(Application, args=["1"]).numbers == (1,)
+
+
+def test_bulk_requires_list():
+    @dataclasses.dataclass
+    class Application:
+        number: Annotated[int, Bulk()]
+
+    with pytest.raises(ValueError) as err_info:
+        dykes.build_parser(Application)
+    assert str(err_info.value) == "Bulk conversion only applies to list fields."
+
+
+def test_bulk_array_requires_numbers():
+    @dataclasses.dataclass
+    class Application:
+        names: Annotated[list[str], Bulk(array.array)]
+
+    with pytest.raises(ValueError):
+        dykes.build_parser(Application)
+
+
+@pytest.mark.white_box
+def test_bulk_conversion_reports_bad_token():
+    conversion = internal.BulkConversion(int)
+
+    with pytest.raises(internal.ConversionError) as err_info:
+        conversion(["1", "2", "three", "four"])
+    assert err_info.value.args == ("three",)
@@ -0,0 +1,136 @@
+import dataclasses
+import enum
+from typing import Annotated, Literal
+
+import pytest
+
+import dykes
+from dykes import internal, snapshot
+
+
+class Color(enum.Enum):
+    RED = "r"
+    GREEN = "g"
+
+
+class Level(enum.StrEnum):
+    LOW = "low"
+    HIGH = "high"
+
+
+Region = enum.Enum("Region", [f"region_{index}" for index in range(2000)])
+
+
+@dataclasses.dataclass
+class Paint:
+    color: Color
+    finish: Annotated[Literal["matte", "gloss"], dykes.options.Flags("--finish")] = (
+        "matte"
+    )
+    coats: Annotated[list[Literal[1, 2, 3]], dykes.options.Flags("--coats")] = (
+        dataclasses.field(default_factory=list)
+    )
+
+
+@dataclasses.dataclass
+class Tuned:
+    action: Annotated[dykes.Action, dykes.options.Flags("--action")]
+    level: Annotated[Level, dykes.options.Flags("--level")] = Level.LOW
+
+
+@dataclasses.dataclass
+class Deploy:
+    region: Annotated[Region, dykes.options.Flags("--region")]
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_enum_and_literal_values(fast):
+    args = dykes.parse_args(
+        Paint, args=["GREEN", "--finish", "gloss", "--coats", "1", "3"], fast=fast
+    )
+
+    assert args == Paint(Color.GREEN, "gloss", [1, 3])
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_string_default_goes_through_choices(fast):
+    assert dykes.parse_args(Paint, args=["RED"], fast=fast).finish == "matte"
+
+
+def test_compiled_type_is_a_lookup():
+    color, finish, coats = dykes.compile_plan(Paint).arguments
+
+    assert color.type == internal.Choices(Color)
+    assert color.type.lookup == {"r": Color.RED, "g": Color.GREEN}
+    assert color.type.aliases == {"RED": Color.RED, "GREEN": Color.GREEN}
+    assert finish.type.lookup == {"matte": "matte", "gloss": "gloss"}
+    assert coats.type.lookup == {"1": 1, "2": 2, "3": 3}
+    assert color.metavar == "{r,g}"
+
+
+def test_invalid_choice_is_reported(capsys):
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Paint, args=["BLUE"])
+
+    assert capsys.readouterr().err.endswith(
+        "invalid choice: 'BLUE' (choose from 'r', 'g')\n"
+    )
+
+
+@pytest.mark.parametrize("fast", [False, True])
+@pytest.mark.parametrize("token", ["high", "HIGH"])
+def test_enums_accept_values_and_names(fast, token):
+    assert dykes.parse_args(Tuned, args=["--level", token], fast=fast).level is (
+        Level.HIGH
+    )
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_action_fields_accept_their_values(fast):
+    args = ["--action", "count", "--level", "low"]
+
+    assert dykes.parse_args(Tuned, args=args, fast=fast) == Tuned(
+        dykes.Action.COUNT, Level.LOW
+    )
+
+
+def test_numbered_enums_are_keyed_by_name():
+    (region,) = dykes.compile_plan(Deploy).arguments
+
+    assert region.type("region_3") is region.type("4") is Region.region_3
+
+
+def test_large_choice_sets_are_truncated(capsys):
+    assert dykes.parse_args(Deploy, args=["--region", "region_1999"]).region is (
+        Region.region_1999
+    )
+    help_text = dykes.build_parser(Deploy).format_help()
+    listed = ",".join(f"region_{index}" for index in range(internal.CHOICES_LISTED))
+    assert f"--region {{{listed},... 1992 more}}" in help_text
+
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Deploy, args=["--region", "mars"])
+    error = capsys.readouterr().err
+    assert "'region_7', ... 1992 more)" in error
+    assert "region_8" not in error
+
+
+def test_choices_validate_without_argparse_choices():
+    parser = dykes.build_parser(Deploy)
+
+    assert all(action.choices is None for action in parser._actions)
+
+
+def test_environment_values_are_checked(monkeypatch):
+    monkeypatch.setenv("APP_FINISH", "shiny")
+
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Paint, args=["RED"], env_prefix="APP_")
+
+
+def test_choices_round_trip_through_snapshots():
+    plan = dykes.compile_plan(Paint)
+
+    restored = snapshot.plan_from_dict(snapshot.plan_to_dict(plan))
+
+    assert restored == plan
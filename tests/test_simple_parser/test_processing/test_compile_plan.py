@@ -0,0 +1,95 @@
+import dataclasses
+import pathlib
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import processing
+from dykes.internal import UNSET
+
+
+@dataclasses.dataclass
+class Application:
+    """Application description"""
+
+    path: Annotated[pathlib.Path, "The path to operate on."]
+    dry_run: bool
+    verbosity: dykes.Count
+
+
+def test_plan_fields():
+    plan = dykes.compile_plan(Application)
+
+    assert plan.description == "Application description"
+    assert [argument.dest for argument in plan] == ["path", "dry_run", "verbosity"]
+
+    path, dry_run, verbosity = plan.arguments
+    assert path.is_positional
+    assert path.type is pathlib.Path
+    assert path.help == "The path to operate on."
+    assert dry_run.flags == ("-d", "--dry-run")
+    assert dry_run.action is dykes.Action.STORE_TRUE
+    assert dry_run.type is UNSET
+    assert verbosity.default == 0
+
+
+def test_plan_is_immutable():
+    plan = dykes.compile_plan(Application)
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        plan.arguments[0].help = "Something else."  # type: ignore[misc]
+
+
+@pytest.mark.white_box
+def test_argument_spec_kwargs_skip_unset():
+    path, dry_run, _ = dykes.compile_plan(Application).arguments
+
+    assert path.name_or_flags == ("path",)
+    assert path.kwargs() == {"type": pathlib.Path, "help": "The path to operate on."}
+    assert dry_run.name_or_flags == ("-d", "--dry-run")
+    assert dry_run.kwargs() == {"dest": "dry_run", "action": dykes.Action.STORE_TRUE}
+
+
+def test_lower_plan_matches_build_parser():
+    plan = dykes.compile_plan(Application)
+
+    lowered = processing.lower_plan(plan)
+    built = dykes.build_parser(Application)
+
+    assert lowered.format_help() == built.format_help()
+
+
+def test_colliding_generated_short_flags_raise():
+    @dataclasses.dataclass
+    class Colliding:
+        force: bool
+        follow: bool
+
+    with pytest.raises(ValueError) as err_info:
+        dykes.compile_plan(Colliding)
+    assert str(err_info.value) == (
+        "force and follow both use the flag -f. Give one of them explicit Flags."
+    )
+
+
+def test_generated_short_flag_cannot_shadow_help():
+    @dataclasses.dataclass
+    class Colliding:
+        hidden: bool
+
+    with pytest.raises(ValueError) as err_info:
+        dykes.compile_plan(Colliding)
+    assert str(err_info.value).startswith("help and hidden both use the flag -h.")
+
+
+def test_explicit_flags_resolve_collisions():
+    @dataclasses.dataclass
+    class Resolved:
+        force: bool
+        follow: Annotated[bool, dykes.options.Flags("-F", "--follow")]
+
+    force, follow = dykes.compile_plan(Resolved).arguments
+
+    assert force.flags == ("-f", "--force")
+    assert follow.flags == ("-F", "--follow")
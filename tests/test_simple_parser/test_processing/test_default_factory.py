@@ -0,0 +1,122 @@
+import dataclasses
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import internal
+from dykes.processing import _get_fields
+
+
+def _counting_definition():
+    calls = []
+
+    def load_names():
+        calls.append(1)
+        return ["loaded"]
+
+    @dataclasses.dataclass
+    class Application:
+        names: Annotated[list[str], dykes.options.Flags("-n")] = dataclasses.field(
+            default_factory=load_names
+        )
+
+    return Application, calls
+
+
+@pytest.mark.white_box
+def test_get_fields_does_not_call_factory():
+    Application, calls = _counting_definition()
+
+    fields = _get_fields(Application)
+
+    assert isinstance(fields["names"].value, internal.DefaultFactory)
+    assert calls == []
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_factory_runs_only_when_value_is_absent(fast):
+    Application, calls = _counting_definition()
+
+    assert dykes.parse_args(Application, args=["-n", "a"], fast=fast).names == ["a"]
+    assert calls == []
+    assert dykes.parse_args(Application, args=[], fast=fast).names == ["loaded"]
+    assert calls == [1]
+
+
+def test_each_parse_gets_a_fresh_value():
+    Application, _ = _counting_definition()
+
+    first = dykes.parse_args(Application, args=[])
+    second = dykes.parse_args(Application, args=[])
+
+    assert first.names == second.names
+    assert first.names is not second.names
+
+
+def test_environment_value_skips_factory(monkeypatch):
+    Application, calls = _counting_definition()
+    monkeypatch.setenv("APP_NAMES", "x y")
+
+    assert dykes.parse_args(Application, args=[], env_prefix="APP_").names == ["x", "y"]
+    assert calls == []
+
+
+def test_built_parsers_leave_factory_defaults_out():
+    Application, calls = _counting_definition()
+
+    namespace = dykes.build_parser(Application).parse_args([])
+
+    assert vars(namespace) == {}
+    assert calls == []
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_positional_factories(fast):
+    @dataclasses.dataclass
+    class Application:
+        name: Annotated[str, dykes.options.NArgs("?")] = dataclasses.field(
+            default_factory=lambda: "loaded"
+        )
+        names: Annotated[list[str], dykes.options.NArgs("*")] = dataclasses.field(
+            default_factory=lambda: ["loaded"]
+        )
+
+    assert dykes.parse_args(Application, args=[], fast=fast) == Application(
+        "loaded", ["loaded"]
+    )
+    assert dykes.parse_args(Application, args=["a", "b"], fast=fast) == Application(
+        "a", ["b"]
+    )
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_falsy_defaults_are_kept(fast):
+    @dataclasses.dataclass
+    class Application:
+        level: Annotated[int, dykes.Action.STORE] = 0
+        name: Annotated[str, dykes.Action.STORE] = ""
+        ratio: Annotated[float, dykes.Action.STORE] = 0.0
+
+    args = dykes.parse_args(Application, args=[], fast=fast)
+
+    assert args == Application(0, "", 0.0)
+
+
+def test_falsy_positional_default_needs_optional_nargs():
+    @dataclasses.dataclass
+    class Application:
+        level: int = 0
+
+    with pytest.raises(ValueError):
+        dykes.build_parser(Application)
+
+
+def test_count_rejects_default_factory():
+    @dataclasses.dataclass
+    class Application:
+        verbosity: dykes.Count = dataclasses.field(default_factory=int)
+
+    with pytest.raises(ValueError) as err_info:
+        dykes.build_parser(Application)
+    assert str(err_info.value) == "Count arguments cannot use default_factory."
@@ -0,0 +1,272 @@
+import dataclasses
+import typing
+from typing import Annotated, NamedTuple
+
+import pytest
+
+import dykes
+from dykes import processing, snapshot
+
+
+@dataclasses.dataclass(frozen=True)
+class DbOptions:
+    host: str
+    port: Annotated[int, dykes.options.Flags("-p", "--port")] = 5432
+    read_only: bool = False
+
+
+class CacheOptions(NamedTuple):
+    size: Annotated[int, dykes.options.NArgs("?")] = 128
+    tags: Annotated[list[str], dykes.options.NArgs("*")] = []
+
+
+@dataclasses.dataclass
+class Application:
+    """Serve things."""
+
+    name: str
+    db: DbOptions
+    cache: CacheOptions
+    verbosity: dykes.Count = 0
+
+
+def test_nested_fields_become_prefixed_options():
+    plan = dykes.compile_plan(Application)
+
+    assert [argument.dest for argument in plan.arguments] == [
+        "name",
+        "db.host",
+        "db.port",
+        "db.read_only",
+        "cache.size",
+        "cache.tags",
+        "verbosity",
+    ]
+    flags = {argument.dest: argument.flags for argument in plan.arguments}
+    assert flags["db.host"] == ("--db-host",)
+    assert flags["db.port"] == ("--db-port",)
+    assert flags["db.read_only"] == ("--db-read-only",)
+    assert flags["cache.size"] == ("--cache-size",)
+    assert plan.fields == ("name", "db", "cache", "verbosity")
+    assert [argument.dest for argument in plan.required] == ["name", "db.host"]
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_nested_instances_are_rebuilt(fast):
+    args = dykes.parse_args(
+        Application,
+        args=[
+            "app",
+            "--db-host",
+            "db.local",
+            "--db-read-only",
+            "--cache-tags",
+            "a",
+            "b",
+        ],
+        fast=fast,
+    )
+
+    assert args == Application(
+        name="app",
+        db=DbOptions("db.local", 5432, True),
+        cache=CacheOptions(128, ["a", "b"]),
+        verbosity=0,
+    )
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_missing_required_nested_option(capsys, fast):
+    with pytest.raises(SystemExit) as exit_info:
+        dykes.parse_args(Application, args=["app"], fast=fast)
+
+    assert exit_info.value.code == 2
+    assert capsys.readouterr().err.endswith(
+        "error: the following arguments are required: --db-host\n"
+    )
+
+
+def test_environment_and_config_fill_nested_fields(monkeypatch, tmp_path):
+    config = tmp_path / "app.toml"
+    config.write_text('[db]\nhost = "from-config"\nport = 1\n[cache]\nsize = 9\n')
+    monkeypatch.setenv("APP_DB_PORT", "2")
+
+    args = dykes.parse_args(Application, args=["app"], env_prefix="APP_", config=config)
+
+    assert args.db == DbOptions("from-config", 2)
+    assert args.cache.size == 9
+
+
+@dataclasses.dataclass
+class Defaulted:
+    db: DbOptions = dataclasses.field(
+        default_factory=lambda: DbOptions("prod", 1, read_only=True)
+    )
+    cache: CacheOptions = CacheOptions(64, ["warm"])
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_nested_field_defaults_are_the_base(fast):
+    assert dykes.parse_args(Defaulted, args=[], fast=fast) == Defaulted(
+        DbOptions("prod", 1, True), CacheOptions(64, ["warm"])
+    )
+
+    args = dykes.parse_args(
+        Defaulted, args=["--db-port", "2", "--cache-tags", "cold"], fast=fast
+    )
+
+    assert args == Defaulted(DbOptions("prod", 2, True), CacheOptions(64, ["cold"]))
+
+
+def test_nested_default_factories_run_per_parse():
+    first = dykes.parse_args(Defaulted, args=[])
+    second = dykes.parse_args(Defaulted, args=[])
+
+    assert first.db == second.db
+    assert first.db is not second.db
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_nested_default_factory_runs_once_per_parse(fast):
+    made = []
+
+    def make():
+        made.append(DbOptions(f"host-{len(made)}", len(made)))
+        return made[-1]
+
+    @dataclasses.dataclass
+    class Lazy:
+        db: DbOptions = dataclasses.field(default_factory=make)
+
+    assert dykes.parse_args(Lazy, args=[], fast=fast).db == DbOptions("host-0", 0)
+    assert len(made) == 1
+    assert dykes.parse_args(Lazy, args=["--db-host", "x"], fast=fast).db == (
+        DbOptions("x", 1)
+    )
+    assert len(made) == 2
+
+
+@dataclasses.dataclass
+class Logging:
+    level: dykes.Count
+    targets: Annotated[list[str], dykes.options.Flags("--targets")] = dataclasses.field(
+        default_factory=list
+    )
+
+
+@dataclasses.dataclass
+class Logged:
+    logging: Logging = dataclasses.field(default_factory=lambda: Logging(2, ["stderr"]))
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_nested_default_factories_feed_counts(fast):
+    assert dykes.parse_args(Logged, args=[], fast=fast) == Logged(
+        Logging(2, ["stderr"])
+    )
+    args = dykes.parse_args(Logged, args=["--logging-level"] * 3, fast=fast)
+
+    assert args == Logged(Logging(3, ["stderr"]))
+
+
+def test_required_nested_options_are_required_by_argparse(capsys):
+    parser = processing.lower_plan(dykes.compile_plan(Application), prog="app")
+
+    assert parser.format_usage().startswith("usage: app [-h] --db-host HOST [")
+    with pytest.raises(SystemExit):
+        parser.parse_args(["app"])
+    assert capsys.readouterr().err.endswith(
+        "error: the following arguments are required: --db-host\n"
+    )
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_environment_satisfies_required_nested_options(monkeypatch, fast):
+    monkeypatch.setenv("APP_DB_HOST", "from-env")
+
+    args = dykes.parse_args(Application, args=["app"], env_prefix="APP_", fast=fast)
+
+    assert args.db == DbOptions("from-env")
+
+
+def test_shared_nested_definition_is_compiled_once(monkeypatch):
+    @dataclasses.dataclass
+    class Shared:
+        level: Annotated[int, dykes.Action.STORE] = 1
+
+    @dataclasses.dataclass
+    class First:
+        shared: Shared
+
+    @dataclasses.dataclass
+    class Second:
+        other: Shared
+
+    compiled = []
+    compile_plan = processing.compile_plan
+
+    def counting(definition):
+        compiled.append(definition)
+        return compile_plan(definition)
+
+    monkeypatch.setattr(processing, "compile_plan", counting)
+
+    assert dykes.parse_args(First, args=["--shared-level", "3"]).shared.level == 3
+    assert dykes.parse_args(Second, args=[]).other.level == 1
+    assert compiled.count(Shared) == 1
+
+
+def test_deeply_nested_definitions():
+    @dataclasses.dataclass
+    class Pool:
+        size: Annotated[int, dykes.Action.STORE] = 4
+
+    @dataclasses.dataclass
+    class Db:
+        pool: Pool
+
+    @dataclasses.dataclass
+    class Service:
+        db: Db
+
+    args = dykes.parse_args(Service, args=["--db-pool-size", "8"])
+
+    assert args == Service(Db(Pool(8)))
+
+
+def test_nested_flag_collisions_are_rejected():
+    @dataclasses.dataclass
+    class Clashing:
+        db: DbOptions
+        db_host: Annotated[str, dykes.options.Flags("--db-host")] = "x"
+
+    with pytest.raises(ValueError):
+        dykes.compile_plan(Clashing)
+
+
+def test_empty_nested_definition_is_rejected():
+    @dataclasses.dataclass
+    class Empty:
+        pass
+
+    @dataclasses.dataclass
+    class Holder:
+        empty: Empty
+
+    with pytest.raises(ValueError) as err_info:
+        dykes.compile_plan(Holder)
+    assert str(err_info.value) == "Nested definition Empty is empty."
+
+
+def test_nested_plans_round_trip_through_snapshots():
+    plan = dykes.compile_plan(Application)
+
+    assert snapshot.plan_from_dict(snapshot.plan_to_dict(plan)) == plan
+
+
+def test_help_lists_nested_options():
+    help_text = dykes.build_parser(Application).format_help()
+
+    assert "--db-host HOST" in help_text
+    assert "--cache-tags" in help_text
+    assert typing.get_type_hints(Application)["db"] is DbOptions
@@ -0,0 +1,136 @@
+import asyncio
+import dataclasses
+import threading
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import processing, sources
+
+
+@dataclasses.dataclass
+class Deploy:
+    """Deploy a service."""
+
+    service: str
+    replicas: Annotated[int, dykes.Action.STORE] = 1
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_parse_args_async_value():
+    result = run(dykes.parse_args_async(Deploy, ["api", "-r", "3"]))
+
+    assert result.ok
+    assert result.value == Deploy("api", 3)
+
+
+def test_parse_args_async_command_line_string():
+    result = run(dykes.parse_args_async(Deploy, "'web api' --replicas 2", fast=True))
+
+    assert result.value == Deploy("web api", 2)
+
+
+def test_parse_args_async_error_is_returned(capsys):
+    result = run(dykes.parse_args_async(Deploy, ["api", "-r", "many"]))
+
+    assert not result.ok
+    assert result.value is None
+    assert result.error.status == 2
+    assert result.error.output.endswith(
+        "error: argument -r/--replicas: invalid int value: 'many'\n"
+    )
+    assert capsys.readouterr() == ("", "")
+
+
+def test_parse_args_async_help_is_captured(capsys):
+    result = run(dykes.parse_args_async(Deploy, "--help"))
+
+    assert result.error.status == 0
+    assert "Deploy a service." in result.error.output
+    assert capsys.readouterr() == ("", "")
+
+
+def test_parse_args_async_prog_names_the_program(monkeypatch):
+    monkeypatch.setenv("APP_REPLICAS", "many")
+    results = [
+        run(dykes.parse_args_async(Deploy, args, prog="deploy", env_prefix=prefix))
+        for args, prefix in ((["--help"], None), ([], None), ([], "APP_"))
+    ]
+
+    assert results[0].error.output.startswith("usage: deploy [-h]")
+    assert results[1].error.output.startswith("usage: deploy [-h]")
+    assert "deploy: error: the following arguments are required: service" in (
+        results[1].error.output
+    )
+    assert "deploy: error:" in results[2].error.output
+    assert "usage: deploy" not in run(dykes.parse_args_async(Deploy, "-h")).error.output
+
+
+def test_files_are_read_off_the_loop(tmp_path, monkeypatch):
+    config = tmp_path / "deploy.toml"
+    config.write_text("replicas = 4\n")
+    response = tmp_path / "args.txt"
+    response.write_text("api\n")
+    threads = []
+    read_config = sources.read_config
+
+    def recording_read_config(path):
+        threads.append(threading.current_thread())
+        return read_config(path)
+
+    monkeypatch.setattr(sources, "read_config", recording_read_config)
+
+    result = run(
+        dykes.parse_args_async(
+            Deploy, [f"@{response}"], response_files=True, config=config
+        )
+    )
+
+    assert result.value == Deploy("api", 4)
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_missing_response_file_is_an_error(tmp_path):
+    result = run(
+        dykes.parse_args_async(
+            Deploy, [f"@{tmp_path / 'missing'}"], response_files=True
+        )
+    )
+
+    assert "No such file or directory" in result.error.message
+
+
+def test_concurrent_requests_share_one_parser(monkeypatch):
+    dykes.clear_cache(Deploy)
+    built = []
+    lower_plan = processing.lower_plan
+
+    def counting_lower_plan(plan, *args, **kwargs):
+        built.append(plan)
+        return lower_plan(plan, *args, **kwargs)
+
+    monkeypatch.setattr(processing, "lower_plan", counting_lower_plan)
+
+    async def many():
+        return await asyncio.gather(
+            *(dykes.parse_args_async(Deploy, [f"s{n}"]) for n in range(20))
+        )
+
+    results = run(many())
+
+    assert [result.value.service for result in results] == [f"s{n}" for n in range(20)]
+    assert len(built) == 1
+
+
+@pytest.mark.parametrize("args", (["'unterminated"], "'unterminated"))
+def test_bad_quoting(args):
+    result = run(dykes.parse_args_async(Deploy, args))
+
+    if isinstance(args, str):
+        assert result.error.message == "No closing quotation"
+    else:
+        assert result.value == Deploy("'unterminated")
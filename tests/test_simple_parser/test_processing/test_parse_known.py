@@ -0,0 +1,68 @@
+import dataclasses
+import pathlib
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import processing
+
+
+@dataclasses.dataclass
+class GlobalOptions:
+    plugin: str
+    verbosity: dykes.Count
+    config: Annotated[pathlib.Path, dykes.options.Flags("--config")] = pathlib.Path(
+        "app.toml"
+    )
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_known_arguments_are_parsed(fast):
+    options, remaining = dykes.parse_known(
+        GlobalOptions, args=["deploy", "-vv", "--config", "x.toml"], fast=fast
+    )
+
+    assert options == GlobalOptions("deploy", 2, pathlib.Path("x.toml"))
+    assert remaining == []
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_unknown_arguments_are_returned_in_order(fast):
+    options, remaining = dykes.parse_known(
+        GlobalOptions,
+        args=["-v", "deploy", "--target", "prod", "-x", "--config", "y.toml"],
+        fast=fast,
+    )
+
+    assert options == GlobalOptions("deploy", 1, pathlib.Path("y.toml"))
+    assert remaining == ["--target", "prod", "-x"]
+
+
+def test_other_errors_still_exit(capsys):
+    with pytest.raises(SystemExit) as error:
+        dykes.parse_known(GlobalOptions, args=["--unknown"])
+
+    assert error.value.code == 2
+    assert "required: plugin" in capsys.readouterr().err
+
+
+def test_parse_known_reuses_the_cached_parser():
+    processing.clear_cache(GlobalOptions)
+    dykes.parse_known(GlobalOptions, args=["a", "--other"])
+    parser = processing.parser_cache.get(GlobalOptions)
+
+    dykes.parse_known(GlobalOptions, args=["b", "--other"])
+
+    assert processing.parser_cache.get(GlobalOptions) is parser
+
+
+def test_layered_sources(monkeypatch):
+    monkeypatch.setenv("APP_CONFIG", "env.toml")
+
+    options, remaining = dykes.parse_known(
+        GlobalOptions, args=["deploy", "--extra"], env_prefix="APP_"
+    )
+
+    assert options.config == pathlib.Path("env.toml")
+    assert remaining == ["--extra"]
@@ -0,0 +1,93 @@
+import dataclasses
+import pickle
+
+import pytest
+
+import dykes
+
+
+@dataclasses.dataclass
+class Application:
+    """Counts things."""
+
+    number: int
+    dry_run: bool
+
+
+def test_parse_many_yields_instances_in_order():
+    results = list(dykes.parse_many(Application, [["1"], ["2", "-d"], ["3"]]))
+
+    assert results == [
+        Application(1, False),
+        Application(2, True),
+        Application(3, False),
+    ]
+
+
+def test_parse_many_captures_errors_per_item(capsys):
+    results = list(dykes.parse_many(Application, [["1"], ["one"], [], ["4"]]))
+
+    assert results[0] == Application(1, False)
+    assert isinstance(results[1], dykes.ParseError)
+    assert results[1].message == "argument number: invalid int value: 'one'"
+    assert results[1].status == 2
+    assert results[1].output.startswith("usage: ")
+    assert isinstance(results[2], dykes.ParseError)
+    assert "required: number" in results[2].message
+    assert results[3] == Application(4, False)
+    assert capsys.readouterr().err == ""
+
+
+def test_parse_many_help_is_captured(capsys):
+    (result,) = dykes.parse_many(Application, [["--help"]])
+
+    assert isinstance(result, dykes.ParseError)
+    assert result.status == 0
+    assert "Counts things." in result.output
+    assert capsys.readouterr().out == ""
+
+
+def test_parse_many_splits_strings():
+    results = list(dykes.parse_many(Application, ["5 --dry-run", "'6"]))
+
+    assert results[0] == Application(5, True)
+    assert isinstance(results[1], dykes.ParseError)
+    assert results[1].message == "No closing quotation"
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_parse_many_fast_matches_argparse(fast):
+    lines = [["1"], ["x"], ["2", "-d"], ["-d"]]
+
+    results = [
+        result if not isinstance(result, dykes.ParseError) else result.output
+        for result in dykes.parse_many(Application, lines, fast=fast)
+    ]
+
+    assert results[0] == Application(1, False)
+    assert results[2] == Application(2, True)
+    assert "invalid int value" in results[1]
+    assert "required: number" in results[3]
+
+
+def test_parse_many_with_processes():
+    lines = [[str(number)] for number in range(50)] + [["bad"]]
+
+    results = list(
+        dykes.parse_many(Application, lines, processes=2, chunksize=7, fast=True)
+    )
+
+    assert results[:50] == [Application(number, False) for number in range(50)]
+    assert isinstance(results[50], dykes.ParseError)
+
+
+def test_parse_error_pickles():
+    error = dykes.ParseError("bad", status=2, output="usage: x\n")
+
+    restored = pickle.loads(pickle.dumps(error))
+
+    assert (restored.message, restored.status, restored.output) == (
+        "bad",
+        2,
+        "usage: x\n",
+    )
@@ -0,0 +1,70 @@
+import dataclasses
+
+import pytest
+
+import dykes
+from dykes import processing
+
+
+@dataclasses.dataclass
+class Application:
+    names: list[str]
+    dry_run: bool
+
+
+def test_expand_response_files(tmp_path):
+    nested = tmp_path / "nested.txt"
+    nested.write_text("c\n-d\n")
+    outer = tmp_path / "outer.txt"
+    outer.write_text(f"a\nb\n@{nested}\n")
+
+    assert processing.expand_response_files(["x", f"@{outer}", "y"]) == [
+        "x",
+        "a",
+        "b",
+        "c",
+        "-d",
+        "y",
+    ]
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_parse_args_reads_response_file(tmp_path, fast):
+    response = tmp_path / "args.txt"
+    response.write_text("first\nsecond\n--dry-run\n")
+
+    args = dykes.parse_args(
+        Application, args=["zeroth", f"@{response}"], response_files=True, fast=fast
+    )
+
+    assert args == Application(["zeroth", "first", "second"], True)
+
+
+def test_response_files_are_opt_in(tmp_path):
+    args = dykes.parse_args(Application, args=["@names"])
+
+    assert args.names == ["@names"]
+
+
+def test_missing_response_file_matches_argparse(tmp_path, capsys):
+    missing = str(tmp_path / "missing.txt")
+
+    parser = dykes.build_parser(Application)
+    parser.fromfile_prefix_chars = "@"
+    with pytest.raises(SystemExit):
+        parser.parse_args([f"@{missing}"])
+    expected = capsys.readouterr().err
+
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Application, args=[f"@{missing}"], response_files=True)
+
+    assert capsys.readouterr().err == expected
+
+
+def test_missing_response_file_in_parse_many(tmp_path):
+    (result,) = dykes.parse_many(
+        Application, [[f"@{tmp_path / 'missing.txt'}"]], response_files=True
+    )
+
+    assert isinstance(result, dykes.ParseError)
+    assert "No such file or directory" in result.message
@@ -0,0 +1,243 @@
+import dataclasses
+import enum
+import pathlib
+import typing
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import sources
+from dykes.options import Flags
+
+
+@dataclasses.dataclass
+class Application:
+    path: pathlib.Path
+    dry_run: bool
+    verbosity: dykes.Count
+    level: Annotated[int, dykes.Action.STORE] = 1
+    tags: Annotated[list[str], Flags("--tags")] = None
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "app.toml"
+    path.write_text('level = 5\ndry-run = true\ntags = ["a", "b"]\n')
+    return path
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_cli_beats_env_beats_config_beats_default(monkeypatch, config_file, fast):
+    monkeypatch.setenv("APP_LEVEL", "7")
+    monkeypatch.setenv("APP_VERBOSITY", "2")
+
+    args = dykes.parse_args(
+        Application, args=["x"], env_prefix="APP_", config=config_file, fast=fast
+    )
+    assert args == Application(pathlib.Path("x"), True, 2, 7, ["a", "b"])
+
+    args = dykes.parse_args(
+        Application,
+        args=["x", "--level", "9"],
+        env_prefix="APP_",
+        config=config_file,
+        fast=fast,
+    )
+    assert args.level == 9
+
+
+@pytest.mark.parametrize("fast", (True, False))
+@pytest.mark.parametrize("flags, expected", ((["-v"], 1), (["-vv", "-v"], 3)))
+def test_cli_counts_replace_env_counts(monkeypatch, fast, flags, expected):
+    monkeypatch.setenv("APP_VERBOSITY", "3")
+
+    args = dykes.parse_args(
+        Application, args=["x", *flags], env_prefix="APP_", fast=fast
+    )
+
+    assert args.verbosity == expected
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_env_only(monkeypatch, fast):
+    monkeypatch.setenv("APP_DRY_RUN", "yes")
+    monkeypatch.setenv("APP_TAGS", "one 'two three'")
+
+    args = dykes.parse_args(Application, args=["x"], env_prefix="APP_", fast=fast)
+
+    assert args.dry_run is True
+    assert args.tags == ["one", "two three"]
+    assert args.level == 1
+
+
+@dataclasses.dataclass
+class Copy:
+    source: pathlib.Path
+    files: Annotated[list[str], dykes.options.NArgs("*")]
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_positionals_come_from_env(monkeypatch, fast):
+    monkeypatch.setenv("X_SOURCE", "here")
+    monkeypatch.setenv("X_FILES", "a 'b c'")
+
+    args = dykes.parse_args(Copy, args=[], env_prefix="X_", fast=fast)
+    assert args == Copy(pathlib.Path("here"), ["a", "b c"])
+
+    args = dykes.parse_args(Copy, args=["there", "d"], env_prefix="X_", fast=fast)
+    assert args == Copy(pathlib.Path("there"), ["d"])
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_positionals_come_from_config(tmp_path, fast):
+    config = tmp_path / "copy.toml"
+    config.write_text('source = "here"\nfiles = ["a"]\n')
+
+    args = dykes.parse_args(Copy, args=["there"], config=config, fast=fast)
+
+    assert args == Copy(pathlib.Path("there"), ["a"])
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_missing_positional_without_sources(capsys, fast):
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Copy, args=[], env_prefix="X_", fast=fast)
+
+    assert capsys.readouterr().err.endswith(
+        "error: the following arguments are required: source, files\n"
+    )
+    assert dykes.parse_args(Copy, args=["x"], fast=fast).files == []
+
+
+def test_built_parsers_keep_positionals_required(capsys):
+    with pytest.raises(SystemExit):
+        dykes.build_parser(Copy).parse_args(["--unknown"])
+
+    assert capsys.readouterr().err.endswith(
+        "error: the following arguments are required: source, files\n"
+    )
+
+
+@dataclasses.dataclass
+class Move:
+    source: str
+    target: str
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_only_filled_positionals_are_relaxed(monkeypatch, capsys, fast):
+    monkeypatch.setenv("X_TARGET", "there")
+
+    assert dykes.parse_args(Move, args=["here"], env_prefix="X_", fast=fast) == Move(
+        "here", "there"
+    )
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Move, args=["--unknown"], env_prefix="X_", fast=fast)
+
+    assert capsys.readouterr().err.endswith(
+        "error: the following arguments are required: source\n"
+    )
+
+
+def test_missing_config_is_ignored(tmp_path):
+    args = dykes.parse_args(Application, args=["x"], config=tmp_path / "none.toml")
+
+    assert args == Application(pathlib.Path("x"), False, 0, 1, None)
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_bad_env_value_errors(monkeypatch, capsys, fast):
+    monkeypatch.setenv("APP_LEVEL", "high")
+
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Application, args=["x"], env_prefix="APP_", fast=fast)
+
+    assert (
+        "error: environment variable APP_LEVEL: invalid int value: 'high'"
+        in capsys.readouterr().err
+    )
+
+
+def test_bad_config_value_errors(tmp_path):
+    config = tmp_path / "app.toml"
+    config.write_text('dry_run = "sure"\n')
+
+    (result,) = dykes.parse_many(Application, [["x"]], config=config)
+
+    assert isinstance(result, dykes.ParseError)
+    assert result.message == f"{config} key dry_run: invalid bool value: 'sure'"
+
+
+class Color(enum.Enum):
+    RED = 1
+    GREEN = 2
+
+
+@dataclasses.dataclass
+class Typed:
+    level: Annotated[typing.Literal[1, 2, 3], Flags("--level")] = 1
+    color: Annotated[Color, Flags("--color")] = Color.RED
+    path: Annotated[pathlib.Path, Flags("--path")] = pathlib.Path(".")
+    ratio: Annotated[float, Flags("--ratio")] = 1.0
+
+
+def test_config_scalars_convert_as_their_text(tmp_path):
+    config = tmp_path / "typed.toml"
+    config.write_text("level = 2\ncolor = 2\npath = 5\nratio = 3\n")
+
+    args = dykes.parse_args(Typed, args=[], config=config)
+
+    assert args == Typed(2, Color.GREEN, pathlib.Path("5"), 3.0)
+    assert type(args.ratio) is float
+
+
+@pytest.mark.parametrize(
+    "line, message",
+    (
+        ("level = 7", "key level: invalid choice value: 7"),
+        ("color = 3", "key color: invalid Color value: 3"),
+        ("ratio = true", "key ratio: invalid float value: True"),
+        ("path = [1]", "key path: invalid Path value: [1]"),
+    ),
+)
+def test_bad_config_scalars_error(tmp_path, line, message):
+    config = tmp_path / "typed.toml"
+    config.write_text(line + "\n")
+
+    (result,) = dykes.parse_many(Typed, [[]], config=config)
+
+    assert isinstance(result, dykes.ParseError)
+    assert result.message == f"{config} {message}"
+
+
+def test_malformed_config_errors(tmp_path):
+    config = tmp_path / "app.toml"
+    config.write_text("level = \n")
+
+    (result,) = dykes.parse_many(Application, [["x"]], config=config)
+
+    assert isinstance(result, dykes.ParseError)
+    assert result.message.startswith(f"{config}: ")
+
+
+@pytest.mark.white_box
+def test_config_cached_until_changed(config_file):
+    first = sources.read_config(config_file)
+    assert sources.read_config(config_file) is first
+
+    config_file.write_text("level = 6\n")
+
+    assert sources.read_config(config_file) == {"level": 6}
+
+
+@pytest.mark.white_box
+def test_compile_sources():
+    sources_by_dest = {
+        source.argument.dest: source
+        for source in sources.compile_sources(dykes.compile_plan(Application))
+    }
+
+    assert sources_by_dest["dry_run"].environment_suffix == "DRY_RUN"
+    assert sources_by_dest["dry_run"].config_keys == ("dry_run", "dry-run")
+    assert sources_by_dest["path"].config_keys == ("path",)
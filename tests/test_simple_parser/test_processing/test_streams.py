@@ -0,0 +1,73 @@
+import dataclasses
+import io
+import pathlib
+import types
+import typing
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import internal
+
+
+@dataclasses.dataclass
+class Application:
+    paths: typing.Iterator[pathlib.Path]
+    numbers: Annotated[typing.Iterator[int], dykes.options.Flags("-n")] = None
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_stream_from_file(tmp_path, fast):
+    source = tmp_path / "paths.txt"
+    source.write_text("a.txt\n\nb/c.txt\n")
+
+    args = dykes.parse_args(Application, args=[str(source)], fast=fast)
+
+    assert isinstance(args.paths, types.GeneratorType)
+    assert list(args.paths) == [pathlib.Path("a.txt"), pathlib.Path("b/c.txt")]
+    assert args.numbers is None
+
+
+def test_stream_from_stdin(monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO("1\n2\n3\n"))
+
+    args = dykes.parse_args(Application, args=["-", "-n", "-"])
+
+    assert sum(args.numbers) == 6
+
+
+def test_stream_is_lazy(tmp_path):
+    source = tmp_path / "numbers.txt"
+    source.write_text("1\ntwo\n")
+
+    args = dykes.parse_args(Application, args=["-", "-n", str(source)])
+
+    assert next(args.numbers) == 1
+    with pytest.raises(ValueError):
+        next(args.numbers)
+
+
+def test_missing_stream_source_errors(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        dykes.parse_args(Application, args=[str(tmp_path / "missing.txt")])
+
+    assert "argument paths: can't open" in capsys.readouterr().err
+
+
+@pytest.mark.white_box
+def test_stream_plan():
+    paths, numbers = dykes.compile_plan(Application).arguments
+
+    assert paths.type == internal.StreamSource(pathlib.Path)
+    assert paths.nargs is internal.UNSET
+    assert numbers.type == internal.StreamSource(int)
+
+
+def test_stream_rejects_nargs():
+    @dataclasses.dataclass
+    class Broken:
+        paths: Annotated[typing.Iterator[str], dykes.options.NArgs("+")]
+
+    with pytest.raises(ValueError):
+        dykes.build_parser(Broken)
@@ -0,0 +1,171 @@
+import dataclasses
+import enum
+import json
+import pathlib
+import typing
+from typing import Annotated
+
+import pytest
+
+import dykes
+from dykes import processing, snapshot
+
+
+def default_names():
+    return ["a", "b"]
+
+
+@dataclasses.dataclass
+class Application:
+    """Snapshot me."""
+
+    path: Annotated[pathlib.Path, "Where to go."]
+    names: Annotated[list[str], dykes.options.Flags("-n")] = dataclasses.field(
+        default_factory=default_names
+    )
+    verbosity: dykes.Count = 1
+
+
+@dataclasses.dataclass
+class Bulked:
+    numbers: Annotated[list[int], dykes.options.Bulk(tuple, memoize=True)]
+
+
+@dataclasses.dataclass
+class Streamed:
+    paths: typing.Iterator[pathlib.Path]
+
+
+@dataclasses.dataclass
+class Accumulated:
+    tags: Annotated[frozenset[str], dykes.Action.APPEND]
+
+
+@dataclasses.dataclass
+class Unstorable:
+    start: Annotated[pathlib.Path, dykes.Action.STORE] = pathlib.Path(".")
+
+
+def test_round_trip(tmp_path):
+    plan = dykes.compile_plan(Application)
+
+    assert snapshot.store(Application, plan, tmp_path)
+    assert snapshot.load(Application, tmp_path) == plan
+
+
+def test_round_trip_bulk(tmp_path):
+    plan = dykes.compile_plan(Bulked)
+
+    assert snapshot.store(Bulked, plan, tmp_path)
+    assert snapshot.load(Bulked, tmp_path) == plan
+
+
+def test_round_trip_stream(tmp_path):
+    plan = dykes.compile_plan(Streamed)
+
+    assert snapshot.store(Streamed, plan, tmp_path)
+    assert snapshot.load(Streamed, tmp_path) == plan
+
+
+def test_round_trip_accumulated(tmp_path):
+    plan = dykes.compile_plan(Accumulated)
+
+    assert snapshot.store(Accumulated, plan, tmp_path)
+    assert snapshot.load(Accumulated, tmp_path) == plan
+
+
+def test_missing_snapshot_loads_none(tmp_path):
+    assert snapshot.load(Application, tmp_path) is None
+
+
+def test_stale_snapshot_loads_none(tmp_path):
+    snapshot.store(Application, dykes.compile_plan(Application), tmp_path)
+    path = snapshot.snapshot_path(Application, tmp_path)
+    data = json.loads(path.read_text())
+    data["source_hash"] = "0" * 64
+    path.write_text(json.dumps(data))
+
+    assert snapshot.load(Application, tmp_path) is None
+
+
+def test_corrupt_snapshot_loads_none(tmp_path):
+    snapshot.snapshot_path(Application, tmp_path).write_text("{not json")
+
+    assert snapshot.load(Application, tmp_path) is None
+
+
+def test_unstorable_default_is_skipped(tmp_path):
+    assert not snapshot.store(Unstorable, dykes.compile_plan(Unstorable), tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unwritable_directory_is_skipped(tmp_path, monkeypatch):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    directory = blocker / "snapshots"
+
+    assert not snapshot.store(Application, dykes.compile_plan(Application), directory)
+
+    monkeypatch.setenv(snapshot.ENVIRONMENT_VARIABLE, str(directory))
+    dykes.clear_cache(Application)
+    assert dykes.parse_args(Application, args=["here"]).path == pathlib.Path("here")
+    dykes.clear_cache(Application)
+
+
+@pytest.mark.parametrize("target", ["directory", "file"])
+def test_snapshots_others_can_write_are_not_loaded(tmp_path, target):
+    plan = dykes.compile_plan(Application)
+    assert snapshot.store(Application, plan, tmp_path)
+    path = snapshot.snapshot_path(Application, tmp_path)
+    (tmp_path if target == "directory" else path).chmod(0o777)
+
+    assert snapshot.load(Application, tmp_path) is None
+
+
+class Mode(enum.Enum):
+    FAST = "fast"
+    SAFE = "safe"
+
+
+@dataclasses.dataclass
+class Enumerated:
+    mode: Annotated[Mode, dykes.Action.STORE] = Mode.SAFE
+    modes: Annotated[list[Mode], dykes.options.Flags("--modes")] = dataclasses.field(
+        default_factory=list
+    )
+    pick: Annotated[typing.Literal[Mode.FAST, "other"], dykes.Action.STORE] = "other"
+
+
+def test_round_trip_enum_defaults(tmp_path):
+    plan = dykes.compile_plan(Enumerated)
+
+    assert snapshot.store(Enumerated, plan, tmp_path)
+    loaded = snapshot.load(Enumerated, tmp_path)
+    assert loaded == plan
+    assert loaded.arguments[0].default is Mode.SAFE
+
+
+def test_local_definition_is_skipped(tmp_path):
+    @dataclasses.dataclass
+    class Local:
+        flag: bool
+
+    assert not snapshot.store(Local, dykes.compile_plan(Local), tmp_path)
+
+
+@pytest.mark.white_box
+def test_parse_args_uses_snapshot_without_introspection(tmp_path, monkeypatch):
+    monkeypatch.setenv(snapshot.ENVIRONMENT_VARIABLE, str(tmp_path))
+    dykes.clear_cache(Application)
+    first = dykes.parse_args(Application, args=["here"])
+    assert snapshot.snapshot_path(Application, tmp_path).exists()
+
+    def fail(definition):
+        raise AssertionError("Introspected despite a fresh snapshot.")
+
+    monkeypatch.setattr(processing, "compile_plan", fail)
+    dykes.clear_cache(Application)
+    second = dykes.parse_args(Application, args=["here"])
+
+    assert first == second == Application(pathlib.Path("here"), ["a", "b"], 1)
+    dykes.clear_cache(Application)
@@ -0,0 +1,111 @@
+import dataclasses
+import pathlib
+import typing
+from typing import Annotated
+
+import pytest
+
+import dykes
+
+
+@dataclasses.dataclass
+class GlobalOptions:
+    """Run a plugin."""
+
+    plugin: str
+    verbosity: dykes.Count
+    dry_run: bool
+
+
+class Database(typing.NamedTuple):
+    host: Annotated[str, dykes.options.Flags("--host")] = "localhost"
+
+
+@dataclasses.dataclass
+class PluginOptions:
+    paths: Annotated[list[pathlib.Path], dykes.options.NArgs("*")]
+    target: Annotated[str, dykes.options.Flags("--target")] = "staging"
+    db: Database = Database()
+
+
+@dataclasses.dataclass
+class Clashing:
+    verbose: bool
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_one_pass_fills_every_stage(fast):
+    stages = dykes.Stages(GlobalOptions, PluginOptions)
+
+    (global_options, plugin_options), remaining = stages.parse_known(
+        ["-vd", "deploy", "a", "b", "--target", "prod", "--db-host", "db"], fast=fast
+    )
+
+    assert global_options == GlobalOptions("deploy", 1, True)
+    assert plugin_options == PluginOptions(
+        [pathlib.Path("a"), pathlib.Path("b")], "prod", Database("db")
+    )
+    assert remaining == []
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_later_stage_values_are_not_positionals(fast):
+    stages = dykes.Stages(GlobalOptions, PluginOptions)
+
+    (global_options, plugin_options), remaining = stages.parse_known(
+        ["--target", "prod", "deploy", "x", "--other"], fast=fast
+    )
+
+    assert global_options.plugin == "deploy"
+    assert plugin_options.target == "prod"
+    assert plugin_options.paths == [pathlib.Path("x")]
+    assert remaining == ["--other"]
+
+
+def test_parse_args_rejects_leftovers(capsys):
+    stages = dykes.Stages(GlobalOptions, PluginOptions, prog="app")
+
+    with pytest.raises(SystemExit):
+        stages.parse_args(["deploy", "--other"])
+
+    assert "app: error: unrecognized arguments: --other" in capsys.readouterr().err
+
+
+def test_help_and_errors_use_field_names(capsys):
+    stages = dykes.Stages(GlobalOptions, PluginOptions, prog="app")
+
+    help_text = stages.parser.format_help()
+    with pytest.raises(SystemExit):
+        stages.parse_args([])
+
+    assert "0." not in help_text and "1." not in help_text
+    assert "--target TARGET" in help_text
+    assert "usage: app [-h] [-v] [-d]" in help_text
+    assert "required: plugin" in capsys.readouterr().err
+
+
+def test_stages_share_environment_names(monkeypatch):
+    monkeypatch.setenv("APP_DRY_RUN", "yes")
+    monkeypatch.setenv("APP_DB_HOST", "env-db")
+    stages = dykes.Stages(GlobalOptions, PluginOptions)
+
+    (global_options, plugin_options), _ = stages.parse_known(
+        ["deploy"], env_prefix="APP_"
+    )
+
+    assert global_options.dry_run is True
+    assert plugin_options.db == Database("env-db")
+
+
+def test_shared_flags_are_rejected():
+    stages = dykes.Stages(GlobalOptions, Clashing)
+
+    with pytest.raises(
+        ValueError, match="GlobalOptions.verbosity and Clashing.verbose"
+    ):
+        stages.parse_known([])
+
+
+def test_stages_need_a_definition():
+    with pytest.raises(ValueError):
+        dykes.Stages()
@@ -0,0 +1,120 @@
+import dataclasses
+import pathlib
+from typing import NamedTuple
+
+import pytest
+
+import dykes
+from dykes import subcommands
+
+
+@dataclasses.dataclass
+class AddFile:
+    """Add a file.
+
+    Longer description that is not part of the summary.
+    """
+
+    path: pathlib.Path
+    force: bool
+
+
+class RemoveFile(NamedTuple):
+    """Remove a file."""
+
+    path: pathlib.Path
+    verbosity: dykes.Count
+
+
+def test_command_names_from_union():
+    commands = dykes.Commands(AddFile | RemoveFile)
+
+    assert list(commands.commands) == ["add-file", "remove-file"]
+    assert commands.summaries == {
+        "add-file": "Add a file.",
+        "remove-file": "Remove a file.",
+    }
+
+
+def test_undocumented_commands_have_no_summary():
+    @dataclasses.dataclass
+    class Undocumented:
+        path: str
+
+    class Bare(NamedTuple):
+        path: str
+
+    @dataclasses.dataclass
+    class Inherited(AddFile):
+        pass
+
+    commands = dykes.Commands(Undocumented | Bare | Inherited)
+
+    assert commands.summaries == {
+        "undocumented": "",
+        "bare": "",
+        "inherited": "",
+    }
+
+
+@pytest.mark.parametrize("fast", (True, False))
+def test_parse_selected_command(fast):
+    commands = dykes.Commands({"add": AddFile, "rm": RemoveFile})
+
+    assert commands.parse_args(["add", "x", "-f"], fast=fast) == AddFile(
+        pathlib.Path("x"), True
+    )
+    assert commands.parse_args(["rm", "y", "-vv"], fast=fast) == RemoveFile(
+        pathlib.Path("y"), 2
+    )
+
+
+def test_only_selected_command_is_built():
+    commands = dykes.Commands({"add": AddFile, "rm": RemoveFile})
+
+    commands.parse_args(["add", "x"])
+
+    assert list(commands._subparsers) == ["add"]
+
+
+def test_help_listing_does_not_build_subparsers(capsys):
+    commands = dykes.Commands(
+        AddFile | RemoveFile, prog="tool", description="File tool."
+    )
+
+    with pytest.raises(SystemExit) as exit_info:
+        commands.parse_args(["--help"])
+
+    assert exit_info.value.code == 0
+    output = capsys.readouterr().out
+    assert "File tool." in output
+    assert "add-file" in output and "Add a file." in output
+    assert "Longer description" not in output
+    assert commands._subparsers == {}
+
+
+@pytest.mark.parametrize("args", ([], ["bogus"], ["-x", "add-file"]))
+def test_bad_command_errors(capsys, args):
+    commands = dykes.Commands(AddFile | RemoveFile, prog="tool")
+
+    with pytest.raises(SystemExit) as exit_info:
+        commands.parse_args(args)
+
+    assert exit_info.value.code == 2
+    assert capsys.readouterr().err.startswith("usage: tool ")
+
+
+def test_subcommand_help_uses_full_prog(capsys):
+    commands = dykes.Commands(AddFile | RemoveFile, prog="tool")
+
+    with pytest.raises(SystemExit):
+        commands.parse_args(["add-file", "--help"])
+
+    output = capsys.readouterr().out
+    assert output.startswith("usage: tool add-file [-h] [-f] path")
+    assert "Longer description" in output
+
+
+def test_command_name():
+    assert subcommands.command_name(AddFile) == "add-file"
+    assert subcommands.command_name(RemoveFile) == "remove-file"